@@ -1,23 +1,27 @@
 # ai_utils_bert.py
-import openai
-from sentence_transformers import util 
-from transformers import AutoTokenizer, AutoModel
-import torch
+# torch / transformers / openai 등 무거운 모듈과 모델은 처음 사용할 때 로드합니다. (import 시간 단축)
 import os
-import gdown
-import streamlit as st
+from instrumentation import metrics, timed
+from resources import get_embedding_model
 
 
 def set_openai_api_key(api_key=None):
     """외부에서 API 키를 설정할 수 있도록 함수 추가"""
+    import openai
+    from gpt_client import reset_gpt_client
+
     if api_key:
         openai.api_key = api_key
     elif "OPENAI_API_KEY" in os.environ:
         openai.api_key = os.environ["OPENAI_API_KEY"]
+    # 공유 GPT 클라이언트가 새 키로 다시 만들어지도록 초기화
+    reset_gpt_client()
 
 
 
 def download_models():
+    import gdown
+
     # 모델을 저장할 디렉토리 생성
     os.makedirs('./bert', exist_ok=True)
     os.makedirs('./trained_model', exist_ok=True)
@@ -38,65 +42,130 @@ def download_models():
 
 
 class BERTEmbeddingModel:
-    def __init__(self, model_path):
+    def __init__(self, model_path, backend=None):
+        from transformers import AutoTokenizer, AutoModel
+        from inference_backend import apply_backend, default_backend
+        from inference_runtime import TokenizerPool, configure_torch_threads
+
         download_models()
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model = AutoModel.from_pretrained(model_path)
+        configure_torch_threads()
+        # 여러 세션 스레드가 함께 쓰므로 토크나이저는 복사본 풀에서 빌려 사용 (모델은 읽기만 하므로 공유)
+        self.tokenizer = TokenizerPool(AutoTokenizer.from_pretrained(model_path))
+        # backend: "torch"(fp32) / "int8"(동적 양자화) / "onnx"(ONNX Runtime), 기본값은 INFERENCE_BACKEND 환경 변수
+        self.backend = backend or default_backend()
+        self.model = apply_backend(AutoModel.from_pretrained(model_path), self.tokenizer, model_path, self.backend)
 
-    def encode(self, text, convert_to_tensor=True):
+    @timed("embedding_encode")
+    def encode(self, text, convert_to_tensor=True, batch_size=32):
         """
         문자열 또는 문자열 리스트를 받아 모델의 마지막 은닉 상태에서 평균 풀링하여
         임베딩 벡터를 생성합니다.
+        리스트는 한 번에 패딩하여 토크나이즈한 뒤 batch_size 개씩 묶어 forward 합니다.
+        배치 경로의 결과는 단일 경로(_encode_single)와 float32 기준 atol=1e-5 이내로 같습니다.
         """
         if isinstance(text, list):
-            embeddings = [self._encode_single(t) for t in text]
-            return torch.stack(embeddings)
+            metrics.count("embedding_texts", len(text))
+            return self._encode_batch(text, batch_size)
         else:
+            metrics.count("embedding_texts")
             return self._encode_single(text)
 
     def _encode_single(self, text):
+        import torch
+        from inference_runtime import inference_slot
+
         inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-        with torch.no_grad():
+        with torch.no_grad(), inference_slot():
             outputs = self.model(**inputs)
         # 마지막 은닉 상태: (batch_size=1, seq_len, hidden_size)
-        token_embeddings = outputs.last_hidden_state  
-        attention_mask = inputs["attention_mask"]
+        embedding = self._mean_pool(outputs.last_hidden_state, inputs["attention_mask"])
+        return embedding.squeeze(0)
+
+    def _encode_batch(self, texts, batch_size=32):
+        import torch
+        from inference_runtime import inference_slot
+
+        if not texts:
+            return torch.empty(0, self.model.config.hidden_size)
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, padding=True)
+        lengths = inputs["attention_mask"].sum(dim=1)
+        # 길이순으로 정렬해 마이크로 배치마다 잘라낼 수 있는 패딩을 최대화
+        order = torch.argsort(lengths, descending=True)
+        embeddings = torch.empty(len(texts), self.model.config.hidden_size)
+        for start in range(0, len(texts), max(1, batch_size)):
+            idx = order[start:start + batch_size]
+            seq_len = int(lengths[idx].max())
+            batch = {key: value[idx, :seq_len] for key, value in inputs.items()}
+            with torch.no_grad(), inference_slot():
+                outputs = self.model(**batch)
+            embeddings[idx] = self._mean_pool(outputs.last_hidden_state, batch["attention_mask"])
+        return embeddings
+
+    @staticmethod
+    def _mean_pool(token_embeddings, attention_mask):
         # 패딩 토큰을 제외하고 평균 풀링
         mask = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
-        sum_embeddings = torch.sum(token_embeddings * mask, dim=1)
-        sum_mask = torch.clamp(mask.sum(dim=1), min=1e-9)
-        embedding = sum_embeddings / sum_mask
-        return embedding.squeeze(0)
+        sum_embeddings = (token_embeddings * mask).sum(dim=1)
+        sum_mask = mask.sum(dim=1).clamp(min=1e-9)
+        return sum_embeddings / sum_mask
+
+# 임베딩 모델 경로 (체크포인트 비교 평가 시 BERT_MODEL_PATH 환경 변수로 바꿀 수 있음)
+BERT_MODEL_PATH = os.environ.get("BERT_MODEL_PATH", "./bert")
+
 
-# 전역 변수 embedding_model을 BERT 모델로 초기화합니다.
-embedding_model = BERTEmbeddingModel('./bert')
+def __getattr__(name):
+    """
+    예전 코드와의 호환을 위해 ai_utils_bert.embedding_model 을 유지합니다.
+    처음 접근할 때 BERT 모델을 로드하며, 프로세스 공유 인스턴스(resources.get_embedding_model)를 반환합니다.
+    """
+    if name == "embedding_model":
+        return get_embedding_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 # -----------------------------------------------------------------------------
 
-def compute_secret_embeddings(secret_words):
+# ./bert 체크포인트 해시로 주소가 정해지는 디스크 임베딩 캐시 (처음 사용할 때 생성)
+_embedding_store = None
+
+
+def reset_embedding_store():
+    """임베딩 모델 파일이 바뀌었을 때 디스크 캐시를 다음 호출에서 새 모델 해시로 다시 열도록 합니다."""
+    global _embedding_store
+    _embedding_store = None
+
+def compute_secret_embeddings(secret_words, use_cache=True):
     """
     secret_words 리스트의 각 단어에 대해 임베딩을 계산하여
     딕셔너리 형태로 반환합니다.
+    use_cache=True 이면 디스크 캐시(./bert_cache)에 없는 단어만 BERT 로 계산합니다.
     """
-    embeddings = {}
-    for word in secret_words:
-        embeddings[word] = embedding_model.encode(word, convert_to_tensor=True)
-    return embeddings
+    from embedding_cache import EmbeddingStore
+
+    global _embedding_store
+    embedding_model = get_embedding_model()
+    if not use_cache:
+        vectors = embedding_model.encode(list(secret_words), convert_to_tensor=True)
+        return dict(zip(secret_words, vectors))
+    if _embedding_store is None:
+        # 양자화/ONNX 백엔드의 벡터는 fp32 와 조금 다르므로 캐시를 따로 둠
+        variant = None if embedding_model.backend == "torch" else embedding_model.backend
+        _embedding_store = EmbeddingStore(BERT_MODEL_PATH, variant=variant)
+    return _embedding_store.get_many(list(secret_words), embedding_model.encode)
 
 def gpt_generate_response(system_prompt, max_tokens=60, temperature=0.7):
     """
     주어진 시스템 프롬프트를 사용해 GPT API를 호출하고 응답 텍스트를 생성합니다.
-    실패 시 None을 반환합니다.
+    프로세스 공유 클라이언트(연결 재사용, 타임아웃/재시도 포함)를 사용하며,
+    실패 시 None을 반환합니다. (소요 시간/실패 수는 GPTClient 가 기록)
     """
-    client = openai.OpenAI()
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": system_prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens,
-            n=1,
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"GPT API 호출 중 오류 발생: {e}")
-        return None
+    from gpt_client import get_gpt_client
+
+    return get_gpt_client().generate(system_prompt, max_tokens=max_tokens, temperature=temperature)
+
+def gpt_stream_response(system_prompt, max_tokens=60, temperature=0.7):
+    """
+    gpt_generate_response 의 스트리밍 버전. 요청을 바로 시작하고 gpt_client.ResponseStream 을 반환합니다.
+    for 문으로 토큰 조각을 받으며, 반복을 중간에 멈추거나 cancel() 하면 요청이 취소됩니다.
+    """
+    from gpt_client import get_gpt_client
+
+    return get_gpt_client().stream(system_prompt, max_tokens=max_tokens, temperature=temperature)
@@ -0,0 +1,113 @@
+# ann_index.py
+"""
+NumPy 로 구현한 간단한 IVF(inverted file) 근사 최근접 이웃 인덱스.
+
+L2 정규화된 벡터를 k-means 로 nlist 개 군집으로 나누고, 질의마다 가장 가까운 nprobe 개 군집의
+벡터만 내적으로 비교합니다. 후보가 k 개보다 적으면 전체 탐색(exact)으로 대신합니다.
+"""
+
+import numpy as np
+
+# 이보다 작은 어휘는 인덱스 없이 전체 탐색이 더 빠름
+ANN_MIN_SIZE = 4096
+
+
+def _normalize(x):
+    return x / np.maximum(np.linalg.norm(x, axis=-1, keepdims=True), 1e-12)
+
+
+def dot_scores(vectors, queries, scales=None, chunk=8192):
+    """
+    (B, d) float32 질의와 (N, d) 벡터의 내적 (B, N) 을 반환합니다.
+    fp16/int8 벡터(packed vocabulary memmap 등)는 chunk 행씩만 float32 로 올려 계산하므로 전체 복사본을 만들지 않고,
+    scales((N,) 행별 스케일)를 주면 내적에 곱합니다.
+    """
+    if vectors.dtype == np.float32:
+        scores = queries @ vectors.T
+    else:
+        scores = np.empty((queries.shape[0], vectors.shape[0]), dtype=np.float32)
+        for start in range(0, vectors.shape[0], chunk):
+            scores[:, start:start + chunk] = queries @ np.asarray(vectors[start:start + chunk], dtype=np.float32).T
+    if scales is not None:
+        scores *= scales
+    return scores
+
+
+def exact_search(vectors, queries, k, scales=None):
+    """전체 탐색: (B, k) 점수와 인덱스를 점수 내림차순으로 반환합니다."""
+    scores = dot_scores(vectors, queries, scales)
+    k = min(k, vectors.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+class IVFIndex:
+    """
+    vectors: L2 정규화된 (N, d) float 행렬 (내적 = 코사인 유사도)
+             int8 처럼 행별 스케일을 곱해야 정규화되는 행렬이면 scales((N,) float32)를 함께 줍니다.
+    nlist:   군집 수 (기본 sqrt(N)), nprobe: 질의마다 살펴볼 군집 수 (기본 nlist / 8, 최소 1)
+    k-means 는 군집당 train_per_list 개 정도의 표본으로 학습한 뒤 전체 벡터를 가장 가까운 중심에 배정합니다.
+    """
+
+    def __init__(self, vectors, nlist=None, nprobe=None, iterations=10, train_per_list=64, seed=0, scales=None):
+        self.vectors = vectors
+        self.scales = scales
+        n = vectors.shape[0]
+        self.nlist = max(1, min(n, nlist or int(np.sqrt(n))))
+        self.nprobe = max(1, min(self.nlist, nprobe or self.nlist // 8))
+        rng = np.random.default_rng(seed)
+        train_size = self.nlist * train_per_list
+        train = vectors[rng.choice(n, min(n, train_size), replace=False)] if n > train_size else vectors
+        # 행별 스케일은 군집 배정(argmax)에 영향을 주지 않으므로 표본만 다시 정규화해 학습
+        self.centroids = self._kmeans(_normalize(np.asarray(train, dtype=np.float32)), iterations, rng)
+
+        # 군집별 벡터 번호를 한 배열에 이어 붙이고 (CSR) offsets 로 구간을 표시
+        assignments = self._assign(vectors)
+        self.ids = np.argsort(assignments, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=self.nlist))])
+
+    def _assign(self, x, chunk=8192):
+        return np.concatenate([
+            np.argmax(np.asarray(x[start:start + chunk], dtype=np.float32) @ self.centroids.T, axis=1)
+            for start in range(0, x.shape[0], chunk)
+        ])
+
+    def _kmeans(self, train, iterations, rng):
+        # 구면 k-means: 내적으로 배정하고 중심은 정규화된 평균
+        centroids = train[rng.choice(train.shape[0], self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(train @ centroids.T, axis=1)
+            counts = np.bincount(assignments, minlength=self.nlist)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            empty = counts == 0
+            # 군집 순으로 정렬한 뒤 구간 합으로 군집별 합계 계산
+            sums = np.zeros_like(centroids)
+            sums[~empty] = np.add.reduceat(train[np.argsort(assignments, kind="stable")], starts[~empty])
+            # 빈 군집은 임의의 표본으로 다시 시작
+            sums[empty] = train[rng.choice(train.shape[0], int(empty.sum()))]
+            centroids = _normalize(sums)
+        return centroids.astype(np.float32)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def search(self, queries, k, nprobe=None):
+        """(B, d) 질의마다 상위 k 개의 (점수, 인덱스) 를 (B, k) 배열 두 개로 반환합니다."""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.vectors.shape[1])
+        k = min(k, len(self))
+        nprobe = min(self.nlist, nprobe or self.nprobe)
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        all_scores = np.empty((queries.shape[0], k), dtype=np.float32)
+        all_ids = np.empty((queries.shape[0], k), dtype=np.int64)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self.ids[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+            if candidates.shape[0] < k:
+                scores, ids = exact_search(self.vectors, query[None], k, self.scales)
+            else:
+                scales = None if self.scales is None else self.scales[candidates]
+                scores, local = exact_search(self.vectors[candidates], query[None], k, scales)
+                ids = candidates[local]
+            all_scores[row], all_ids[row] = scores[0], ids[0]
+        return all_scores, all_ids
@@ -1,14 +1,24 @@
 import streamlit as st
 from player import Player
-from liar_game import LiarGame
+from liar_game import LIAR_VOCAB, LiarGame, warm_up
+from game_state import GameState
 import random
-from ai_utils_bert import compute_secret_embeddings
+from resources import get_resource, session_memory_bytes, shared_memory_bytes
+from instrumentation import llm_timer, metrics, profiled, rerun_timer, start_metrics_server
+import os
 import time
 
 
 # Streamlit 페이지 설정
 st.set_page_config(page_title="라이어 게임", page_icon="🎭")
 
+# 첫 화면은 모델 없이 바로 그리고, 모델은 사용자가 설정을 입력하는 동안 백그라운드에서 로드
+warm_up(background=True)
+
+# LIAR_METRICS_PORT 가 있으면 프로세스당 한 번 /metrics (Prometheus), /metrics.json 서버를 띄움
+if os.environ.get("LIAR_METRICS_PORT"):
+    get_resource("metrics_server", lambda: start_metrics_server(int(os.environ["LIAR_METRICS_PORT"])))
+
 
 # 스타일 추가
 # 자동 모드 감지 스타일 추가
@@ -87,331 +97,360 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # 게임 정보 표시 함수 정의 
-def display_game_info():
-    game = st.session_state.game
-    if game and hasattr(game, 'chosen_topic'):
-        with st.sidebar:
+def display_game_info(state, game):
+    if state.round is not None:
+        with st.sidebar, rerun_timer.phase("sidebar"):
             st.write("### 게임 정보")
-            st.write(f"라운드: {game.current_round}/{game.total_rounds}")
-            st.write(f"주제: {game.chosen_topic}")
-            human_player = next(p for p in game.players if p.is_human)
-            if human_player.is_liar:
+            st.write(f"라운드: {state.current_round}/{state.total_rounds}")
+            st.write(f"주제: {state.round.topic}")
+            if state.human.is_liar:
                 st.write("당신은 라이어입니다!")
             else:
-                st.write(f"제시어: {st.session_state.secret_word}")
+                st.write(f"제시어: {state.round.secret_word}")
             
             st.write("\n### 플레이어 점수")
-            for player in game.players:
+            for player in state.players:
                 st.write(f"{player.name}: {player.score}점")
 
+            # 세션별 메모리 사용량 (공유 모델/임베딩 제외)
+            session_kb = session_memory_bytes(dict(st.session_state)) / 1024
+            shared_mb = shared_memory_bytes() / (1024 * 1024)
+            st.caption(f"세션 메모리: {session_kb:.1f} KB (공유 리소스 {shared_mb:.1f} MB 제외)")
+
+            # 공유 추론 스케줄러 상태 (모든 세션 합산)
+            scheduler_stats = game.scheduler.stats()
+            if scheduler_stats["batches"]:
+                st.caption(
+                    f"추론 큐 {scheduler_stats['queue_depth']}건 · 평균 배치 {scheduler_stats['mean_batch_size']:.1f} · "
+                    f"p50 {scheduler_stats['p50_ms']:.1f} ms / p95 {scheduler_stats['p95_ms']:.1f} ms"
+                )
+
+            # 재실행 구간별 소요 시간 (모든 세션 합산)
+            with st.expander("재실행 구간별 시간"):
+                for name, stats in rerun_timer.summary().items():
+                    st.caption(f"{name}: 최근 {stats['last_ms']:.1f} ms · p50 {stats['p50_ms']:.1f} ms · "
+                               f"p95 {stats['p95_ms']:.1f} ms ({stats['count']}회)")
+                # GPT 스트리밍 응답: 첫 조각까지(ttft) / 전체 생성 시간
+                for name, stats in llm_timer.summary().items():
+                    st.caption(f"GPT {name}: 최근 {stats['last_ms']:.1f} ms · p50 {stats['p50_ms']:.1f} ms · "
+                               f"p95 {stats['p95_ms']:.1f} ms ({stats['count']}회)")
+                if metrics.enabled:
+                    st.download_button("계측 지표 내려받기 (JSON)", metrics.to_json(), "metrics.json",
+                                       mime="application/json")
+
+def discard_truth_futures():
+    """미리 요청해 둔 진실 AI 설명 중 아직 끝나지 않은 요청을 취소하고 세션에서 지웁니다."""
+    futures = st.session_state.pop('truth_futures', None)
+    if futures:
+        LiarGame.cancel_descriptions(futures)
+
 # 세션 상태 초기화
-if 'initialized' not in st.session_state:
-    st.session_state.game = None
-    st.session_state.game_phase = 'setup'
-    st.session_state.descriptions = {}
-    st.session_state.current_player_idx = 0
-    st.session_state.secret_word = None
-    st.session_state.chosen_topic = None
-    st.session_state.players_order = None
-    st.session_state.votes = {}
-    st.session_state.round_data_initialized = False
-    st.session_state.liar_word_prediction = None
-    st.session_state.initialized = True
-    st.session_state.liar_guess_made = False
+# 세션에는 GameState(플레이어 번호/문자열/점수만 담은 작은 객체)와 라운드 캐시만 두고,
+# LiarGame 은 공유 모델/임베딩을 참조하도록 매 실행마다 상태에서 다시 만듭니다. (game_state.py 참고)
+# 라운드 캐시: 이번 라운드의 설명 임베딩 집계기와 투표 유사도 행렬 (재실행마다 설명을 다시 임베딩하지 않도록)
+if 'state' not in st.session_state:
+    st.session_state.state = None
+if 'round_cache' not in st.session_state:
+    st.session_state.round_cache = {}
 
 st.title("라이어 게임에 오신 것을 환영합니다! \n  ##### 🎭 난 진짜 라이어 아님. | Team 장어구이")
 
-if 'game_phase' not in st.session_state:
-    st.session_state.game_phase = 'setup'
+state = st.session_state.state
+game_phase = state.phase if state is not None else 'setup'
 
-if 'game' not in st.session_state:
-    st.session_state.game = None
+# 세션 상태에 공유 모델/주제 임베딩 레지스트리를 연결 (재실행마다, 레지스트리에 있으면 다시 계산하지 않음)
+with rerun_timer.phase("restore"):
+    game = LiarGame.from_state(state, st.session_state.round_cache) if state is not None else None
 
-if 'button_clicked' not in st.session_state:
-    st.session_state.button_clicked = False
+# 단계별 화면 처리 시간 기록 (st.rerun() 으로 중단되어도 기록됨, LIAR_PROFILE 이 있으면 프로파일도 저장)
+with rerun_timer.phase(game_phase), profiled(f"app_{game_phase}"):
 
-# 게임 초기 설정
-if st.session_state.game_phase == 'setup':
-    total_players = st.number_input("총 플레이어 수를 입력하세요 (최소 3명)", min_value=3, value=3)
-    human_name = st.text_input("당신의 이름을 입력하세요")
+    # 게임 초기 설정
+    if game_phase == 'setup':
+        total_players = st.number_input("총 플레이어 수를 입력하세요 (최소 3명)", min_value=3, value=3)
+        human_name = st.text_input("당신의 이름을 입력하세요")
     
-    if st.button("게임 시작") and human_name:
-        start_time = time.time()
+        if st.button("게임 시작") and human_name:
+            start_time = time.time()
     
-        with st.spinner("🚀 게임을 준비 중입니다... 잠시만 기다려 주세요!"):
-            # 플레이어 생성
-            players = [Player(human_name, is_human=True)]
-            for i in range(1, total_players):
-                players.append(Player(f"AI_{i+1}"))
+            with st.spinner("🚀 게임을 준비 중입니다... 잠시만 기다려 주세요!"):
+                # 플레이어 생성
+                players = [Player(human_name, is_human=True)]
+                for i in range(1, total_players):
+                    players.append(Player(f"AI_{i+1}"))
         
-            # 게임 인스턴스 생성
-            st.session_state.game = LiarGame(players)
+                # 게임 상태 생성 (모델 로드가 끝날 때까지 기다리도록 게임도 한 번 만들어 봄)
+                state = GameState(players, vocab=LIAR_VOCAB)
+                LiarGame.from_state(state)
+                st.session_state.state = state
 
-            execution_time = time.time() - start_time
-            time.sleep(execution_time)  # 실제 실행 시간만큼 유지
+                execution_time = time.time() - start_time
+                time.sleep(execution_time)  # 실제 실행 시간만큼 유지
 
 
-        st.session_state.game_phase = 'role_reveal'
-        st.toast("✅ 게임이 시작되었습니다!")  # 피드백 제공
+            st.toast("✅ 게임이 시작되었습니다!")  # 피드백 제공
 
-        st.rerun()  # 페이지 새로고침
+            st.rerun()  # 페이지 새로고침
 
-# 역할 공개 및 라운드 시작
-elif st.session_state.game_phase == 'role_reveal':
-    game = st.session_state.game
-    
-    if not st.session_state.round_data_initialized:
-        # 역할 배정
-        game.assign_roles()
-        
-        # 주제와 단어 선택
-        chosen_topic = random.choice(list(game.topics.keys()))
-        secret_word = random.choice(game.topics[chosen_topic])
-        game.chosen_topic = chosen_topic
-        st.session_state.secret_word = secret_word
+    # 역할 공개 및 라운드 시작
+    elif game_phase == 'role_reveal':
         
-        # 주제별 임베딩 초기화
-        game.object_word_embeddings = compute_secret_embeddings(list(game.topics["object"]))
-        game.food_word_embeddings = compute_secret_embeddings(list(game.topics["food"]))
-        game.job_word_embeddings = compute_secret_embeddings(list(game.topics["job"]))
-        game.place_word_embeddings = compute_secret_embeddings(list(game.topics["place"]))
-        game.character_word_embeddings = compute_secret_embeddings(list(game.topics["character"]))
+        if state.round is None:
+            # 역할 배정
+            game.assign_roles()
         
-        # 플레이어 순서 설정
-        players_order = game.players.copy()
-        random.shuffle(players_order)
-        if players_order[0].is_liar:
-            liar_player = players_order.pop(players_order.index(game.liar))
-            insert_position = random.randint(1, len(players_order))
-            players_order.insert(insert_position, liar_player)
-        st.session_state.players_order = players_order
+            # 주제와 단어 선택
+            chosen_topic = random.choice(list(game.topics.keys()))
+            secret_word = random.choice(game.topics[chosen_topic])
+            game.chosen_topic = chosen_topic
         
-        st.session_state.round_data_initialized = True
+            # 플레이어 순서 설정 (플레이어 번호)
+            liar_index = state.players.index(game.liar)
+            players_order = list(range(len(state.players)))
+            random.shuffle(players_order)
+            if players_order[0] == liar_index:
+                players_order.pop(0)
+                insert_position = random.randint(1, len(players_order))
+                players_order.insert(insert_position, liar_index)
+            state.start_round(chosen_topic, secret_word, liar_index, players_order)
+
+            # 진실 AI 들의 설명은 제시어만으로 정해지므로, 사용자가 역할을 읽는 동안 미리 요청해 둠
+            # (Future 는 직렬화할 수 없으므로 GameState 가 아닌 세션에 임시로 보관)
+            discard_truth_futures()
+            st.session_state.truth_futures = game.request_ai_truth_descriptions(
+                secret_word, [state.players[i] for i in players_order])
     
-    # 정보 표시
-    st.write(f"### 라운드 {game.current_round}")
-    display_game_info()
+        # 정보 표시
+        st.write(f"### 라운드 {state.current_round}")
+        display_game_info(state, game)
     
-    if st.button("설명 단계로"):
-        st.session_state.game_phase = 'explanation'
-        st.rerun()
-
-# 설명 단계
-elif st.session_state.game_phase == 'explanation':
-    game = st.session_state.game
-    display_game_info()
-    current_player = st.session_state.players_order[st.session_state.current_player_idx]
+        if st.button("설명 단계로"):
+            state.phase = 'explanation'
+            st.rerun()
+
+    # 설명 단계
+    elif game_phase == 'explanation':
+        current_round = state.round
+        display_game_info(state, game)
+        current_index = current_round.order[current_round.current_idx]
+        current_player = state.players[current_index]
     
-    st.write("### 설명 단계")
-    st.write("각 플레이어는 제시어에 대해 한 문장씩 설명해주세요.")
+        st.write("### 설명 단계")
+        st.write("각 플레이어는 제시어에 대해 한 문장씩 설명해주세요.")
     
-    # 메인 화면에 게임 정보 표시 (수정된 부분)
-    human_player = next(p for p in game.players if p.is_human)
-    role_style = "liar-theme" if human_player.is_liar else "citizen-theme"
-    info_html = f"""
-        <div class="player-info-box {role_style}">
-            <div class="player-name">{human_player.name}님의 게임 정보</div>
-            <div>역할: {human_player.is_liar and '라이어' or '시민'}</div>
-            <div>주제: {game.chosen_topic}</div>
-            {'<div>제시어: ' + st.session_state.secret_word + '</div>' if not human_player.is_liar else ''}
-        </div>
-    """
-    st.write(info_html, unsafe_allow_html=True)
+        # 메인 화면에 게임 정보 표시 (수정된 부분)
+        human_player = state.human
+        role_style = "liar-theme" if human_player.is_liar else "citizen-theme"
+        info_html = f"""
+            <div class="player-info-box {role_style}">
+                <div class="player-name">{human_player.name}님의 게임 정보</div>
+                <div>역할: {human_player.is_liar and '라이어' or '시민'}</div>
+                <div>주제: {current_round.topic}</div>
+                {'<div>제시어: ' + current_round.secret_word + '</div>' if not human_player.is_liar else ''}
+            </div>
+        """
+        st.write(info_html, unsafe_allow_html=True)
     
-    # 현재까지의 설명들 표시 (수정된 부분)
-    if st.session_state.descriptions:
-        st.write("\n### 지금까지의 설명:")
-        for name, desc in st.session_state.descriptions.items():
-            desc_html = f"""
-                <div class="player-info-box">
-                    <div class="player-name">{name}</div>
-                    <div class="description-box">{desc}</div>
-                </div>
-            """
-            st.markdown(desc_html, unsafe_allow_html=True)
+        # 현재까지의 설명들 표시 (수정된 부분)
+        descriptions = state.description_texts()
+        if descriptions:
+            st.write("\n### 지금까지의 설명:")
+            for name, desc in descriptions.items():
+                desc_html = f"""
+                    <div class="player-info-box">
+                        <div class="player-name">{name}</div>
+                        <div class="description-box">{desc}</div>
+                    </div>
+                """
+                st.markdown(desc_html, unsafe_allow_html=True)
     
-    # 현재 플레이어의 설명 처리
-    st.write(f"\n### {current_player.name}의 차례")
+        # 현재 플레이어의 설명 처리
+        st.write(f"\n### {current_player.name}의 차례")
     
-    if current_player.is_human:
-        if current_player.name not in st.session_state.descriptions:
-            # 라이어인 경우 힌트 버튼 표시
-            if current_player.is_liar and 'hint_shown' not in st.session_state:
-                if st.button("힌트 받기"):
-                    aggregated_comments = " ".join(st.session_state.descriptions.values())
-                    predicted_words = game.predict_secret_word_from_comments(aggregated_comments)
-                    top_5_words = list(predicted_words.keys())[:5]
-                    formatted_prediction = "예측 단어는 {'" + "', '".join(top_5_words) + "'}입니다."
-                    st.session_state.liar_word_prediction = formatted_prediction
-                    st.session_state.hint_shown = True
-                    st.rerun()
+        if current_player.is_human:
+            if current_index not in current_round.descriptions:
+                # 라이어인 경우 힌트 버튼 표시
+                if current_player.is_liar and current_round.hint is None:
+                    if st.button("힌트 받기"):
+                        predicted_words = game.predict_secret_word_from_descriptions(descriptions.values(), k=5)
+                        top_5_words = list(predicted_words.keys())[:5]
+                        formatted_prediction = "예측 단어는 {'" + "', '".join(top_5_words) + "'}입니다."
+                        current_round.hint = formatted_prediction
+                        st.rerun()
             
-            # 힌트가 있으면 표시 (수정된 부분)
-            if 'hint_shown' in st.session_state and st.session_state.liar_word_prediction:
-                hint_html = f"""
-                    <div class="hint-box">
-                        <h4>🎯 힌트</h4>
-                        <p>{st.session_state.liar_word_prediction}</p>
-                    </div>
-                """
-                st.markdown(hint_html, unsafe_allow_html=True)
+                # 힌트가 있으면 표시 (수정된 부분)
+                if current_round.hint:
+                    hint_html = f"""
+                        <div class="hint-box">
+                            <h4>🎯 힌트</h4>
+                            <p>{current_round.hint}</p>
+                        </div>
+                    """
+                    st.markdown(hint_html, unsafe_allow_html=True)
             
-            explanation = st.text_input("당신의 설명을 입력하세요")
-            if st.button("설명 제출"):
-                st.session_state.descriptions[current_player.name] = explanation
-                st.session_state.current_player_idx += 1
-                if st.session_state.current_player_idx >= len(game.players):
-                    st.session_state.game_phase = 'voting'
-                st.rerun()
-    else:
-        if current_player.name not in st.session_state.descriptions:
-            aggregated_comments = " ".join(st.session_state.descriptions.values())
-            if current_player.is_liar:
-                explanation, _ = game.generate_ai_liar_description(aggregated_comments)
-            else:
-                explanation = game.generate_ai_truth_description(st.session_state.secret_word)
-            st.session_state.descriptions[current_player.name] = explanation
+                explanation = st.text_input("당신의 설명을 입력하세요")
+                if st.button("설명 제출"):
+                    current_round.descriptions[current_index] = explanation
+                    current_round.current_idx += 1
+                    if current_round.current_idx >= len(state.players):
+                        state.phase = 'voting'
+                    st.rerun()
+        else:
+            ai_description = st.empty()
+            if current_index not in current_round.descriptions:
+                if current_player.is_liar:
+                    # 라이어 AI 의 설명은 생성되는 대로 보여줌 (재실행으로 중단되면 GPT 요청도 취소)
+                    stream, _ = game.stream_ai_liar_description(list(descriptions.values()))
+                    try:
+                        for _ in stream:
+                            ai_description.write(f"AI의 설명: {stream.text}")
+                    finally:
+                        stream.cancel()
+                    explanation = stream.result() or "설명을 생성하는 데 실패했습니다."
+                else:
+                    # 보통은 역할 공개 때 미리 요청해 둔 결과를 바로 꺼냄
+                    # (세션을 복원한 경우 등 요청이 없으면 남은 진실 AI들의 설명을 이때 한꺼번에 요청)
+                    if 'truth_futures' not in st.session_state:
+                        st.session_state.truth_futures = game.request_ai_truth_descriptions(
+                            current_round.secret_word, [state.players[i] for i in current_round.order])
+                    explanation = game.resolve_description(st.session_state.truth_futures[current_player.name])
+                current_round.descriptions[current_index] = explanation
             
-        st.write(f"AI의 설명: {st.session_state.descriptions[current_player.name]}")
-        if st.button("다음 플레이어"):
-            st.session_state.current_player_idx += 1
-            if st.session_state.current_player_idx >= len(game.players):
-                st.session_state.game_phase = 'voting'
-            st.rerun()
+            ai_description.write(f"AI의 설명: {current_round.descriptions[current_index]}")
+            if st.button("다음 플레이어"):
+                current_round.current_idx += 1
+                if current_round.current_idx >= len(state.players):
+                    state.phase = 'voting'
+                st.rerun()
 
-# 투표 단계
-elif st.session_state.game_phase == 'voting':
-    game = st.session_state.game
-    display_game_info()
+    # 투표 단계
+    elif game_phase == 'voting':
+        current_round = state.round
+        display_game_info(state, game)
     
-    st.write("### 투표 단계")
-    st.write("모든 설명:")
-    for name, desc in st.session_state.descriptions.items():
-        st.write(f"{name}: {desc}")
+        st.write("### 투표 단계")
+        st.write("모든 설명:")
+        descriptions = state.description_texts()
+        for name, desc in descriptions.items():
+            st.write(f"{name}: {desc}")
     
-    human_player = next(p for p in game.players if p.is_human)
-    if human_player.name not in st.session_state.votes:
-        vote_options = [p.name for p in game.players if p != human_player]
-        human_vote = st.selectbox("라이어라고 생각하는 플레이어를 선택하세요", vote_options)
-        if st.button("투표"):
-            st.session_state.votes[human_player.name] = human_vote
-            # AI 플레이어들의 투표
-            for player in game.players:
-                if not player.is_human:
-                    vote = game.generate_ai_vote(player, st.session_state.descriptions)
-                    st.session_state.votes[player.name] = vote
-            st.session_state.game_phase = 'result'
-            st.rerun()
+        human_player = state.human
+        human_index = state.players.index(human_player)
+        if human_index not in current_round.votes:
+            vote_options = [p.name for p in state.players if p != human_player]
+            human_vote = st.selectbox("라이어라고 생각하는 플레이어를 선택하세요", vote_options)
+            if st.button("투표"):
+                current_round.votes[human_index] = state.index_of(human_vote)
+                # AI 플레이어들의 투표
+                for i, player in enumerate(state.players):
+                    if not player.is_human:
+                        vote = game.generate_ai_vote(player, descriptions)
+                        current_round.votes[i] = state.index_of(vote)
+                state.phase = 'result'
+                st.rerun()
 
-# 결과 단계
-elif st.session_state.game_phase == 'result':
-    game = st.session_state.game
-    display_game_info()
+    # 결과 단계
+    elif game_phase == 'result':
+        current_round = state.round
+        display_game_info(state, game)
+        liar = state.liar
     
-    # 투표 결과 집계 및 표시
-    vote_counts = {}
-    for vote in st.session_state.votes.values():
-        vote_counts[vote] = vote_counts.get(vote, 0) + 1
+        # 투표 결과 집계 및 표시
+        vote_counts = {}
+        for vote in state.vote_names().values():
+            vote_counts[vote] = vote_counts.get(vote, 0) + 1
     
-    st.write("### 투표 결과")
-    for name, count in vote_counts.items():
-        st.write(f"{name}: {count}표")
+        st.write("### 투표 결과")
+        for name, count in vote_counts.items():
+            st.write(f"{name}: {count}표")
     
-    # 점수 계산
-    if 'points_calculated' not in st.session_state:
-        highest_votes = max(vote_counts.values())
-        top_candidates = [name for name, cnt in vote_counts.items() if cnt == highest_votes]
+        # 점수 계산
+        if not current_round.points_calculated:
+            highest_votes = max(vote_counts.values())
+            top_candidates = [name for name, cnt in vote_counts.items() if cnt == highest_votes]
         
-        # 현재 점수 저장
-        original_scores = {player.name: player.score for player in game.players}
+            # 현재 점수 저장
+            original_scores = {player.name: player.score for player in state.players}
         
-        st.write("\n### 라이어 공개")
-        st.write(f"실제 라이어는 {game.liar.name}입니다!")
-        st.write(f"제시어는 '{st.session_state.secret_word}'였습니다!")
+            st.write("\n### 라이어 공개")
+            st.write(f"실제 라이어는 {liar.name}입니다!")
+            st.write(f"제시어는 '{current_round.secret_word}'였습니다!")
         
-        # 라이어가 지목된 경우
-        if game.liar.name in top_candidates:
-            st.write("라이어가 지목되었습니다!")
-            # 시민들에게 1점 부여
-            for player in game.players:
-                if not player.is_liar and player.score == original_scores[player.name]:
-                    player.score = original_scores[player.name] + 1
-                    st.write(f"{player.name}이(가) 1점을 획득했습니다!")
+            # 라이어가 지목된 경우
+            if liar.name in top_candidates:
+                st.write("라이어가 지목되었습니다!")
+                # 시민들에게 1점 부여
+                for player in state.players:
+                    if not player.is_liar and player.score == original_scores[player.name]:
+                        player.score = original_scores[player.name] + 1
+                        st.write(f"{player.name}이(가) 1점을 획득했습니다!")
             
-            # 라이어의 제시어 맞추기 기회
-            if game.liar.is_human:
-                st.write("\n### 라이어의 제시어 맞추기")
-                liar_guess = st.text_input("제시어는 무엇인가요?")
-                if st.button("제출"):
-                    if liar_guess.lower() == st.session_state.secret_word.lower():
-                        # 라이어에게만 3점 추가
-                        if game.liar.score == original_scores[game.liar.name]:
-                            game.liar.score = original_scores[game.liar.name] + 3
-                            st.write(f"{game.liar.name}님이 제시어를 맞추어 3점을 획득하셨습니다!")
+                # 라이어의 제시어 맞추기 기회
+                if liar.is_human:
+                    st.write("\n### 라이어의 제시어 맞추기")
+                    liar_guess = st.text_input("제시어는 무엇인가요?")
+                    if st.button("제출"):
+                        if liar_guess.lower() == current_round.secret_word.lower():
+                            # 라이어에게만 3점 추가
+                            if liar.score == original_scores[liar.name]:
+                                liar.score = original_scores[liar.name] + 3
+                                st.write(f"{liar.name}님이 제시어를 맞추어 3점을 획득하셨습니다!")
+                        else:
+                            st.write("틀렸습니다.")
+                        current_round.points_calculated = True
+                else:
+                    # AI 라이어의 제시어 맞추기
+                    predicted_words = game.predict_secret_word_from_descriptions(state.description_texts().values(), k=1)
+                    liar_guess = list(predicted_words.keys())[0]
+                
+                    st.write(f"\n라이어가 예측한 단어는 '{liar_guess}'입니다!")
+                    if liar_guess.lower() == current_round.secret_word.lower():
+                        # AI 라이어에게만 3점 추가
+                        if liar.score == original_scores[liar.name]:
+                            liar.score = original_scores[liar.name] + 3
+                            st.write(f"{liar.name}이(가) 제시어를 맞추어 3점을 획득했습니다!")
                     else:
-                        st.write("틀렸습니다.")
-                    st.session_state.points_calculated = True
+                        st.write(f"{liar.name}이(가) 제시어를 맞추지 못했습니다.")
+                    current_round.points_calculated = True
             else:
-                # AI 라이어의 제시어 맞추기
-                aggregated_comments = " ".join(st.session_state.descriptions.values())
-                predicted_words = game.predict_secret_word_from_comments(aggregated_comments)
-                liar_guess = list(predicted_words.keys())[0]
-                
-                st.write(f"\n라이어가 예측한 단어는 '{liar_guess}'입니다!")
-                if liar_guess.lower() == st.session_state.secret_word.lower():
-                    # AI 라이어에게만 3점 추가
-                    if game.liar.score == original_scores[game.liar.name]:
-                        game.liar.score = original_scores[game.liar.name] + 3
-                        st.write(f"{game.liar.name}이(가) 제시어를 맞추어 3점을 획득했습니다!")
-                else:
-                    st.write(f"{game.liar.name}이(가) 제시어를 맞추지 못했습니다.")
-                st.session_state.points_calculated = True
-        else:
-            # 라이어가 지목되지 않은 경우
-            st.write("라이어가 지목되지 않았습니다!")
-            if game.liar.score == original_scores[game.liar.name]:
-                game.liar.score = original_scores[game.liar.name] + 1
-                st.write(f"라이어({game.liar.name})가 1점을 획득했습니다!")
-            st.session_state.points_calculated = True
-
-    # 다음 라운드로 진행 버튼
-    if 'points_calculated' in st.session_state:
-        if st.button("다음 라운드"):
-            # 라운드 관련 상태 초기화
-            game.current_round += 1
-            st.session_state.descriptions = {}
-            st.session_state.votes = {}
-            st.session_state.current_player_idx = 0
-            st.session_state.round_data_initialized = False
-            if 'points_calculated' in st.session_state:
-                del st.session_state.points_calculated
-            if 'hint_shown' in st.session_state:
-                del st.session_state.hint_shown
+                # 라이어가 지목되지 않은 경우
+                st.write("라이어가 지목되지 않았습니다!")
+                if liar.score == original_scores[liar.name]:
+                    liar.score = original_scores[liar.name] + 1
+                    st.write(f"라이어({liar.name})가 1점을 획득했습니다!")
+                current_round.points_calculated = True
+
+        # 다음 라운드로 진행 버튼
+        if current_round.points_calculated:
+            if st.button("다음 라운드"):
+                # 라운드 관련 상태 초기화
+                state.current_round += 1
+                state.round = None
+                discard_truth_futures()
             
-            if game.current_round <= game.total_rounds:
-                st.session_state.game_phase = 'role_reveal'
-            else:
-                st.session_state.game_phase = 'game_over'
-            st.rerun()
+                if state.current_round <= state.total_rounds:
+                    state.phase = 'role_reveal'
+                else:
+                    state.phase = 'game_over'
+                st.rerun()
 
-# 게임 종료
-elif st.session_state.game_phase == 'game_over':
-    game = st.session_state.game
-    
-    st.write("### 게임 종료!")
-    st.write("\n### 최종 점수:")
-    for player in game.players:
-        st.write(f"{player.name}: {player.score}점")
+    # 게임 종료
+    elif game_phase == 'game_over':
+        st.write("### 게임 종료!")
+        st.write("\n### 최종 점수:")
+        for player in state.players:
+            st.write(f"{player.name}: {player.score}점")
     
-    # 승자 결정
-    max_score = max(player.score for player in game.players)
-    winners = [player.name for player in game.players if player.score == max_score]
-    if len(winners) == 1:
-        st.write(f"\n최종 승자: {winners[0]}!")
-    else:
-        st.write(f"\n최종 승자: {', '.join(winners)} (공동 승자)!")
+        # 승자 결정
+        max_score = max(player.score for player in state.players)
+        winners = [player.name for player in state.players if player.score == max_score]
+        if len(winners) == 1:
+            st.write(f"\n최종 승자: {winners[0]}!")
+        else:
+            st.write(f"\n최종 승자: {', '.join(winners)} (공동 승자)!")
     
-    if st.button("새 게임 시작"):
-        for key in list(st.session_state.keys()):
-            del st.session_state[key]
-        st.rerun()
+        if st.button("새 게임 시작"):
+            discard_truth_futures()
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.rerun()
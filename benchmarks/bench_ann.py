@@ -0,0 +1,85 @@
+# benchmarks/bench_ann.py
+"""
+IVF 근사 검색(ann_index.IVFIndex)과 전체 탐색의 recall / 지연 시간 비교.
+
+어휘 크기를 늘려 가며 인덱스 생성 시간과, 질의 하나당 지연 시간 및 전체 탐색 대비 recall@k 를
+nprobe 별로 보고합니다. 기본은 군집 구조가 있는 합성 벡터를 쓰고,
+--vocab 을 주면 어휘 파일 단어들의 실제 BERT 임베딩을 씁니다.
+
+    python benchmarks/bench_ann.py [--sizes 1000 10000 50000] [--nprobe 4 16 64] [--k 10]
+    python benchmarks/bench_ann.py --vocab words.tsv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ann_index import IVFIndex, exact_search  # noqa: E402
+
+
+def synthetic_vectors(n, dim, rng, clusters=256, noise=0.8):
+    centers = rng.normal(size=(clusters, dim))
+    x = centers[rng.integers(0, clusters, n)] + noise * rng.normal(size=(n, dim))
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def vocab_vectors(path):
+    from ai_utils_bert import compute_secret_embeddings
+    from vocabulary import load_vocabulary
+
+    words = list(dict.fromkeys(word for words in load_vocabulary(path).values() for word in words))
+    embeddings = compute_secret_embeddings(words)
+    x = np.stack([embeddings[word].numpy() for word in words]).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def timed_search(search, queries):
+    """질의를 하나씩 검색하여 (질의당 평균 ms, 결과 인덱스 리스트) 를 반환합니다. (게임에서의 사용 방식)"""
+    start = time.perf_counter()
+    results = [search(query[None])[0] for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--vocab", help="실제 임베딩을 만들 어휘 파일 (JSON/CSV/TSV)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    pool = vocab_vectors(args.vocab) if args.vocab else synthetic_vectors(max(args.sizes), args.dim, rng)
+
+    print(f"{'size':>7}{'method':>12}{'build(ms)':>11}{'query(ms)':>11}{f'recall@{args.k}':>11}")
+    for size in args.sizes:
+        if size > len(pool):
+            print(f"{size:>7}  (어휘가 {len(pool)} 개뿐이라 건너뜀)")
+            continue
+        vectors = pool[rng.choice(len(pool), size, replace=False)]
+        # 질의: 어휘 벡터에 잡음을 섞은 문장 임베딩 흉내
+        queries = vectors[rng.choice(size, args.queries)] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1]))
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+        exact_ms, exact_ids = timed_search(lambda q: exact_search(vectors, q, args.k)[1], queries)
+        print(f"{size:>7}{'exact':>12}{'-':>11}{exact_ms:>11.3f}{1.0:>11.3f}")
+
+        start = time.perf_counter()
+        index = IVFIndex(vectors, seed=args.seed)
+        build_ms = (time.perf_counter() - start) * 1000
+        for nprobe in sorted(set(min(n, index.nlist) for n in args.nprobe)):
+            ann_ms, ann_ids = timed_search(lambda q: index.search(q, args.k, nprobe=nprobe)[1], queries)
+            recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(ann_ids, exact_ids)])
+            print(f"{size:>7}{f'ivf/{nprobe}/{index.nlist}':>12}{build_ms:>11.0f}{ann_ms:>11.3f}{recall:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_backends.py
+"""
+추론 백엔드(torch fp32 / int8 동적 양자화 / onnx) 비교.
+
+백엔드마다 새 프로세스에서 BERT 인코더와 STS 모델을 로드해
+  - 로드 시간, 주제 단어 전체 인코딩 지연 시간, STS 쌍 점수 지연 시간, 최대 RSS 를 측정하고
+  - fp32 기준 정확도 일치도(주제별 상위 k 단어 일치율, top-1 일치율, STS 점수 편차)를 계산합니다.
+
+    python benchmarks/bench_backends.py [--backends torch int8 onnx] [--k 5]
+        [--min-topk-agreement 0.9] [--max-sts-drift 0.05]
+
+일치도가 기준에 못 미치면 종료 코드 1 로 끝납니다.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+
+
+def run_worker(backend, out_path, repeat):
+    """한 백엔드로 측정하고 결과를 out_path(.npz) 와 out_path.json 에 저장합니다."""
+    os.environ["INFERENCE_BACKEND"] = backend
+    sys.path.insert(0, ROOT)
+    import resource
+
+    import numpy as np
+    import torch
+
+    from bench_sts_padding import DESCRIPTIONS
+    from liar_game import DEFAULT_TOPICS
+    from resources import get_embedding_model, get_sts_model
+    from sts import STSEngine
+
+    start = time.perf_counter()
+    encoder = get_embedding_model()
+    tokenizer, model = get_sts_model()
+    load_s = time.perf_counter() - start
+
+    words = [word for topic_words in DEFAULT_TOPICS.values() for word in dict.fromkeys(topic_words)]
+    encoder.encode(words)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        word_vectors = encoder.encode(words)
+    encode_s = (time.perf_counter() - start) / repeat
+
+    query_vectors = encoder.encode(DESCRIPTIONS + words)
+    scores = torch.nn.functional.normalize(query_vectors, dim=-1) @ torch.nn.functional.normalize(word_vectors, dim=-1).T
+
+    engine = STSEngine(tokenizer, model)
+    pairs = [(a, b) for i, a in enumerate(DESCRIPTIONS) for b in DESCRIPTIONS[i + 1:]]
+    engine.score_pairs(pairs)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        sts_scores = engine.score_pairs(pairs)
+    sts_s = (time.perf_counter() - start) / repeat
+
+    np.savez(out_path, scores=scores.numpy(), sts=np.array(sts_scores))
+    stats = {
+        "load_ms": load_s * 1000,
+        "encode_words_ms": encode_s * 1000,
+        "sts_pairs_ms": sts_s * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "topic_sizes": [len(dict.fromkeys(topic_words)) for topic_words in DEFAULT_TOPICS.values()],
+    }
+    with open(f"{out_path}.json", "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+
+
+def topk_agreement(ref_scores, cand_scores, topic_sizes, k):
+    """주제별로 잘라 질의마다 상위 k 단어 집합의 겹치는 비율과 top-1 일치율을 평균합니다."""
+    import numpy as np
+
+    overlaps, top1 = [], []
+    start = 0
+    for size in topic_sizes:
+        ref = ref_scores[:, start:start + size]
+        cand = cand_scores[:, start:start + size]
+        kk = min(k, size)
+        ref_top = np.argsort(-ref, axis=1)[:, :kk]
+        cand_top = np.argsort(-cand, axis=1)[:, :kk]
+        overlaps.extend(len(set(r) & set(c)) / kk for r, c in zip(ref_top, cand_top))
+        top1.extend(ref_top[:, 0] == cand_top[:, 0])
+        start += size
+    return float(np.mean(overlaps)), float(np.mean(top1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-topk-agreement", type=float, default=0.9)
+    parser.add_argument("--max-sts-drift", type=float, default=0.05)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.out, args.repeat)
+        return
+
+    import numpy as np
+
+    sys.path.insert(0, ROOT)
+    from inference_backend import onnx_available
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    if "onnx" in backends and not onnx_available():
+        print("onnxruntime 이 설치되어 있지 않아 onnx 백엔드는 건너뜁니다.")
+        backends.remove("onnx")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            out_path = os.path.join(tmp, f"{backend}.npz")
+            subprocess.run([sys.executable, __file__, "--worker", backend, "--out", out_path,
+                            "--repeat", str(args.repeat)], cwd=ROOT, check=True, capture_output=True)
+            with open(f"{out_path}.json", encoding="utf-8") as f:
+                stats = json.load(f)
+            data = np.load(out_path)
+            results[backend] = (stats, data["scores"], data["sts"])
+
+    ref_stats, ref_scores, ref_sts = results["torch"]
+    failed = False
+    print(f"{'backend':<8}{'load(ms)':>10}{'encode(ms)':>12}{'sts(ms)':>10}{'RSS(MB)':>10}"
+          f"{f'top{args.k}':>8}{'top1':>7}{'sts drift':>11}")
+    for backend, (stats, scores, sts) in results.items():
+        agreement, top1 = topk_agreement(ref_scores, scores, ref_stats["topic_sizes"], args.k)
+        drift = float(np.max(np.abs(sts - ref_sts))) if len(sts) else 0.0
+        print(f"{backend:<8}{stats['load_ms']:>10.0f}{stats['encode_words_ms']:>12.1f}{stats['sts_pairs_ms']:>10.1f}"
+              f"{stats['peak_rss_mb']:>10.0f}{agreement:>8.3f}{top1:>7.3f}{drift:>11.4f}")
+        if agreement < args.min_topk_agreement or drift > args.max_sts_drift:
+            failed = True
+    if failed:
+        print(f"정확도 일치도 기준(top{args.k} >= {args.min_topk_agreement}, STS 편차 <= {args.max_sts_drift}) 미달")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
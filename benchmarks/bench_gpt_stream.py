@@ -0,0 +1,70 @@
+# benchmarks/bench_gpt_stream.py
+"""
+GPT 응답 스트리밍(GPTClient.stream)과 기존 한 번에 받기(GPTClient.generate)의 체감 지연 비교.
+
+SSE 로 조각을 보내는 로컬 가짜 서버(benchmarks/fake_openai.py)를 띄워,
+- generate: 응답 전체가 올 때까지 걸린 시간 (지금까지 AI 차례에 화면이 멈춰 있던 시간)
+- stream:   첫 조각까지 시간(TTFT)과 전체 생성 시간
+을 비교하고, 스트림을 중간에 취소하면 서버 쪽 연결도 끊기는지 확인합니다.
+
+    python benchmarks/bench_gpt_stream.py [--requests 10] [--first-token-delay 0.3] [--token-delay 0.03]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_openai import serve  # noqa: E402
+from gpt_client import GPTClient  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.03)
+    args = parser.parse_args()
+
+    server = serve(first_token_delay=args.first_token_delay, token_delay=args.token_delay)
+    client = GPTClient(api_key="fake", base_url=server.base_url)
+    prompt = "설명을 한 문장으로 작성하세요."
+
+    blocking = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        reply = client.generate(prompt)
+        blocking.append(time.perf_counter() - start)
+
+    ttfts, totals = [], []
+    for _ in range(args.requests):
+        stream = client.stream(prompt)
+        streamed = stream.result()
+        assert streamed == reply, (streamed, reply)
+        ttfts.append(stream.stats["ttft"])
+        totals.append(stream.stats["total_time"])
+
+    print(f"요청 {args.requests}회, 응답 {len(reply)}자")
+    print(f"  generate 전체:    p50 {statistics.median(blocking) * 1000:>7.1f} ms")
+    print(f"  stream 첫 조각:   p50 {statistics.median(ttfts) * 1000:>7.1f} ms")
+    print(f"  stream 전체:      p50 {statistics.median(totals) * 1000:>7.1f} ms")
+
+    # 첫 조각을 받은 뒤 취소 -> 서버는 남은 조각을 보내다 연결 끊김을 봐야 함
+    chunks_before = server.chunks_sent
+    stream = client.stream(prompt)
+    for _ in stream:
+        break
+    time.sleep(args.token_delay * 10 + 0.2)
+    print(f"취소: cancelled={stream.cancelled} 받은 조각 '{stream.text}', "
+          f"서버가 보낸 조각 {server.chunks_sent - chunks_before}개, 끊김 감지 {server.disconnects}회")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_instrumentation.py
+"""
+계측(instrumentation.MetricsRegistry) 오버헤드 측정.
+
+빈 함수 호출 한 번에 더해지는 시간을
+- 계측 없음 (원래 함수)
+- 꺼진 계측 (LIAR_METRICS=0: timed 는 함수를 그대로 반환, count/observe/timer 는 즉시 반환)
+- 켜진 계측 (timed 데코레이터, timer 컨텍스트, count)
+로 비교하고, 실제 핫 패스(임베딩 한 문장, 수 ms)에 대한 비율을 보여줍니다.
+
+    python benchmarks/bench_instrumentation.py [--calls 200000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from instrumentation import MetricsRegistry  # noqa: E402
+
+
+def noop():
+    return None
+
+
+def per_call_ns(fn, calls):
+    return min(timeit.repeat(fn, number=calls, repeat=5)) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--hot-path-ms", type=float, default=3.0,
+                        help="비율 계산에 쓸 대표 핫 패스 시간 (임베딩 한 문장 정도)")
+    args = parser.parse_args()
+
+    disabled = MetricsRegistry(enabled=False)
+    enabled = MetricsRegistry(enabled=True)
+
+    def timer_block(registry):
+        def run():
+            with registry.timer("block"):
+                pass
+        return run
+
+    baseline = per_call_ns(noop, args.calls)
+    rows = [
+        ("없음", baseline),
+        ("꺼짐: timed", per_call_ns(disabled.timed("noop")(noop), args.calls)),
+        ("꺼짐: timer", per_call_ns(timer_block(disabled), args.calls)),
+        ("꺼짐: count", per_call_ns(lambda: disabled.count("calls"), args.calls)),
+        ("켜짐: timed", per_call_ns(enabled.timed("noop")(noop), args.calls)),
+        ("켜짐: timer", per_call_ns(timer_block(enabled), args.calls)),
+        ("켜짐: count", per_call_ns(lambda: enabled.count("calls"), args.calls)),
+    ]
+    hot_path_ns = args.hot_path_ms * 1e6
+    print(f"{'계측':<14}{'ns/호출':>10}{'추가(ns)':>10}{f'{args.hot_path_ms:g}ms 대비':>12}")
+    for name, ns in rows:
+        extra = max(ns - baseline, 0.0)
+        print(f"{name:<14}{ns:>10.0f}{extra:>10.0f}{extra / hot_path_ns * 100:>11.4f}%")
+
+
+if __name__ == "__main__":
+    main()
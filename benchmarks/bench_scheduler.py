@@ -0,0 +1,79 @@
+# benchmarks/bench_scheduler.py
+"""
+공유 추론 스케줄러 벤치마크.
+
+세션 수만큼 스레드를 띄워 각 세션이 문장 임베딩 1개 + STS 쌍 점수 1개 요청을 반복할 때,
+  - direct:    세션마다 모델을 직접 호출 (요청마다 작은 forward)
+  - scheduled: InferenceScheduler 로 세션 사이의 요청을 마이크로 배치로 묶어 실행
+의 처리량(요청/초)과 스케줄러의 배치 크기, p50/p95 지연 시간을 비교합니다.
+
+    python benchmarks/bench_scheduler.py [--sessions 1 4 16] [--requests 20] [--max-wait-ms 2]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_sts_padding import DESCRIPTIONS  # noqa: E402
+from inference_scheduler import InferenceScheduler, default_handlers  # noqa: E402
+from resources import get_embedding_model, get_sts_model  # noqa: E402
+from sts import STSEngine  # noqa: E402
+
+
+def run_sessions(sessions, requests, encode, sts):
+    """sessions 개 스레드가 동시에 requests 번씩 encode/sts 를 호출하고 걸린 시간(초)을 반환합니다."""
+    barrier = threading.Barrier(sessions + 1)
+
+    def session(index):
+        barrier.wait()
+        for i in range(requests):
+            text = DESCRIPTIONS[(index + i) % len(DESCRIPTIONS)]
+            encode(text)
+            sts((text, DESCRIPTIONS[(index + i + 1) % len(DESCRIPTIONS)]))
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=20, help="세션당 반복 횟수 (encode + sts 한 쌍)")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    encoder = get_embedding_model()
+    tokenizer, model = get_sts_model()
+
+    def direct_sts(pair):
+        return STSEngine(tokenizer, model).score_pairs([pair])[0]
+
+    print(f"{'sessions':>8}{'direct(req/s)':>15}{'scheduled(req/s)':>18}{'mean batch':>12}{'p50(ms)':>9}{'p95(ms)':>9}")
+    for sessions in args.sessions:
+        total = sessions * args.requests * 2
+        direct_s = run_sessions(sessions, args.requests, encoder.encode, direct_sts)
+
+        scheduler = InferenceScheduler(default_handlers(), args.max_batch_size, args.max_wait_ms, args.workers)
+        scheduled_s = run_sessions(sessions, args.requests,
+                                   lambda text: scheduler.submit("encode", text).result(),
+                                   lambda pair: scheduler.submit("sts", pair).result())
+        stats = scheduler.stats()
+        scheduler.close()
+        print(f"{sessions:>8}{total / direct_s:>15.1f}{total / scheduled_s:>18.1f}"
+              f"{stats['mean_batch_size']:>12.2f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
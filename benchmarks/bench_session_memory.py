@@ -0,0 +1,90 @@
+# benchmarks/bench_session_memory.py
+"""
+Streamlit 세션 하나가 들고 있는 메모리 비교.
+
+- before: 세션에 LiarGame 과 라운드 값을 낱개 키(descriptions, votes, players_order, ...)로 두던 방식
+- after:  세션에 GameState(__slots__, 플레이어 번호/문자열/점수만) 하나만 두는 방식
+설명 단계가 끝난 라운드 중간 상태를 같은 내용으로 만들어 resources.session_memory_bytes 로 비교하고,
+GameState 의 바이너리 직렬화 크기와 (역)직렬화 시간을 pickle 과 함께 보여줍니다.
+
+    python benchmarks/bench_session_memory.py [--players 8]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game_state import GameState  # noqa: E402
+from liar_game import LiarGame  # noqa: E402
+from player import Player  # noqa: E402
+from resources import session_memory_bytes  # noqa: E402
+
+
+def make_players(count):
+    return [Player("나", is_human=True)] + [Player(f"AI_{i + 1}") for i in range(1, count)]
+
+
+def before_session(players, descriptions, votes):
+    """예전 app.py 의 세션 구성 (LiarGame 을 세션에 보관)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = LiarGame(players)
+    game.chosen_topic = next(iter(game.topics))
+    game.liar = players[-1]
+    game.predict_secret_word_from_descriptions(descriptions.values())
+    return {
+        "game": game, "game_phase": "voting", "descriptions": dict(descriptions),
+        "current_player_idx": len(players), "secret_word": game.topics[game.chosen_topic][0],
+        "chosen_topic": game.chosen_topic, "players_order": list(players), "votes": dict(votes),
+        "round_data_initialized": True, "liar_word_prediction": None, "initialized": True,
+        "liar_guess_made": False, "button_clicked": False,
+    }
+
+
+def after_session(players, descriptions, votes, topic, secret_word):
+    state = GameState(players)
+    state.start_round(topic, secret_word, len(players) - 1, range(len(players)))
+    state.round.descriptions = {state.index_of(name): text for name, text in descriptions.items()}
+    state.round.votes = {state.index_of(v): state.index_of(t) for v, t in votes.items()}
+    state.round.current_idx = len(players)
+    state.phase = "voting"
+    return {"state": state}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    players = make_players(args.players)
+    descriptions = {p.name: f"{p.name} 의 설명: 일상에서 자주 볼 수 있는 것이에요." for p in players}
+    votes = {p.name: players[-1].name for p in players}
+
+    before = before_session(players, descriptions, votes)
+    after = after_session(make_players(args.players), descriptions, votes,
+                          before["chosen_topic"], before["secret_word"])
+    before_kb = session_memory_bytes(before) / 1024
+    after_kb = session_memory_bytes(after) / 1024
+    print(f"세션 메모리 ({args.players}명, 투표 단계)")
+    print(f"  before (LiarGame + 낱개 키): {before_kb:>9.1f} KB")
+    print(f"  after  (GameState):          {after_kb:>9.1f} KB  ({before_kb / after_kb:.1f}x 작음)")
+
+    state = after["state"]
+    data = state.to_bytes()
+    pickled = pickle.dumps(state)
+    to_us = timeit.timeit(state.to_bytes, number=args.repeat) / args.repeat * 1e6
+    from_us = timeit.timeit(lambda: GameState.from_bytes(data), number=args.repeat) / args.repeat * 1e6
+    pickle_us = timeit.timeit(lambda: pickle.loads(pickle.dumps(state)), number=args.repeat) / args.repeat * 1e6
+    print("GameState 직렬화")
+    print(f"  to_bytes:   {len(data):>6} B  저장 {to_us:.1f} us / 복원 {from_us:.1f} us")
+    print(f"  pickle:     {len(pickled):>6} B  저장+복원 {pickle_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_session_scaling.py
+"""
+동시 세션 수(1..N)에 따른 추론 처리량/지연 시간/CPU 사용률 비교.
+
+세션마다 스레드 하나가 LiarGame 을 만들어 (제시어 예측, STS 유사도, 설명별 단어 예측) 한 묶음을
+반복합니다. 설정마다 별도 프로세스에서 실행합니다. (torch 스레드 수는 프로세스당 한 번만 정해짐)
+- bounded:   inference_runtime 기본값 (동시 forward 수 제한, 코어 수 / 동시 forward 수 만큼의 intra-op 스레드)
+- unbounded: 동시 forward 수 제한 없음, forward 마다 코어 수만큼의 intra-op 스레드 (예전 동작)
+
+기본은 작은 무작위 BERT(benchmarks/tiny_models.py)를 쓰고, --models 로 bert/, trained_model/ 이 있는
+폴더를 주면 실제 모델을 씁니다.
+
+    python benchmarks/bench_session_scaling.py [--sessions 1 2 4 8] [--iterations 20]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+SENTENCES = [
+    "달콤하고 부드러워서 누구나 좋아하는 것이에요.",
+    "아침마다 식탁에서 자주 볼 수 있어요.",
+    "껍질을 벗기면 속이 노랗게 드러나요.",
+    "여름이 되면 더 생각나는 시원한 맛이에요.",
+    "손에 들고 다니기 편한 크기예요.",
+    "과일 가게에서 쉽게 살 수 있어요.",
+]
+CONFIGS = {
+    "bounded": {},
+    "unbounded": {"INFERENCE_CONCURRENCY": "1024", "INFERENCE_INTRA_OP_THREADS": str(os.cpu_count() or 1)},
+}
+
+
+def session_loop(game, iterations, latencies, errors):
+    for i in range(iterations):
+        start = time.perf_counter()
+        try:
+            game.predict_secret_word_from_comments(SENTENCES[i % len(SENTENCES)])
+            game.compute_sts_similarity(SENTENCES[i % len(SENTENCES)], SENTENCES[(i + 1) % len(SENTENCES)])
+            game.predict_words_for_explanations(SENTENCES[:4], game.chosen_topic)
+        except Exception as e:
+            errors.append(repr(e))
+        latencies.append(time.perf_counter() - start)
+
+
+def child(sessions, iterations):
+    """현재 프로세스에서 sessions 개 세션을 동시에 돌리고 결과를 JSON 한 줄로 출력합니다."""
+    import contextlib
+    import io
+
+    from inference_runtime import configure_torch_threads
+    from liar_game import LiarGame
+    from player import Player
+
+    config = configure_torch_threads()
+    games = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(sessions):
+            game = LiarGame([Player("나", is_human=True), Player("AI_2"), Player("AI_3")])
+            game.chosen_topic = next(iter(game.topics))
+            games.append(game)
+    session_loop(games[0], 2, [], [])  # 준비 실행
+
+    latencies, errors = [], []
+    threads = [threading.Thread(target=session_loop, args=(game, iterations, latencies, errors)) for game in games]
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime)
+    ordered = sorted(latencies)
+    print(json.dumps({
+        "sessions": sessions,
+        "throughput": len(latencies) / wall,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "cpu_util": cpu / wall / (os.cpu_count() or 1),
+        "errors": len(errors),
+        "config": config,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--iterations", type=int, default=20, help="세션당 반복 횟수")
+    parser.add_argument("--configs", nargs="+", choices=tuple(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--models", help="bert/, trained_model/ 이 있는 폴더 (없으면 작은 무작위 모델)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.iterations)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="liar-scaling-") as workdir:
+        if args.models:
+            models_dir = os.path.abspath(args.models)
+        else:
+            from liar_game import default_topics
+            from tiny_models import make_tiny_models
+
+            texts = SENTENCES + [word for words in default_topics().values() for word in words]
+            models_dir = make_tiny_models(workdir, texts)
+
+        print(f"코어 {os.cpu_count()}개, 세션당 {args.iterations}회")
+        print(f"{'config':<11}{'sessions':>9}{'it/s':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'CPU':>7}{'errors':>8}  torch")
+        for name in args.configs:
+            env = {key: value for key, value in os.environ.items()
+                   if key not in ("INFERENCE_CONCURRENCY", "INFERENCE_INTRA_OP_THREADS", "LIAR_VOCAB")}
+            env.update(CONFIGS[name])
+            for sessions in args.sessions:
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", str(sessions),
+                     "--iterations", str(args.iterations)],
+                    cwd=models_dir, env=env, capture_output=True, text=True, check=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                c = r["config"]
+                print(f"{name:<11}{sessions:>9}{r['throughput']:>9.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                      f"{r['cpu_util'] * 100:>6.0f}%{r['errors']:>8}  intra {c['intra_op']} / "
+                      f"inter {c['inter_op']} / 동시 {c['concurrency']}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_startup.py
+"""
+시작 시간 벤치마크.
+
+1. `python -X importtime` 으로 주요 모듈의 import 시간과 가장 무거운 하위 import 를 보여줍니다.
+2. streamlit 의 AppTest 로 app.py 첫 화면(설정 단계)을 그리는 데 걸린 시간과,
+   백그라운드 warm_up 이 모델 로드를 끝내기까지 걸린 시간을 새 프로세스에서 측정합니다.
+
+    python benchmarks/bench_startup.py [--top 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MODULES = ("player", "evaluation", "ai_utils_bert", "liar_game")
+
+RENDER_SCRIPT = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=600)
+at.run()
+rendered = time.perf_counter() - start
+import liar_game
+thread = liar_game.warm_up(background=True)
+thread.join()
+ready = time.perf_counter() - start
+print(f"{rendered:.3f} {ready:.3f}")
+"""
+
+
+def import_times(module):
+    """
+    -X importtime 출력에서 (모듈 전체 누적 시간, [(누적 us, 이름), ...]) 을 반환합니다.
+    인터프리터 시작 시의 import(site 등)는 빼고 module 을 import 하며 생긴 항목만 담습니다.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), name.rstrip()))
+    # importtime 은 하위 모듈을 먼저 출력하므로, module 줄 바로 앞의 최상위 항목 이후가 module 의 하위 import
+    end = next((i for i, (_, name) in enumerate(entries) if name.strip() == module and not name[1:].startswith(" ")), None)
+    if end is None:
+        return 0, []
+    start = end
+    while start > 0 and entries[start - 1][1][1:].startswith(" "):
+        start -= 1
+    return entries[end][0], entries[start:end]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10, help="가장 무거운 하위 import 몇 개를 보여줄지")
+    args = parser.parse_args()
+
+    print("## import 시간 (python -X importtime)")
+    for module in MODULES:
+        total, entries = import_times(module)
+        print(f"{module:<16}{total / 1000:>10.1f} ms")
+        heaviest = sorted(entries, reverse=True)[:args.top]
+        for cumulative, name in heaviest:
+            print(f"    {cumulative / 1000:>10.1f} ms  {name.strip()}")
+
+    print("\n## 첫 페이지 렌더링 (streamlit AppTest, 새 프로세스)")
+    proc = subprocess.run([sys.executable, "-c", RENDER_SCRIPT], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr)
+        sys.exit(proc.returncode)
+    rendered, ready = map(float, proc.stdout.split()[-2:])
+    print(f"첫 화면 렌더링 완료: {rendered * 1000:.0f} ms")
+    print(f"모델 warm-up 완료:   {ready * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
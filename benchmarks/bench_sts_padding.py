@@ -0,0 +1,68 @@
+# benchmarks/bench_sts_padding.py
+"""
+STS cross-encoder 의 고정 패딩(max_length=128)과 동적 패딩 + 길이 버킷을 비교하는 마이크로 벤치마크.
+
+    python benchmarks/bench_sts_padding.py [--players 8] [--repeat 5]
+
+한 라운드 설명들의 모든 쌍에 대해 모델에 들어간 토큰 수(패딩 포함)와 평균 지연 시간을 출력합니다.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from resources import get_sts_model
+from sts import STSEngine
+
+# 실제 게임에서 나오는 길이의 한 문장 설명들
+DESCRIPTIONS = [
+    "달콤하고 부드러워서 기분이 좋아질 때 찾게 되는 것이에요.",
+    "여러 사람이 함께 나누어 먹기 좋은 둥근 음식입니다.",
+    "뜨거운 국물과 함께 빠르게 즐길 수 있어요.",
+    "바다의 향기를 작은 한 입에 담은 요리입니다.",
+    "주말 오후에 친구들과 자주 먹게 되는 음식이에요.",
+    "겉은 바삭하고 속은 촉촉한 것이 특징입니다.",
+    "차갑게 먹을수록 더 맛있게 느껴져요.",
+    "특별한 날 촛불과 함께 등장하곤 합니다.",
+    "아침에 간단하게 먹기 좋아요.",
+    "매콤한 양념이 생각날 때 떠오르는 음식이에요.",
+    "여러 재료를 한 그릇에 섞어서 먹는 것이 매력입니다.",
+    "늦은 밤 출출할 때 가장 먼저 생각나요.",
+]
+
+
+def run(engine, pairs, repeat):
+    padded_tokens = sum(inputs["input_ids"].numel() for _, inputs in engine.encode_batches(pairs))
+    engine.score_pairs(pairs)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        engine.score_pairs(pairs)
+    return padded_tokens, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    tokenizer, model = get_sts_model()
+    sentences = (DESCRIPTIONS * (args.players // len(DESCRIPTIONS) + 1))[:args.players]
+    pairs = [(sentences[i], sentences[j]) for i in range(len(sentences)) for j in range(i + 1, len(sentences))]
+
+    fixed = run(STSEngine(tokenizer, model, batch_size=args.batch_size, padding="max_length"), pairs, args.repeat)
+    dynamic = run(STSEngine(tokenizer, model, batch_size=args.batch_size), pairs, args.repeat)
+
+    print(f"쌍 개수: {len(pairs)} (플레이어 {args.players}명)")
+    print(f"{'mode':<12}{'tokens':>10}{'latency(ms)':>14}")
+    for name, (tokens, latency) in (("max_length", fixed), ("longest", dynamic)):
+        print(f"{name:<12}{tokens:>10}{latency * 1000:>14.1f}")
+    print(f"토큰 절감: {1 - dynamic[0] / fixed[0]:.1%}, 지연 시간 절감: {1 - dynamic[1] / fixed[1]:.1%}")
+
+
+if __name__ == "__main__":
+    main()
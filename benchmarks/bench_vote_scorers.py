@@ -0,0 +1,82 @@
+# benchmarks/bench_vote_scorers.py
+"""
+투표 의심도 계산 방식(cross / bi / cascade) 비교.
+
+시뮬레이터의 스텁 설명으로 플레이어 수별 투표 상황을 만들고,
+STS cross-encoder 전체 쌍 계산(cross)을 기준으로 각 방식의
+  - 유사도 행렬 계산 지연 시간 (라운드당)
+  - 투표 확률 분포 일치도 (top-1 후보 일치율, 평균 total variation 거리)
+를 보고합니다.
+
+    python benchmarks/bench_vote_scorers.py [--players 4 8 16] [--trials 30] [--cascade-pairs N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from liar_game import LiarGame  # noqa: E402
+from player import Player  # noqa: E402
+from simulator import StubDescriptionSource  # noqa: E402
+from sts import VOTE_SCORER_MODES, VoteScorer, vote_agreement  # noqa: E402
+
+
+def make_rounds(game, source, num_players, trials, rng):
+    """플레이어 num_players 명(라이어 1명)의 설명 딕셔너리를 trials 개 만듭니다."""
+    rounds = []
+    for _ in range(trials):
+        game.chosen_topic = rng.choice(list(game.topics))
+        secret_word = rng.choice(game.topics[game.chosen_topic])
+        texts = source.truth_descriptions(game, secret_word, num_players - 1)
+        texts.insert(rng.randrange(num_players), source.liar_description(game, " ".join(texts)))
+        rounds.append({f"AI_{i + 1}": text for i, text in enumerate(texts)})
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--cascade-pairs", type=int, help="cascade 에서 cross-encoder 로 다시 계산할 쌍 수 (기본: 플레이어 수)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = LiarGame([Player("AI_1")], total_rounds=0)
+    encoder = game.vote_scorer.encoder
+    rng = random.Random(args.seed)
+    source = StubDescriptionSource(args.seed)
+
+    print(f"{'players':>7}{'mode':>9}{'latency(ms)':>13}{'speedup':>9}{'top1 agree':>12}{'mean TV':>9}")
+    for num_players in args.players:
+        rounds = make_rounds(game, source, num_players, args.trials, rng)
+        latency, probs = {}, {}
+        for mode in VOTE_SCORER_MODES:
+            game.vote_scorer = VoteScorer(game.sts_engine, encoder, mode=mode, cascade_pairs=args.cascade_pairs)
+            game.sts_engine.similarity_matrix(list(rounds[0].values()))  # 워밍업
+            game.vote_scorer.bi_matrix(list(rounds[0].values()))
+            elapsed = 0.0
+            probs[mode] = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for descriptions in rounds:
+                    start = time.perf_counter()
+                    game.vote_scorer.similarity_matrix(list(descriptions.values()))
+                    elapsed += time.perf_counter() - start
+                    for voter_name in descriptions:
+                        probs[mode].append(game.vote_probabilities(voter_name, descriptions)[1])
+            latency[mode] = elapsed / len(rounds) * 1000
+
+        for mode in VOTE_SCORER_MODES:
+            agreement = vote_agreement(probs["cross"], probs[mode])
+            print(f"{num_players:>7}{mode:>9}{latency[mode]:>13.2f}{latency['cross'] / latency[mode]:>8.1f}x"
+                  f"{agreement['top1_agreement']:>12.3f}{agreement['mean_tv_distance']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/fake_openai.py
+"""
+벤치마크용 로컬 OpenAI 호환 가짜 서버 (/v1/chat/completions).
+
+stream=True 요청에는 SSE(text/event-stream)로 chat.completion.chunk 를 한 조각씩 보내고,
+그 밖의 요청에는 응답 전체를 한 번에 보냅니다. 첫 조각까지 first_token_delay 초,
+이후 조각마다 token_delay 초를 기다려 실제 API 의 지연을 흉내 냅니다.
+
+    server = serve(first_token_delay=0.3, token_delay=0.03)
+    client = GPTClient(api_key="x", base_url=server.base_url)
+    ...
+    server.shutdown()
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "달콤하고 부드러워서 한 입 먹으면 기분이 좋아지는 것이에요."
+
+
+def split_tokens(text):
+    """공백 단위로 자른 조각들 (앞 공백 포함, 이어 붙이면 원문)"""
+    words = text.split(" ")
+    return [words[0]] + [" " + word for word in words[1:]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 따로 쓸 때 Nagle + delayed ACK 로 생기는 40ms 지연 방지
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.first_token_delay)
+        if not body.get("stream"):
+            time.sleep(server.token_delay * (len(split_tokens(server.reply)) - 1))
+            out = json.dumps({
+                "id": "fake", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": server.reply},
+                             "finish_reason": "stop"}],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for i, token in enumerate(split_tokens(server.reply)):
+                if i:
+                    time.sleep(server.token_delay)
+                chunk = {
+                    "id": "fake", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                with server.lock:
+                    server.chunks_sent += 1
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 취소함
+            with server.lock:
+                server.disconnects += 1
+        self.close_connection = True
+
+
+def serve(reply=DEFAULT_REPLY, first_token_delay=0.3, token_delay=0.03):
+    """백그라운드 스레드에서 가짜 서버를 띄우고 반환합니다. (server.base_url, 요청/조각/끊김 수 기록)"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.reply = reply
+    server.first_token_delay = first_token_delay
+    server.token_delay = token_delay
+    server.lock = threading.Lock()
+    server.requests = server.chunks_sent = server.disconnects = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
@@ -0,0 +1,346 @@
+# benchmarks/run_suite.py
+"""
+성능 회귀 벤치마크 모음 (pytest-benchmark 방식의 독립 실행 스크립트).
+
+내려받은 체크포인트 대신 작은 무작위 초기화 BERT(benchmarks/tiny_models.py)와
+로컬 가짜 GPT 서버(benchmarks/fake_openai.py)를 쓰므로 네트워크 없이 실행됩니다.
+임시 작업 디렉터리에서 실행하므로 저장소의 ./bert, ./bert_cache 등은 건드리지 않습니다.
+
+항목마다 한 번 실행 시간이 min_time 이상이 되도록 반복 횟수를 정하고, rounds 번 재어
+호출당 min/median/mean/stdev 를 구합니다. 기준선(JSON)과 median 을 비교해
+threshold 비율 이상(그리고 min_delta_ms 이상) 느려진 항목이 있으면 종료 코드 1 로 끝납니다.
+기준선은 만든 기계에서만 의미가 있으므로, 다른 기계에서는 --save-baseline 으로 새로 만드세요.
+
+    python benchmarks/run_suite.py                        # benchmarks/baseline.json 과 비교
+    python benchmarks/run_suite.py --save-baseline        # 현재 결과를 기준선으로 저장
+    python benchmarks/run_suite.py -k vote --threshold 0.3 --json result.json
+"""
+
+import argparse
+import fnmatch
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_openai import serve  # noqa: E402
+from tiny_models import make_tiny_models  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+VOTE_PLAYERS = (3, 6, 10, 20)
+SENTENCES = [
+    "달콤하고 부드러워서 누구나 좋아하는 것이에요.",
+    "아침마다 식탁에서 자주 볼 수 있어요.",
+    "껍질을 벗기면 속이 노랗게 드러나요.",
+    "여름이 되면 더 생각나는 시원한 맛이에요.",
+    "손에 들고 다니기 편한 크기예요.",
+    "빨간색도 있고 초록색도 있어요.",
+    "주스로 만들어 마시기도 해요.",
+    "과일 가게에서 쉽게 살 수 있어요.",
+    "씨가 있어서 조심해서 먹어야 해요.",
+    "너무 익으면 색이 검게 변해요.",
+    "학교에서 매일 사용하는 물건이에요.",
+    "바퀴가 있어서 빠르게 이동할 수 있어요.",
+    "비가 오는 날 꼭 필요해요.",
+    "음악을 들을 때 귀에 꽂아요.",
+    "사진을 찍을 때 자주 쓰여요.",
+    "밤하늘에서 반짝이는 것을 떠올려 보세요.",
+    "동물원에 가면 만날 수 있어요.",
+    "겨울에 따뜻하게 해 주는 것이에요.",
+    "주방에서 요리할 때 꼭 필요해요.",
+    "책상 위에 올려 두고 쓰는 물건이에요.",
+]
+
+CASES = []
+
+
+def case(name, group):
+    """벤치마크 항목 등록. setup(ctx) 은 잴 함수(인자 없음)를 반환합니다."""
+    def register(setup):
+        CASES.append((name, group, setup))
+        return setup
+    return register
+
+
+class Context:
+    """항목들이 함께 쓰는 모델/게임 객체 (처음 쓸 때 만듦)"""
+
+    def __init__(self, topics):
+        self.topics = topics
+        self.words = list(dict.fromkeys(word for words in topics.values() for word in words))
+        self._games = {}
+
+    @property
+    def encoder(self):
+        from resources import get_embedding_model
+
+        return get_embedding_model()
+
+    def game(self, num_players):
+        if num_players not in self._games:
+            from liar_game import LiarGame
+            from player import Player
+
+            players = [Player(f"AI_{i + 1}") for i in range(num_players)]
+            game = LiarGame(players, topics=self.topics)
+            game.chosen_topic = next(iter(self.topics))
+            game.liar = players[-1]
+            players[-1].is_liar = True
+            self._games[num_players] = game
+        return self._games[num_players]
+
+
+@case("encode_single", "encode")
+def _encode_single(ctx):
+    encoder = ctx.encoder
+    return lambda: encoder.encode(SENTENCES[0])
+
+
+@case("encode_single_x16", "encode")
+def _encode_single_loop(ctx):
+    encoder = ctx.encoder
+    return lambda: [encoder.encode(sentence) for sentence in SENTENCES[:16]]
+
+
+@case("encode_batch_16", "encode")
+def _encode_batch(ctx):
+    encoder = ctx.encoder
+    return lambda: encoder.encode(SENTENCES[:16])
+
+
+@case("compute_secret_embeddings_uncached", "embeddings")
+def _secret_embeddings_uncached(ctx):
+    from ai_utils_bert import compute_secret_embeddings
+
+    return lambda: compute_secret_embeddings(ctx.words, use_cache=False)
+
+
+@case("compute_secret_embeddings_cached", "embeddings")
+def _secret_embeddings_cached(ctx):
+    from ai_utils_bert import compute_secret_embeddings
+
+    compute_secret_embeddings(ctx.words)
+    return lambda: compute_secret_embeddings(ctx.words)
+
+
+@case("predict_secret_word_from_comments", "retrieval")
+def _predict_from_comments(ctx):
+    game = ctx.game(5)
+    comments = " ".join(SENTENCES[:4])
+    return lambda: game.predict_secret_word_from_comments(comments)
+
+
+def _vote_round_case(num_players):
+    def setup(ctx):
+        game = ctx.game(num_players)
+        counter = iter(range(10 ** 9))
+
+        def vote_round():
+            # 라운드마다 설명이 달라야 유사도 행렬 캐시에 걸리지 않음
+            n = next(counter)
+            descriptions = {player.name: f"{SENTENCES[i % len(SENTENCES)]} {n}"
+                            for i, player in enumerate(game.players)}
+            return [game.generate_ai_vote(player, descriptions) for player in game.players]
+        return vote_round
+    return setup
+
+
+for _num_players in VOTE_PLAYERS:
+    # 한 라운드의 AI 전원 투표 (유사도 행렬 계산 1회 + 투표자별 확률 계산)
+    case(f"generate_ai_vote_round[{_num_players}p]", "vote")(_vote_round_case(_num_players))
+
+
+@case("evaluation_dict_metrics", "evaluation")
+def _evaluation_dict(ctx):
+    from evaluation import MRR, NDCG, recall_k
+
+    rng = random.Random(0)
+    predicted = {word: rng.random() for word in ctx.words}
+    predicted = dict(sorted(predicted.items(), key=lambda item: -item[1]))
+    targets = ctx.words[:50]
+    return lambda: [(recall_k(predicted, word, 3), MRR(predicted, word), NDCG(predicted, word)) for word in targets]
+
+
+@case("evaluation_batch_1000x500", "evaluation")
+def _evaluation_batch(ctx):
+    import numpy as np
+    from evaluation import batch_evaluate
+
+    rng = np.random.default_rng(0)
+    scores = rng.random((1000, 500))
+    targets = rng.integers(0, 500, 1000)
+    topics = rng.integers(0, 8, 1000)
+    return lambda: batch_evaluate(scores, targets, topics=topics)
+
+
+@case("generate_ai_liar_description", "gpt")
+def _liar_description(ctx):
+    game = ctx.game(5)
+    previous = SENTENCES[:3]
+    return lambda: game.generate_ai_liar_description(previous)
+
+
+def measure(fn, rounds, min_time):
+    """호출당 소요 시간(ms) 통계. 한 round 가 min_time 초 이상이 되도록 반복 횟수(number)를 정함"""
+    fn()  # 준비 실행 (지연 로드/캐시 채우기)
+    start = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - start, 1e-9)
+    number = max(1, math.ceil(min_time / single))
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "mean_ms": statistics.fmean(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": rounds,
+        "number": number,
+    }
+
+
+def machine_info():
+    import torch
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """(표 행 리스트, 느려진 항목 이름 리스트)"""
+    rows, regressions = [], []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, current["median_ms"], None, "new"))
+            continue
+        change = current["median_ms"] / base["median_ms"] - 1
+        delta = current["median_ms"] - base["median_ms"]
+        if change > threshold and delta > min_delta_ms:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold and -delta > min_delta_ms:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, base["median_ms"], current["median_ms"], change, status))
+    return rows, regressions
+
+
+def run(args):
+    from liar_game import default_topics
+
+    topics = default_topics()
+    texts = list(SENTENCES) + [word for words in topics.values() for word in words] + ["0123456789"]
+    make_tiny_models(os.getcwd(), texts, hidden_size=args.hidden_size, num_layers=args.layers)
+
+    ctx = Context(topics)
+    results = {}
+    for name, group, setup in CASES:
+        if args.k and not any(fnmatch.fnmatch(name, f"*{pattern}*") or pattern == group for pattern in args.k):
+            continue
+        fn = setup(ctx)
+        results[name] = {"group": group, **measure(fn, args.rounds, args.min_time)}
+        stats = results[name]
+        print(f"  {name:<40} median {stats['median_ms']:>9.3f} ms  "
+              f"min {stats['min_ms']:>9.3f} ms  ±{stats['stdev_ms']:.3f}  (x{stats['number']})", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="비교하지 않고 결과를 기준선으로 저장")
+    parser.add_argument("--json", help="이번 실행 결과를 저장할 경로")
+    parser.add_argument("-k", nargs="+", help="이름 일부 또는 그룹(encode, embeddings, retrieval, vote, evaluation, gpt)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="median 이 이 비율보다 더 느려지면 실패")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="이보다 작은 차이는 잡음으로 봄")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="round 한 번의 최소 실행 시간(초)")
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=2)
+    args = parser.parse_args()
+
+    server = serve(first_token_delay=0.0, token_delay=0.0)
+    os.environ.update({"OPENAI_BASE_URL": server.base_url, "OPENAI_API_KEY": "fake", "BERT_MODEL_PATH": "./bert"})
+    for name in ("LIAR_VOCAB", "GPT_RESPONSE_CACHE"):
+        os.environ.pop(name, None)
+    baseline_path = os.path.abspath(args.baseline)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="liar-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            print(f"작은 BERT (hidden {args.hidden_size}, {args.layers}층) 로 실행 중... ({workdir})")
+            results = run(args)
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+
+    report = {
+        "machine": machine_info(),
+        "config": {"hidden_size": args.hidden_size, "layers": args.layers,
+                   "rounds": args.rounds, "min_time": args.min_time},
+        "results": results,
+    }
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        if os.path.exists(baseline_path) and args.k:
+            # 일부 항목만 다시 잰 경우 나머지 기준선은 유지
+            with open(baseline_path, encoding="utf-8") as f:
+                previous = json.load(f)
+            report["results"] = {**previous["results"], **results}
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"기준선 저장: {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"기준선이 없습니다: {baseline_path} (--save-baseline 으로 만드세요)")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        print(f"경고: 기준선과 설정이 다릅니다. {baseline.get('config')} != {report['config']}")
+    differs = [key for key in ("processor", "cpu_count", "torch") if baseline["machine"].get(key) != report["machine"][key]]
+    if differs:
+        print(f"경고: 기준선을 만든 환경과 다릅니다 ({', '.join(differs)}). 비교 결과를 참고용으로만 보세요.")
+
+    rows, regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms)
+    print(f"\n{'항목':<40}{'기준(ms)':>11}{'현재(ms)':>11}{'변화':>9}  상태")
+    for name, base, current, change, status in rows:
+        base_text = f"{base:.3f}" if base is not None else "-"
+        change_text = f"{change * 100:+.1f}%" if change is not None else "-"
+        print(f"{name:<40}{base_text:>11}{current:>11.3f}{change_text:>9}  {status}")
+    if regressions:
+        print(f"\n{len(regressions)}개 항목이 {args.threshold * 100:.0f}% 넘게 느려졌습니다: {', '.join(regressions)}")
+        return 1
+    print("\n성능 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# benchmarks/tiny_models.py
+"""
+오프라인 벤치마크용 작은 무작위 초기화 BERT 모델.
+
+내려받은 체크포인트 대신 root/bert(임베딩용 BertModel)와 root/trained_model
+(STS 용 BertForSequenceClassification, 출력 1개)을 만듭니다. 토크나이저는 주어진 문장들에 나오는
+글자로 만든 글자 단위 WordPiece 어휘를 써서, 한국어 문장도 [UNK] 로 뭉개지지 않습니다.
+게임 코드는 ./bert, ./trained_model 을 읽으므로 root 를 작업 디렉터리로 두고 실행합니다.
+
+    root = make_tiny_models(tempfile.mkdtemp(), texts)
+    os.chdir(root)
+"""
+
+import os
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def build_vocab(texts):
+    """texts 의 글자마다 단어 시작형("가")과 이어짐형("##가") 토큰을 둔 어휘 리스트"""
+    chars = sorted({ch for text in texts for ch in text if not ch.isspace()})
+    return SPECIAL_TOKENS + chars + [f"##{ch}" for ch in chars]
+
+
+def make_tiny_models(root, texts, hidden_size=64, num_layers=2, num_heads=2, seed=0):
+    """root 아래에 bert/, trained_model/ 을 만들고 root 를 반환합니다. (같은 seed 면 같은 가중치)"""
+    import torch
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+    from transformers import BertConfig, BertForSequenceClassification, BertModel, PreTrainedTokenizerFast
+
+    os.makedirs(root, exist_ok=True)
+
+    vocab = {token: i for i, token in enumerate(build_vocab(texts))}
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.normalizer = normalizers.BertNormalizer(lowercase=False, strip_accents=False)
+    backend.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])],
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, model_max_length=128, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]",
+    )
+
+    config = BertConfig(
+        vocab_size=tokenizer.vocab_size,
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=num_heads,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=128,
+    )
+    sts_config = BertConfig(**{key: value for key, value in config.to_dict().items()
+                               if key not in ("id2label", "label2id")}, num_labels=1)
+    torch.manual_seed(seed)
+    for name, model in (("bert", BertModel(config)),
+                        ("trained_model", BertForSequenceClassification(sts_config))):
+        path = os.path.join(root, name)
+        model.save_pretrained(path)
+        tokenizer.save_pretrained(path)
+    return root
@@ -0,0 +1,138 @@
+# embedding_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import torch
+
+CACHE_DIR = './bert_cache'
+
+
+def _file_fingerprint(model_path):
+    """
+    모델 폴더 안 파일들의 (상대 경로, 크기, 수정 시각) 목록을 만듭니다.
+    내용 해시를 매번 다시 계산하지 않기 위한 빠른 변경 감지용입니다.
+    """
+    entries = []
+    for root, _, files in os.walk(model_path):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            entries.append([os.path.relpath(path, model_path), stat.st_size, stat.st_mtime_ns])
+    entries.sort()
+    return entries
+
+
+def model_checkpoint_hash(model_path, cache_dir=CACHE_DIR):
+    """
+    모델 체크포인트 파일 내용 전체의 sha256 해시를 반환합니다.
+    파일 목록/크기/수정 시각이 그대로이면 cache_dir 에 저장해 둔 해시를 재사용합니다.
+    """
+    fingerprint = _file_fingerprint(model_path)
+    memo_path = os.path.join(cache_dir, 'fingerprints.json')
+    memo = {}
+    if os.path.exists(memo_path):
+        with open(memo_path, encoding='utf-8') as f:
+            memo = json.load(f)
+    key = os.path.abspath(model_path)
+    if key in memo and memo[key]['fingerprint'] == fingerprint:
+        return memo[key]['hash']
+
+    digest = hashlib.sha256()
+    for rel_path, _, _ in fingerprint:
+        digest.update(rel_path.encode('utf-8'))
+        with open(os.path.join(model_path, rel_path), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    model_hash = digest.hexdigest()
+
+    memo[key] = {'fingerprint': fingerprint, 'hash': model_hash}
+    os.makedirs(cache_dir, exist_ok=True)
+    _atomic_write(memo_path, json.dumps(memo).encode('utf-8'))
+    return model_hash
+
+
+def _atomic_write(path, data):
+    # 같은 디렉토리에 고유한 임시 파일을 만들어 쓰고 교체 (같은 프로세스의 여러 스레드가 동시에 써도 안전)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class EmbeddingStore:
+    """
+    (모델 체크포인트 해시, 단어) 로 주소가 정해지는 디스크 임베딩 캐시.
+    cache_dir/<모델 해시>/ 아래에 float32 행렬(vectors.f32)과 단어 인덱스(words.json)를 두고,
+    행렬은 numpy.memmap 으로 열어 다시 BERT 를 돌리지 않고 바로 읽습니다.
+    모델 파일이 바뀌면 해시가 달라져 새 디렉토리를 쓰므로 캐시가 자동으로 무효화됩니다.
+    variant(예: 추론 백엔드 이름)를 주면 같은 모델이라도 별도 디렉토리를 씁니다.
+    """
+
+    def __init__(self, model_path='./bert', cache_dir=CACHE_DIR, variant=None):
+        self.model_hash = model_checkpoint_hash(model_path, cache_dir)
+        dir_name = self.model_hash[:16] if not variant else f"{self.model_hash[:16]}-{variant}"
+        self.dir = os.path.join(cache_dir, dir_name)
+        self.vectors_path = os.path.join(self.dir, 'vectors.f32')
+        self.index_path = os.path.join(self.dir, 'words.json')
+        self.words = []
+        self.index = {}
+        self.matrix = None
+        # 새 단어 추가(계산 + 파일 교체)는 한 번에 한 스레드만
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['model_hash'] != self.model_hash or not meta['words']:
+            return
+        # 'c'(copy-on-write) 모드: 디스크 파일은 그대로 두고 torch 텐서로 복사 없이 공유
+        # 잠금 없이 읽는 스레드가 새 인덱스와 이전 행렬을 함께 보지 않도록 행렬을 먼저 교체
+        # (새 행렬은 이전 행들을 앞부분에 그대로 포함하므로 이전 인덱스로 읽어도 유효)
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='c',
+                                shape=(len(meta['words']), meta['dim']))
+        self.words = meta['words']
+        self.index = {word: i for i, word in enumerate(self.words)}
+
+    def _append(self, words, vectors):
+        """self._lock 을 잡은 상태에서 호출합니다."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.matrix is not None:
+            vectors = np.concatenate([np.asarray(self.matrix), vectors])
+        all_words = self.words + list(words)
+        os.makedirs(self.dir, exist_ok=True)
+        # 행렬을 먼저 쓰고 인덱스를 나중에 교체하므로, 이전 인덱스를 읽은 프로세스도 앞부분 행은 그대로 유효
+        _atomic_write(self.vectors_path, vectors.tobytes())
+        meta = {'model_hash': self.model_hash, 'dim': int(vectors.shape[1]), 'words': all_words}
+        _atomic_write(self.index_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        self._load()
+
+    def get_many(self, words, encode_fn):
+        """
+        words 의 임베딩을 {단어: 텐서} 딕셔너리로 반환합니다.
+        캐시에 없는 단어만 encode_fn(리스트) 로 한 번에 계산하여 디스크에 추가합니다.
+        """
+        index = self.index
+        if any(word not in index for word in words):
+            with self._lock:
+                # 기다리는 동안 다른 스레드가 추가했을 수 있으므로 다시 확인
+                missing = [word for word in dict.fromkeys(words) if word not in self.index]
+                if missing:
+                    self._append(missing, encode_fn(missing).detach().cpu().numpy())
+        # 인덱스를 먼저 읽음: 그 뒤 행렬이 바뀌어도 새 행렬이 이전 행들을 포함
+        index = self.index
+        matrix = self.matrix
+        return {word: torch.from_numpy(matrix[index[word]]) for word in words}
@@ -0,0 +1,154 @@
+# eval_runner.py
+"""
+시뮬레이션 라운드를 여러 프로세스에 나누어 실행하고 라이어 AI 의 제시어 검색 성능
+(Recall@k, MRR, NDCG)을 신뢰구간과 함께 집계하는 평가 도구.
+
+    python eval_runner.py --rounds 10000 --workers 8 --out report
+    BERT 체크포인트 비교: python eval_runner.py --bert ./bert_v2 --source replay --corpus descriptions.json --out report_v2
+
+report.json 에 요약 지표를, report.csv 에 라운드별 결과를 저장합니다.
+stub 소스의 설명에는 제시어의 의미가 거의 없어(simulator.StubDescriptionSource) 검색 지표가 체크포인트 품질을
+나타내지 않으므로, --bert 로 체크포인트를 비교할 때는 --source replay --corpus 가 필요합니다.
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+METRICS = ("recall_k", "MRR", "NDCG", "caught")
+
+# 보고서 머리에 남기는 설명 소스별 한계
+SOURCE_NOTES = {
+    "stub": "stub 설명은 제시어의 주제와 글자 수만 담으므로 검색 지표는 체크포인트 품질을 나타내지 않습니다. "
+            "(처리량/회귀 확인용)",
+    "replay": "코퍼스에 없는 제시어와 라이어 설명은 stub 방식으로 만들어집니다.",
+}
+
+# 워커 프로세스마다 한 번만 만드는 시뮬레이터 (모델도 워커당 한 번만 로드됨)
+_worker_simulator = None
+_worker_config = None
+
+
+def _init_worker(config):
+    global _worker_simulator, _worker_config
+    from inference_runtime import configure_torch_threads
+
+    # 모델 로드 시의 기본 설정보다 먼저 워커당 스레드 수를 정함 (프로세스당 처음 설정만 적용)
+    configure_torch_threads(intra_op=config["threads_per_worker"])
+    from simulator import Simulator
+
+    _worker_config = config
+    _worker_simulator = Simulator(config["players"], seed=config["seed"], k=config["k"])
+
+
+def _run_shard(shard_index, rounds):
+    import random
+    from simulator import make_source
+
+    # 샤드 번호로 시드를 정해 워커 수와 상관없이 같은 결과가 나오도록 함
+    seed = _worker_config["seed"] * 1_000_003 + shard_index
+    random.seed(seed)
+    _worker_simulator.source = make_source(_worker_config["source"], _worker_config["corpus"], seed=seed)
+    results, _ = _worker_simulator.run(rounds)
+    for result in results:
+        result["shard"] = shard_index
+    return results
+
+
+def summarize(values, z=1.96):
+    """평균과 정규 근사 95% 신뢰구간을 계산합니다."""
+    n = len(values)
+    if n == 0:
+        return {"n": 0, "mean": None, "std": None, "ci95_low": None, "ci95_high": None}
+    mean = sum(values) / n
+    std = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1)) if n > 1 else 0.0
+    half_width = z * std / math.sqrt(n)
+    return {"n": n, "mean": mean, "std": std, "ci95_low": mean - half_width, "ci95_high": mean + half_width}
+
+
+def aggregate(results):
+    """라운드 결과 리스트를 지표별/주제별 요약으로 집계합니다."""
+    report = {metric: summarize([float(r[metric]) for r in results]) for metric in METRICS}
+    topics = sorted({r["topic"] for r in results})
+    report["per_topic"] = {
+        topic: {metric: summarize([float(r[metric]) for r in results if r["topic"] == topic]) for metric in METRICS}
+        for topic in topics
+    }
+    return report
+
+
+def run_evaluation(rounds, workers=None, shard_size=250, players=5, source="stub", corpus=None,
+                   seed=0, k=3, threads_per_worker=1):
+    """
+    rounds 라운드를 shard_size 단위로 나누어 프로세스 풀에서 실행하고 (라운드 결과, 요약) 을 반환합니다.
+    """
+    config = {
+        "players": players, "source": source, "corpus": corpus,
+        "seed": seed, "k": k, "threads_per_worker": threads_per_worker,
+    }
+    shards = [(i, min(shard_size, rounds - start)) for i, start in enumerate(range(0, rounds, shard_size))]
+    # torch 와 fork 를 같이 쓰면 문제가 생길 수 있어 spawn 사용
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(config,)) as executor:
+        for shard_results in executor.map(_run_shard, *zip(*shards)):
+            results.extend(shard_results)
+    return results, aggregate(results)
+
+
+def write_report(path_prefix, results, summary, meta):
+    with open(f"{path_prefix}.json", "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "summary": summary}, f, ensure_ascii=False, indent=2)
+    with open(f"{path_prefix}.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["shard", "topic", "secret_word", "liar", *METRICS])
+        for r in results:
+            writer.writerow([r["shard"], r["topic"], r["secret_word"], r["liar"], *(r[m] for m in METRICS)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=250)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--source", choices=("stub", "replay"), default="stub")
+    parser.add_argument("--corpus", help="replay 소스가 읽을 설명 코퍼스(JSON)")
+    parser.add_argument("--bert", help="평가할 임베딩 체크포인트 경로 (기본 ./bert)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--out", default="eval_report", help="결과 파일 경로 접두사 (.json/.csv)")
+    args = parser.parse_args()
+    if args.bert and not (args.source == "replay" and args.corpus):
+        parser.error("체크포인트 비교(--bert)에는 실제 설명 코퍼스가 필요합니다: --source replay --corpus 경로")
+
+    if args.bert:
+        # spawn 된 워커들이 이 환경 변수를 보고 해당 체크포인트를 로드함
+        os.environ["BERT_MODEL_PATH"] = args.bert
+
+    start = time.perf_counter()
+    results, summary = run_evaluation(
+        args.rounds, args.workers, args.shard_size, args.players, args.source, args.corpus,
+        args.seed, args.k, args.threads_per_worker)
+    elapsed = time.perf_counter() - start
+
+    meta = {**vars(args), "bert": os.environ.get("BERT_MODEL_PATH", "./bert"), "elapsed_s": elapsed,
+            "note": SOURCE_NOTES[args.source]}
+    write_report(args.out, results, summary, meta)
+    print(f"{len(results)} 라운드 평가 완료 ({elapsed:.1f}s, 워커 {args.workers}개)")
+    print(f"  ※ {SOURCE_NOTES[args.source]}")
+    for metric in METRICS:
+        s = summary[metric]
+        print(f"  {metric:<9} {s['mean']:.4f}  (95% CI {s['ci95_low']:.4f} ~ {s['ci95_high']:.4f})")
+    print(f"결과 저장: {args.out}.json, {args.out}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,75 @@
 #from liar_game import LiarGame
-import math
+import numpy as np
+
+def _rank_in_dict(predicted_dict,secret_word):
+    '''
+    유사도 내림차순으로 정렬된 딕셔너리에서 secret_word 의 순위(1부터). 없으면 0
+    '''
+    for i,word in enumerate(predicted_dict,start=1):
+        if word==secret_word:
+            return i
+    return 0
 
 def recall_k(predicted_dict,secret_word,k):
     '''
     딕셔너리에서 상위 k개 내의 secret_word가 존재하냐!
     '''
-    predicted_list=list(predicted_dict.keys())[:k]
-    return secret_word in predicted_list
+    return bool(recall_from_ranks(np.array([_rank_in_dict(predicted_dict,secret_word)]),k)[0])
 
 def MRR(predicted_dict,secret_word):
-    predicted_list=list(predicted_dict.keys())
-    for i in range(1,len(predicted_list)+1):
-        if predicted_list[i-1]==secret_word:
-            return 1/i
-
-    return 0
+    rank=_rank_in_dict(predicted_dict,secret_word)
+    return float(mrr_from_ranks(np.array([rank]))[0]) if rank else 0
 
 def NDCG(predicted_dict,secret_word):
-    predicted_list=list(predicted_dict.keys())
-    for i in range(1,len(predicted_list)+1):
-        if predicted_list[i-1]==secret_word:
-            return 1/math.log2(i+1)
-    return 0
\ No newline at end of file
+    rank=_rank_in_dict(predicted_dict,secret_word)
+    return float(ndcg_from_ranks(np.array([rank]))[0]) if rank else 0
+
+# -----------------------------------------------------------------------------
+# 여러 라운드를 한 번에 평가하는 벡터화 API
+# ranks 는 정답 단어의 1부터 시작하는 순위이며, 0 은 후보에 정답이 없음을 뜻합니다.
+
+def recall_from_ranks(ranks,k):
+    ranks=np.asarray(ranks)
+    return ((ranks>0)&(ranks<=k)).astype(np.float64)
+
+def mrr_from_ranks(ranks):
+    ranks=np.asarray(ranks,dtype=np.float64)
+    return np.divide(1.0,ranks,out=np.zeros_like(ranks),where=ranks>0)
+
+def ndcg_from_ranks(ranks):
+    ranks=np.asarray(ranks,dtype=np.float64)
+    return np.divide(1.0,np.log2(ranks+1),out=np.zeros_like(ranks),where=ranks>0)
+
+def ranks_from_scores(score_matrix,target_indices):
+    '''
+    (라운드 수 x 단어 수) 점수 행렬에서 각 라운드 정답(target_indices)의 순위를 한 번에 계산
+    점수가 같으면 앞쪽 단어가 먼저 (딕셔너리 정렬과 같은 stable 순서). 정답 인덱스가 음수이면 0
+    정렬 없이 O(라운드 수 x 단어 수): 정답보다 높은 점수 수 + 정답보다 앞쪽에 있는 동점 수 + 1
+    '''
+    scores=np.asarray(score_matrix)
+    targets=np.asarray(target_indices)
+    safe_targets=np.where(targets>=0,targets,0)
+    target_scores=scores[np.arange(len(scores)),safe_targets][:,None]
+    before_target=np.arange(scores.shape[1])<safe_targets[:,None]
+    ranks=(scores>target_scores).sum(axis=1)+((scores==target_scores)&before_target).sum(axis=1)+1
+    return np.where(targets>=0,ranks,0)
+
+def batch_evaluate(score_matrix,target_indices,ks=(1,3,5),topics=None):
+    '''
+    (라운드 수 x 단어 수) 점수 행렬과 라운드별 정답 인덱스로 Recall@k(여러 k), MRR, NDCG 를
+    라운드별 NumPy 벡터로 반환. topics(라운드별 주제 리스트)를 주면 주제별 평균도 함께 반환
+    '''
+    ranks=ranks_from_scores(score_matrix,target_indices)
+    result={"rank":ranks}
+    for k in ks:
+        result[f"recall@{k}"]=recall_from_ranks(ranks,k)
+    result["MRR"]=mrr_from_ranks(ranks)
+    result["NDCG"]=ndcg_from_ranks(ranks)
+    if topics is not None:
+        topics=np.asarray(topics)
+        metric_names=[name for name in result if name!="rank"]
+        result["per_topic"]={
+            topic:{name:float(result[name][topics==topic].mean()) for name in metric_names}
+            for topic in np.unique(topics).tolist()
+        }
+    return result
\ No newline at end of file
@@ -0,0 +1,194 @@
+# game_state.py
+"""
+Streamlit 세션 하나의 게임 진행 상태를 담는 작은 객체들.
+
+세션에는 플레이어 번호와 문자열/정수 값만 두고, 모델과 단어 임베딩은
+프로세스 공유 리소스(resources.py)를 참조하는 LiarGame 을 매 실행마다 다시 연결해 씁니다.
+to_bytes()/from_bytes() 로 세션을 바이너리로 저장(체크포인트)하고 다른 프로세스에서 복원할 수 있습니다.
+"""
+
+import struct
+
+from player import Player
+
+PHASES = ("setup", "role_reveal", "explanation", "voting", "result", "game_over")
+MAGIC = b"LGS"
+FORMAT_VERSION = 1
+_NONE = 0xFFFFFFFF
+
+
+class _Writer:
+    __slots__ = ("buffer",)
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def pack(self, fmt, *values):
+        self.buffer += struct.pack("<" + fmt, *values)
+
+    def string(self, value):
+        if value is None:
+            self.pack("I", _NONE)
+            return
+        data = value.encode("utf-8")
+        self.pack("I", len(data))
+        self.buffer += data
+
+
+class _Reader:
+    __slots__ = ("data", "offset")
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def values(self, fmt):
+        fmt = "<" + fmt
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def unpack(self, fmt):
+        values = self.values(fmt)
+        return values if len(values) > 1 else values[0]
+
+    def string(self):
+        length = self.unpack("I")
+        if length == _NONE:
+            return None
+        value = bytes(self.data[self.offset:self.offset + length]).decode("utf-8")
+        self.offset += length
+        return value
+
+
+class RoundState:
+    """
+    한 라운드의 상태. 플레이어는 GameState.players 의 번호로 가리킵니다.
+    descriptions: {설명한 플레이어 번호: 설명} (설명한 순서 유지), votes: {투표자 번호: 지목한 플레이어 번호}
+    """
+
+    __slots__ = ("topic", "secret_word", "liar", "order", "current_idx",
+                 "descriptions", "votes", "hint", "points_calculated")
+
+    def __init__(self, topic=None, secret_word=None, liar=-1, order=()):
+        self.topic = topic
+        self.secret_word = secret_word
+        self.liar = liar
+        self.order = tuple(order)
+        self.current_idx = 0
+        self.descriptions = {}
+        self.votes = {}
+        self.hint = None
+        self.points_calculated = False
+
+    def _write(self, w):
+        w.string(self.topic)
+        w.string(self.secret_word)
+        w.pack("hHH", self.liar, self.current_idx, len(self.order))
+        w.pack(f"{len(self.order)}H", *self.order)
+        w.pack("H", len(self.descriptions))
+        for index, text in self.descriptions.items():
+            w.pack("H", index)
+            w.string(text)
+        w.pack("H", len(self.votes))
+        for voter, target in self.votes.items():
+            w.pack("HH", voter, target)
+        w.string(self.hint)
+        w.pack("?", self.points_calculated)
+
+    @classmethod
+    def _read(cls, r):
+        state = cls(r.string(), r.string())
+        state.liar, state.current_idx, order_len = r.unpack("hHH")
+        state.order = r.values(f"{order_len}H")
+        for _ in range(r.unpack("H")):
+            index = r.unpack("H")
+            state.descriptions[index] = r.string()
+        for _ in range(r.unpack("H")):
+            voter, target = r.unpack("HH")
+            state.votes[voter] = target
+        state.hint = r.string()
+        state.points_calculated = r.unpack("?")
+        return state
+
+
+class GameState:
+    """
+    세션 하나의 게임 상태: 플레이어(이름/점수/역할), 진행 단계, 라운드 번호와 현재 라운드(RoundState).
+    vocab 은 사용 중인 어휘의 이름(LIAR_VOCAB 경로, 기본 어휘면 None)으로, 임베딩은 공유 리소스에서 찾습니다.
+    """
+
+    __slots__ = ("players", "total_rounds", "current_round", "liar_count", "phase", "vocab", "round")
+
+    def __init__(self, players, total_rounds=3, vocab=None):
+        self.players = list(players)
+        self.total_rounds = total_rounds
+        self.current_round = 1
+        self.liar_count = 0
+        self.phase = "role_reveal"
+        self.vocab = vocab
+        self.round = None
+
+    def index_of(self, name):
+        return next(i for i, player in enumerate(self.players) if player.name == name)
+
+    @property
+    def human(self):
+        return next(player for player in self.players if player.is_human)
+
+    @property
+    def liar(self):
+        return self.players[self.round.liar] if self.round and self.round.liar >= 0 else None
+
+    def current_player(self):
+        return self.players[self.round.order[self.round.current_idx]]
+
+    def description_texts(self):
+        """{플레이어 이름: 설명} (설명한 순서) — LiarGame 의 설명 관련 함수에 넘기는 형태"""
+        return {self.players[i].name: text for i, text in self.round.descriptions.items()}
+
+    def vote_names(self):
+        """{투표자 이름: 지목한 플레이어 이름}"""
+        return {self.players[v].name: self.players[t].name for v, t in self.round.votes.items()}
+
+    def start_round(self, topic, secret_word, liar, order):
+        for i, player in enumerate(self.players):
+            player.is_liar = i == liar
+        self.round = RoundState(topic, secret_word, liar, order)
+
+    def to_bytes(self):
+        w = _Writer()
+        w.buffer += MAGIC
+        w.pack("BHHHBH", FORMAT_VERSION, self.total_rounds, self.current_round, self.liar_count,
+               PHASES.index(self.phase), len(self.players))
+        w.string(self.vocab)
+        for player in self.players:
+            w.string(player.name)
+            w.pack("?i", player.is_human, player.score)
+        w.pack("?", self.round is not None)
+        if self.round is not None:
+            self.round._write(w)
+        return bytes(w.buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError("GameState 데이터가 아닙니다.")
+        r = _Reader(data)
+        r.offset = len(MAGIC)
+        version, total_rounds, current_round, liar_count, phase, player_count = r.unpack("BHHHBH")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 GameState 형식 버전: {version}")
+        vocab = r.string()
+        players = []
+        for _ in range(player_count):
+            player = Player(r.string())
+            player.is_human, player.score = r.unpack("?i")
+            players.append(player)
+        state = cls(players, total_rounds, vocab)
+        state.current_round, state.liar_count, state.phase = current_round, liar_count, PHASES[phase]
+        if r.unpack("?"):
+            state.round = RoundState._read(r)
+            for i, player in enumerate(players):
+                player.is_liar = i == state.round.liar
+        return state
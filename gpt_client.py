@@ -0,0 +1,358 @@
+# gpt_client.py
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import openai
+
+from instrumentation import llm_timer, metrics
+from response_cache import ResponseCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# 재시도할 만한 일시적 오류 (타임아웃, 연결 끊김, 속도 제한, 서버 오류)
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class GPTClient:
+    """
+    하나의 AsyncOpenAI 클라이언트(연결 풀)를 재사용하는 GPT 호출 계층.
+    전용 이벤트 루프 스레드에서 요청을 처리하므로 동기 코드(Streamlit, CLI)에서도
+    여러 요청을 동시에 보낼 수 있습니다. 동시 요청 수는 max_concurrency 로 제한되고,
+    요청마다 timeout 초 제한과 지수 백오프 재시도(max_retries 회)가 적용됩니다.
+    base_url 을 주면 로컬 가짜 서버 등 OpenAI 호환 서버로 요청을 보냅니다.
+    cache(response_cache.ResponseCache) 를 주면 캐시 적중 시 네트워크 요청 없이 응답합니다.
+    """
+
+    CLOSED_ERROR = "GPT 클라이언트가 이미 닫혔습니다."
+
+    def __init__(self, model=DEFAULT_MODEL, api_key=None, base_url=None,
+                 max_concurrency=8, timeout=20.0, max_retries=3, backoff=0.5, cache=None):
+        self.model = model
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="gpt-client", daemon=True)
+        self._thread.start()
+        # close() 이후에는 루프에 새 작업을 올리지 않음 (_schedule 참고)
+        self._close_lock = threading.Lock()
+        self._closed = False
+        # 재시도는 여기서 직접 처리하므로 SDK 자체 재시도는 끔
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key or openai.api_key or os.environ.get("OPENAI_API_KEY"),
+            base_url=base_url or os.environ.get("OPENAI_BASE_URL"),
+            timeout=timeout,
+            max_retries=0,
+        )
+        self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(max_concurrency), self._loop).result()
+
+    @staticmethod
+    async def _make_semaphore(max_concurrency):
+        return asyncio.Semaphore(max_concurrency)
+
+    def _schedule(self, coro):
+        """
+        코루틴을 클라이언트 루프에 올리고 concurrent.futures.Future 를 반환합니다.
+        이미 닫힌 클라이언트라면 RuntimeError 가 설정된 Future 를 반환합니다. (결과를 기다리다 멈추지 않도록)
+        """
+        with self._close_lock:
+            if not self._closed:
+                return asyncio.run_coroutine_threadsafe(coro, self._loop)
+        coro.close()
+        future = concurrent.futures.Future()
+        future.set_exception(RuntimeError(self.CLOSED_ERROR))
+        return future
+
+    async def agenerate(self, system_prompt, max_tokens=60, temperature=0.7):
+        """
+        시스템 프롬프트로 응답 텍스트를 생성합니다. 재시도 후에도 실패하면 None 을 반환합니다.
+        소요 시간은 gpt_generate 히스토그램, 실패 수는 gpt_failures 카운터에 기록됩니다. (instrumentation.metrics)
+        """
+        start = time.perf_counter()
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, system_prompt, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                metrics.observe("gpt_generate", time.perf_counter() - start)
+                return cached
+        return await self._generate(system_prompt, max_tokens, temperature, cache_key, start)
+
+    async def _generate(self, system_prompt, max_tokens, temperature, cache_key, start):
+        """캐시를 거치지 않고 새로 생성합니다. (지표 기록, cache_key 가 있으면 캐시에 저장)"""
+        response = await self._request(system_prompt, max_tokens, temperature)
+        metrics.observe("gpt_generate", time.perf_counter() - start)
+        if response is None:
+            metrics.count("gpt_failures", mode="generate")
+        elif cache_key is not None:
+            self.cache.put(cache_key, response)
+        return response
+
+    async def _request(self, system_prompt, max_tokens, temperature):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        self._client.chat.completions.create(
+                            model=self.model,
+                            messages=[{"role": "system", "content": system_prompt}],
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            n=1,
+                        ),
+                        timeout=self.timeout,
+                    )
+                return response.choices[0].message.content.strip()
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    logger.warning("GPT API 호출 중 오류 발생: %r", e)
+                    return None
+                # 지수 백오프 + 지터
+                await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+            except Exception as e:
+                logger.warning("GPT API 호출 중 오류 발생: %s", e)
+                return None
+
+    async def astream(self, system_prompt, max_tokens=60, temperature=0.7, stats=None):
+        """
+        응답을 토큰 조각(delta) 단위로 내보내는 async generator. (같은 chat completion 호출의 stream=True)
+        첫 조각이 오기 전의 일시적 오류만 재시도하고(이미 내보낸 조각은 되돌릴 수 없음), 실패하면 그냥 끝납니다.
+        캐시 적중 시 캐시된 응답을 한 조각으로 내보내고, 끝까지 받은 응답은 캐시에 저장합니다.
+        stats 딕셔너리를 주면 "ttft"(첫 조각까지 초)와 "total_time"(전체 초)을 채우며,
+        두 값은 instrumentation.llm_timer(metrics 의 gpt_stream 히스토그램)에도 기록됩니다.
+        오류로 끝난 스트림은 gpt_failures 카운터에 기록됩니다. (취소는 실패로 세지 않음)
+        """
+        stats = {} if stats is None else stats
+        start = time.perf_counter()
+        if self.cache is not None:
+            cache_key = make_cache_key(self.model, system_prompt, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                stats["ttft"] = stats["total_time"] = time.perf_counter() - start
+                yield cached
+                return
+
+        parts = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    stream = await asyncio.wait_for(
+                        self._client.chat.completions.create(
+                            model=self.model,
+                            messages=[{"role": "system", "content": system_prompt}],
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            n=1,
+                            stream=True,
+                        ),
+                        timeout=self.timeout,
+                    )
+                    try:
+                        async for chunk in stream:
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if not parts and delta:
+                                delta = delta.lstrip()
+                            if not delta:
+                                continue
+                            if not parts:
+                                stats["ttft"] = time.perf_counter() - start
+                                llm_timer.record("ttft", stats["ttft"])
+                            parts.append(delta)
+                            yield delta
+                    finally:
+                        # 취소(GeneratorExit/CancelledError)되어도 HTTP 연결을 바로 닫음
+                        await stream.close()
+                break
+            except RETRYABLE_ERRORS as e:
+                if parts or attempt == self.max_retries:
+                    logger.warning("GPT API 스트리밍 중 오류 발생: %r", e)
+                    metrics.count("gpt_failures", mode="stream")
+                    break
+                await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+            except Exception as e:
+                logger.warning("GPT API 스트리밍 중 오류 발생: %s", e)
+                metrics.count("gpt_failures", mode="stream")
+                break
+
+        if parts:
+            stats["total_time"] = time.perf_counter() - start
+            llm_timer.record("total", stats["total_time"])
+            if self.cache is not None:
+                self.cache.put(cache_key, "".join(parts).strip())
+
+    def stream(self, system_prompt, max_tokens=60, temperature=0.7):
+        """동기 코드용 스트리밍 호출: 바로 요청을 시작하고 ResponseStream 을 반환합니다."""
+        return ResponseStream(self, system_prompt, max_tokens=max_tokens, temperature=temperature)
+
+    def submit(self, system_prompt, max_tokens=60, temperature=0.7):
+        """요청을 백그라운드로 보내고 concurrent.futures.Future 를 바로 반환합니다."""
+        return self._schedule(self.agenerate(system_prompt, max_tokens=max_tokens, temperature=temperature))
+
+    def submit_many(self, system_prompt, n, max_tokens=60, temperature=0.7):
+        """
+        같은 프롬프트로 응답 n 개를 요청하고 Future n 개의 리스트를 바로 반환합니다.
+        캐시가 있으면 서로 다른 캐시 응답을 먼저 쓰고 모자란 만큼만 새로 요청하므로
+        (ResponseCache.get_many), 한 번에 받은 응답끼리는 캐시 때문에 겹치지 않습니다.
+        """
+        if self.cache is None:
+            return [self.submit(system_prompt, max_tokens=max_tokens, temperature=temperature) for _ in range(n)]
+        start = time.perf_counter()
+        cache_key = make_cache_key(self.model, system_prompt, temperature, max_tokens)
+        cached, missing = self.cache.get_many(cache_key, n)
+        futures = []
+        for response in cached:
+            metrics.observe("gpt_generate", time.perf_counter() - start)
+            future = concurrent.futures.Future()
+            future.set_result(response)
+            futures.append(future)
+        futures.extend(
+            self._schedule(self._generate(system_prompt, max_tokens, temperature, cache_key, start))
+            for _ in range(missing)
+        )
+        return futures
+
+    def generate(self, system_prompt, max_tokens=60, temperature=0.7):
+        """동기 호출: 응답 텍스트(실패 시 None)를 반환합니다."""
+        return self.submit(system_prompt, max_tokens=max_tokens, temperature=temperature).result()
+
+    def generate_many(self, system_prompts, max_tokens=60, temperature=0.7):
+        """
+        서로 독립적인 여러 프롬프트를 동시에 요청하고, 입력 순서대로 결과 리스트를 반환합니다.
+        같은 프롬프트끼리는 submit_many 로 묶어 캐시 응답이 겹치지 않게 합니다.
+        """
+        groups = {}
+        for i, prompt in enumerate(system_prompts):
+            groups.setdefault(prompt, []).append(i)
+        futures = [None] * len(system_prompts)
+        for prompt, indices in groups.items():
+            for i, future in zip(indices, self.submit_many(prompt, len(indices), max_tokens, temperature)):
+                futures[i] = future
+        return [future.result() for future in futures]
+
+    def close(self):
+        """
+        진행 중인 요청과 스트림을 모두 취소하고 끝날 때까지 기다린 뒤 루프를 멈춥니다.
+        취소된 submit() Future 의 result() 는 CancelledError 를 던지고, ResponseStream 은 받은 데까지로 끝납니다.
+        닫힌 뒤의 요청은 RuntimeError 가 설정된 Future 를 받습니다.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        asyncio.run_coroutine_threadsafe(self._cancel_pending(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        # 루프가 멈추기 직전에 올라온 작업까지 이 스레드에서 마저 취소한 뒤 연결 풀을 닫음
+        self._loop.run_until_complete(self._cancel_pending())
+        self._loop.run_until_complete(self._client.close())
+        self._loop.close()
+
+    @staticmethod
+    async def _cancel_pending():
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class ResponseStream:
+    """
+    GPTClient.stream 이 반환하는 동기 스트림. for 문으로 토큰 조각을 받습니다. (st.write_stream 에 그대로 넘길 수 있음)
+    반복이 중간에 끝나거나(예외, Streamlit 재실행으로 인한 중단) cancel() 을 부르면 서버 요청도 취소됩니다.
+    받은 만큼의 응답은 text, 시간 기록은 stats({"ttft", "total_time"}, 초) 에 있습니다.
+    """
+
+    _DONE = object()
+
+    def __init__(self, client, system_prompt, max_tokens=60, temperature=0.7):
+        self.text = ""
+        self.stats = {}
+        self._queue = queue.Queue()
+        self._finished = False
+        self._future = client._schedule(
+            self._pump(client.astream(system_prompt, max_tokens, temperature, stats=self.stats)))
+        # 끝나거나 취소되면(시작 전 취소 포함) 소비자를 깨움
+        self._future.add_done_callback(lambda _: self._queue.put(self._DONE))
+
+    async def _pump(self, chunks):
+        try:
+            async for delta in chunks:
+                self._queue.put(delta)
+        finally:
+            await chunks.aclose()
+
+    def __iter__(self):
+        try:
+            while not self._finished:
+                delta = self._queue.get()
+                if delta is self._DONE:
+                    self._finished = True
+                    return
+                self.text += delta
+                yield delta
+        finally:
+            self.cancel()
+
+    def result(self):
+        """남은 조각을 모두 받아 전체 응답(실패 시 None)을 반환합니다."""
+        for _ in self:
+            pass
+        return self.text.strip() or None
+
+    def cancel(self):
+        self._future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._future.cancelled()
+
+
+_client_lock = threading.Lock()
+_shared_client = None
+
+
+def _cache_from_env():
+    """
+    GPT_RESPONSE_CACHE 환경 변수로 응답 캐시를 켭니다.
+    "memory" 이면 메모리 LRU 만, 그 밖의 값은 SQLite 파일 경로로 사용합니다. (없으면 캐시 사용 안 함)
+    """
+    setting = os.environ.get("GPT_RESPONSE_CACHE")
+    if not setting:
+        return None
+    variants = int(os.environ.get("GPT_RESPONSE_CACHE_VARIANTS", "3"))
+    return ResponseCache(variants=variants, sqlite_path=None if setting == "memory" else setting)
+
+
+def get_gpt_client():
+    """프로세스 전체에서 공유하는 GPTClient 를 반환합니다. (처음 호출 시 생성)"""
+    global _shared_client
+    with _client_lock:
+        if _shared_client is None:
+            _shared_client = GPTClient(cache=_cache_from_env())
+        return _shared_client
+
+
+def reset_gpt_client():
+    """API 키 등이 바뀌었을 때 공유 클라이언트를 닫고 다음 호출에서 새로 만들도록 합니다."""
+    global _shared_client
+    with _client_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
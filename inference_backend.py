@@ -0,0 +1,121 @@
+# inference_backend.py
+"""
+BERT 인코더(./bert)와 STS 모델(./trained_model)의 CPU 추론 백엔드 선택.
+
+- "torch": 기본 fp32 PyTorch
+- "int8":  nn.Linear 를 동적 int8 양자화한 PyTorch
+- "onnx":  ONNX 로 내보낸 그래프를 ONNX Runtime 으로 실행 (onnxruntime 이 설치된 경우만)
+
+INFERENCE_BACKEND 환경 변수로 프로세스 전체의 기본 백엔드를 정합니다.
+"""
+
+import importlib.util
+import os
+from types import SimpleNamespace
+
+BACKENDS = ("torch", "int8", "onnx")
+ONNX_CACHE_DIR = "./onnx_cache"
+
+
+def default_backend():
+    backend = os.environ.get("INFERENCE_BACKEND", "torch")
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 추론 백엔드: {backend} (가능한 값: {', '.join(BACKENDS)})")
+    return backend
+
+
+def onnx_available():
+    return importlib.util.find_spec("onnxruntime") is not None
+
+
+def _output_module(model, input_names, output_name):
+    """ONNX 내보내기용 모듈: 위치 인자로 입력을 받아 HF 모델 출력 중 output_name 텐서만 반환"""
+    import torch
+
+    class OutputModule(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args):
+            return getattr(self.model(**dict(zip(input_names, args))), output_name)
+
+    return OutputModule()
+
+
+class ONNXModel:
+    """
+    HF 모델과 같은 방식(model(**inputs).<output_name>)으로 호출할 수 있는 ONNX Runtime 래퍼.
+    처음 만들 때 onnx_path 가 없으면 torch 모델을 내보내고, 이후에는 파일을 재사용합니다.
+    """
+
+    def __init__(self, model, tokenizer, onnx_path, output_name):
+        import onnxruntime
+        import torch
+
+        self.config = model.config
+        self.output_name = output_name
+        if output_name == "logits":
+            # STS cross-encoder 는 문장 쌍을 입력으로 받음
+            sample = tokenizer(["샘플 문장입니다", "샘플"], ["두 번째 문장", "둘"], return_tensors="pt", padding=True)
+        else:
+            sample = tokenizer(["샘플 문장입니다", "샘플"], return_tensors="pt", padding=True)
+        self.input_names = list(sample.keys())
+        if not os.path.exists(onnx_path):
+            os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+            model.eval()
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in self.input_names}
+            dynamic_axes[output_name] = {0: "batch"}
+            tmp_path = f"{onnx_path}.{os.getpid()}.tmp"
+            with torch.no_grad():
+                torch.onnx.export(
+                    _output_module(model, self.input_names, output_name),
+                    tuple(sample[name] for name in self.input_names),
+                    tmp_path,
+                    input_names=self.input_names,
+                    output_names=[output_name],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=17,
+                    dynamo=False,
+                )
+            os.replace(tmp_path, onnx_path)
+        options = onnxruntime.SessionOptions()
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, **inputs):
+        import numpy as np
+        import torch
+
+        feed = {name: np.ascontiguousarray(inputs[name].numpy()) for name in self.input_names}
+        output = self.session.run([self.output_name], feed)[0]
+        return SimpleNamespace(**{self.output_name: torch.from_numpy(output)})
+
+    def eval(self):
+        return self
+
+    def parameters(self):
+        # 가중치는 ONNX Runtime 세션 안에 있음 (torch 파라미터 없음)
+        return iter(())
+
+
+def apply_backend(model, tokenizer, model_path, backend=None, output_name="last_hidden_state"):
+    """
+    로드한 torch 모델을 backend 에 맞게 바꿔 반환합니다.
+    output_name 은 사용하는 출력 (인코더: "last_hidden_state", STS: "logits") 입니다.
+    """
+    import torch
+
+    backend = backend or default_backend()
+    model.eval()
+    if backend == "torch":
+        return model
+    if backend == "int8":
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        if not onnx_available():
+            raise ImportError("onnx 백엔드를 쓰려면 onnxruntime 을 설치해야 합니다. (pip install onnxruntime onnx)")
+        from embedding_cache import model_checkpoint_hash
+
+        name = f"{os.path.basename(os.path.normpath(model_path))}-{model_checkpoint_hash(model_path)[:16]}.onnx"
+        return ONNXModel(model, tokenizer, os.path.join(ONNX_CACHE_DIR, name), output_name)
+    raise ValueError(f"지원하지 않는 추론 백엔드: {backend} (가능한 값: {', '.join(BACKENDS)})")
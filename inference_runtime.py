@@ -0,0 +1,138 @@
+# inference_runtime.py
+"""
+프로세스 단위 CPU 추론 실행 설정.
+
+Streamlit 은 세션마다 스크립트 스레드를 쓰고, 공유 인코더/STS 모델은 모든 스레드가 함께 읽습니다.
+(모델 가중치는 읽기만 하므로 forward 에는 잠금이 필요 없음) 다만 아무 제한이 없으면 스레드마다
+torch 가 코어 수만큼 intra-op 스레드를 써서 코어가 과하게 나뉘므로, 여기서 다음을 정합니다.
+
+- torch intra-op / inter-op 스레드 수: 프로세스당 한 번 (configure_torch_threads)
+- 동시에 forward 를 실행하는 스레드 수: inference_slot() 으로 제한
+  (CPU 사용량 ≈ 동시 실행 수 × intra-op 스레드 수 ≤ 코어 수)
+- 토크나이저 풀: HF fast 토크나이저는 여러 스레드가 동시에 쓰면 "Already borrowed" 오류가
+  날 수 있어, TokenizerPool 이 미리 만든 복사본을 호출마다 빌려 씁니다.
+  (Streamlit 은 재실행마다 새 스레드를 쓰므로 스레드별 복사본은 거의 재사용되지 않음)
+
+환경 변수
+- INFERENCE_CONCURRENCY:      동시 forward 수 (기본값 INFERENCE_WORKERS, 없으면 2)
+- INFERENCE_INTRA_OP_THREADS: forward 하나가 쓰는 스레드 수 (기본값 코어 수 / 동시 forward 수)
+- INFERENCE_INTER_OP_THREADS: torch inter-op 스레드 수 (기본값 1)
+"""
+
+import copy
+import functools
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from instrumentation import metrics
+
+CONCURRENCY = max(1, int(os.environ.get("INFERENCE_CONCURRENCY") or os.environ.get("INFERENCE_WORKERS") or 2))
+
+_config_lock = threading.Lock()
+_thread_config = None
+_slots = threading.BoundedSemaphore(CONCURRENCY)
+
+
+def default_intra_op_threads(concurrency=CONCURRENCY):
+    return max(1, (os.cpu_count() or 1) // concurrency)
+
+
+def configure_torch_threads(intra_op=None, inter_op=None):
+    """
+    torch 스레드 수를 설정하고 {"intra_op", "inter_op", "concurrency"} 를 반환합니다. 프로세스에서 처음 호출할 때만 적용되며,
+    이후 호출은 처음 설정을 그대로 반환합니다. (모델을 로드하기 전에 호출)
+    """
+    global _thread_config
+    with _config_lock:
+        if _thread_config is not None:
+            return _thread_config
+        import torch
+
+        intra_op = intra_op or int(os.environ.get("INFERENCE_INTRA_OP_THREADS") or default_intra_op_threads())
+        inter_op = inter_op or int(os.environ.get("INFERENCE_INTER_OP_THREADS") or 1)
+        torch.set_num_threads(intra_op)
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # inter-op 스레드 풀이 이미 시작된 뒤에는 바꿀 수 없음 (기존 값 유지)
+            inter_op = torch.get_num_interop_threads()
+        _thread_config = {"intra_op": intra_op, "inter_op": inter_op, "concurrency": CONCURRENCY}
+        return _thread_config
+
+
+@contextmanager
+def inference_slot():
+    """
+    forward 한 번을 감쌉니다. 동시에 CONCURRENCY 개까지만 실행되고 나머지는 기다립니다.
+    같은 스레드에서 중첩해 쓰지 마세요. (토크나이즈 등 모델 밖 작업은 슬롯 밖에서)
+    """
+    if not _slots.acquire(blocking=False):
+        start = time.perf_counter()
+        _slots.acquire()
+        metrics.observe("inference_slot_wait", time.perf_counter() - start)
+    try:
+        yield
+    finally:
+        _slots.release()
+
+
+class TokenizerPool:
+    """
+    토크나이저 복사본을 최대 size 개(기본 CONCURRENCY)까지 만들어 두고, 호출마다 하나를 빌려 씁니다.
+    복사본은 동시에 쓰는 호출이 늘어날 때 하나씩 한 번만 만들며, size 개가 모두 쓰이는 중이면
+    반납될 때까지 기다립니다. (대기 시간은 tokenizer_pool_wait 지표)
+    메서드 호출(pad 등)은 빌린 복사본으로, 그 밖의 속성(model_max_length 등)은 원본에서 읽습니다.
+    """
+
+    def __init__(self, tokenizer, size=CONCURRENCY):
+        self._base = tokenizer
+        self._pool = queue.Queue()
+        self._size = max(1, size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._size:
+                # 원본은 (잠금 안에서) 복사에만 쓰고 호출에는 쓰지 않으므로 다른 스레드가 동시에 쓰는 일이 없음
+                tokenizer = copy.deepcopy(self._base)
+                self._created += 1
+                return tokenizer
+        start = time.perf_counter()
+        tokenizer = self._pool.get()
+        metrics.observe("tokenizer_pool_wait", time.perf_counter() - start)
+        return tokenizer
+
+    @contextmanager
+    def borrow(self):
+        tokenizer = self._checkout()
+        try:
+            yield tokenizer
+        finally:
+            self._pool.put(tokenizer)
+
+    def __call__(self, *args, **kwargs):
+        with self.borrow() as tokenizer:
+            return tokenizer(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # copy/pickle 등이 찾는 특수 메서드와 내부 속성은 감싼 토크나이저로 넘기지 않음
+        if name.startswith("__") or name in ("_base", "_pool", "_size", "_created", "_lock"):
+            raise AttributeError(name)
+        attr = getattr(self._base, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with self.borrow() as tokenizer:
+                return getattr(tokenizer, name)(*args, **kwargs)
+
+        return call
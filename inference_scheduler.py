@@ -0,0 +1,166 @@
+# inference_scheduler.py
+"""
+여러 Streamlit 세션(스레드)의 작은 추론 요청(문장 임베딩, STS 쌍 점수)을 모아
+마이크로 배치로 실행하는 공유 스케줄러.
+
+요청은 큐에 들어가고, 수집 스레드가 첫 요청 이후 max_wait_ms 동안(또는 max_batch_size 가 찰 때까지)
+같은 종류의 요청을 모아 전용 워커 풀에서 한 번의 forward 로 처리합니다.
+실행 중인 배치가 없으면 기다리지 않고 큐에 있는 요청만 바로 처리하므로, 세션이 하나일 때는 지연이 늘지 않고
+부하가 있을 때는 앞 배치가 도는 동안 쌓인 요청이 다음 배치로 묶입니다.
+호출자는 concurrent.futures.Future 를 받습니다.
+
+    scheduler = get_inference_scheduler()
+    vector = scheduler.submit("encode", "문장").result()
+    score = scheduler.submit("sts", ("문장1", "문장2")).result()
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
+MAX_BATCH_SIZE = int(os.environ.get("INFERENCE_MAX_BATCH", "32"))
+MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", "2"))
+NUM_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "2"))
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _resolve(future, result=None, exception=None):
+    """아직 끝나지 않은 Future 에만 결과/예외를 담습니다. (취소된 Future 에 담다가 워커가 죽지 않도록)"""
+    if future.done():
+        return
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class InferenceScheduler:
+    """
+    handlers: {요청 종류: 배치 함수} — 배치 함수는 입력 리스트를 받아 같은 길이의 결과 리스트를 반환합니다.
+    지연 시간은 요청이 큐에 들어간 시점부터 결과가 Future 에 담길 때까지이며, 최근 latency_window 개로 p50/p95 를 계산합니다.
+    """
+
+    def __init__(self, handlers, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 num_workers=NUM_WORKERS, latency_window=2048):
+        self.handlers = handlers
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="inference")
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = Counter()
+        self._in_flight = 0
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name="inference-collector", daemon=True)
+        self._collector.start()
+
+    def submit(self, kind, item):
+        """요청 하나를 큐에 넣고 결과를 담을 Future 를 반환합니다."""
+        if kind not in self.handlers:
+            raise ValueError(f"알 수 없는 추론 요청 종류: {kind} (가능한 값: {', '.join(self.handlers)})")
+        if self._closed:
+            raise RuntimeError("이미 종료된 스케줄러입니다.")
+        future = Future()
+        self._queue.put((kind, item, future, time.perf_counter()))
+        return future
+
+    def map(self, kind, items):
+        """여러 요청을 한꺼번에 넣고 결과 리스트를 순서대로 반환합니다."""
+        futures = [self.submit(kind, item) for item in items]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = {first[0]: [first]}
+            # 워커가 놀고 있으면 기다리지 않음 (이미 큐에 있는 요청만 함께 처리)
+            deadline = time.perf_counter() + (self.max_wait if self._in_flight else 0)
+            # 마감 시각까지 또는 한 종류가 배치 크기를 채울 때까지 더 모음
+            while len(pending[first[0]]) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)  # 모은 요청을 처리한 뒤 종료
+                    break
+                pending.setdefault(request[0], []).append(request)
+            for kind, requests in pending.items():
+                for start in range(0, len(requests), self.max_batch_size):
+                    batch = requests[start:start + self.max_batch_size]
+                    with self._stats_lock:
+                        self._in_flight += len(batch)
+                    self._pool.submit(self._run_batch, kind, batch)
+
+    def _run_batch(self, kind, batch):
+        try:
+            results = list(self.handlers[kind]([item for _, item, _, _ in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(f"{kind} 배치 함수가 요청 {len(batch)}개에 결과 {len(results)}개를 반환했습니다.")
+            for (_, _, future, _), result in zip(batch, results):
+                _resolve(future, result=result)
+        except Exception as e:
+            # 이미 결과가 담긴(또는 호출자가 취소한) Future 는 건드리지 않음
+            for _, _, future, _ in batch:
+                _resolve(future, exception=e)
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self._in_flight -= len(batch)
+            self._batch_sizes[len(batch)] += 1
+            self._latencies.extend(finished - enqueued for _, _, _, enqueued in batch)
+
+    def queue_depth(self):
+        """아직 결과가 나오지 않은 요청 수 (큐 대기 + 실행 중)"""
+        return self._queue.qsize() + self._in_flight
+
+    def stats(self):
+        """큐 깊이, 배치 크기 분포, 최근 요청 지연 시간 p50/p95(ms)를 반환합니다."""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            batch_sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(batch_sizes.values())
+        p50, p95 = _percentile(latencies, 0.5), _percentile(latencies, 0.95)
+        return {
+            "queue_depth": self.queue_depth(),
+            "batches": batches,
+            "mean_batch_size": sum(size * count for size, count in batch_sizes.items()) / batches if batches else None,
+            "batch_sizes": batch_sizes,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+        }
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._collector.join()
+        self._pool.shutdown(wait=True)
+
+
+def default_handlers():
+    """BERT 인코더 임베딩("encode")과 STS 쌍 점수("sts") 배치 함수 (공유 모델 사용)"""
+    from resources import get_embedding_model, get_sts_model
+    from sts import STSEngine
+
+    def encode(texts):
+        return list(get_embedding_model().encode(texts))
+
+    def sts(pairs):
+        tokenizer, model = get_sts_model()
+        return STSEngine(tokenizer, model).score_pairs(pairs)
+
+    return {"encode": encode, "sts": sts}
@@ -0,0 +1,332 @@
+# instrumentation.py
+"""
+실행 시간 계측 도구.
+
+PhaseTimer 는 Streamlit 재실행(rerun) 한 번을 구간(phase)별로 나누어 시간을 재고,
+프로세스 전체에서 구간별 최근 기록으로 평균/p50/p95 를 계산합니다.
+llm_timer 는 같은 방식으로 GPT 스트리밍 응답의 첫 조각까지 시간과 전체 생성 시간을 모읍니다.
+
+    with rerun_timer.phase("restore"):
+        ...
+
+MetricsRegistry(metrics) 는 핫 패스의 호출 수/소요 시간 히스토그램과 카운터를 모으고
+Prometheus 텍스트 또는 JSON 으로 내보냅니다.
+
+    @timed("embedding_encode")
+    def encode(...): ...
+
+    metrics.count("gpt_failures")
+    print(metrics.to_prometheus())
+
+환경 변수
+- LIAR_METRICS:       "0" 이면 계측을 끔. (timed 는 원래 함수를 그대로 반환하므로 추가 비용 없음)
+- LIAR_METRICS_PORT:  지정하면 app.py 가 이 포트에서 /metrics(Prometheus), /metrics.json 을 제공
+- LIAR_METRICS_HOST:  지표 서버가 바인딩할 주소 (기본 127.0.0.1, 외부 수집기가 읽어야 하면 0.0.0.0)
+- LIAR_PROFILE:       "cprofile" 또는 "pyinstrument" 이면 profiled() 구간을 프로파일링하여
+                      LIAR_PROFILE_DIR(기본 ./profiles) 에 구간별 파일로 저장
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_ENABLED = os.environ.get("LIAR_METRICS", "1") != "0"
+PROFILE_MODE = os.environ.get("LIAR_PROFILE", "").lower()
+PROFILE_DIR = os.environ.get("LIAR_PROFILE_DIR", "profiles")
+PROFILE_MODES = ("cprofile", "pyinstrument")
+# 초 단위 히스토그램 구간 경계 (Prometheus 기본값 + 1ms)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # 구간 경계는 "이하(le)" 기준
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+# 꺼진 계측이 매번 새 객체를 만들지 않도록 재사용 (nullcontext 는 재진입 가능)
+_NULL_CONTEXT = nullcontext()
+
+
+def _label_text(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+class MetricsRegistry:
+    """
+    이름(+레이블)별 카운터와 소요 시간 히스토그램. 여러 스레드가 함께 써도 안전합니다.
+    enabled=False 이면 모든 기록이 아무 일도 하지 않고, timed 는 함수를 감싸지 않습니다.
+    """
+
+    def __init__(self, enabled=True, prefix="liar_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name, **labels):
+        """with metrics.timer("name"): 블록의 소요 시간을 name 히스토그램에 기록합니다."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _Timer(self, name, labels)
+
+    def timed(self, name):
+        """함수 호출 소요 시간을 name 히스토그램에 기록하는 데코레이터. (꺼져 있으면 함수를 그대로 반환)"""
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """{"counters": {...}, "histograms": {...}} — 레이블이 있으면 'name{key="value"}' 형태의 키"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+
+        def key_text(name, labels):
+            return f"{name}{{{_label_text(labels)}}}" if labels else name
+
+        return {
+            "counters": {key_text(*key): value for key, value in sorted(counters.items())},
+            "histograms": {
+                key_text(*key): {
+                    "count": count,
+                    "sum_seconds": total,
+                    "mean_ms": total / count * 1000 if count else None,
+                    "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], counts)),
+                }
+                for key, (counts, total, count) in sorted(histograms.items())
+            },
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식 (카운터는 _total, 히스토그램은 _seconds_bucket/_sum/_count)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h.counts), h.sum, h.count)) for key, h in self._histograms.items())
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{{{_label_text(labels)}}} {value}" if labels else f"{metric} {value}")
+        for (name, labels), (counts, total, count) in histograms:
+            metric = f"{self.prefix}{name}_seconds"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip([str(b) for b in BUCKETS] + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{{_label_text(labels + (("le", bound),))}}} {cumulative}')
+            suffix = f"{{{_label_text(labels)}}}" if labels else ""
+            lines.append(f"{metric}_sum{suffix} {total}")
+            lines.append(f"{metric}_count{suffix} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전체 핫 패스 계측 (LIAR_METRICS=0 이면 꺼짐)
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+timed = metrics.timed
+
+
+class PhaseTimer:
+    """
+    구간 이름별로 최근 window 개의 소요 시간(초)을 보관합니다. 여러 세션(스레드)이 함께 써도 안전합니다.
+    metric 을 주면 같은 기록을 metrics 의 metric 히스토그램(레이블 phase=구간)에도 남깁니다.
+    """
+
+    def __init__(self, window=512, metric=None):
+        self.window = window
+        self.metric = metric
+        self._samples = {}
+        self._last = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+            self._last[name] = seconds
+        if self.metric:
+            metrics.observe(self.metric, seconds, phase=name)
+
+    def summary(self):
+        """{구간: {"count", "last_ms", "mean_ms", "p50_ms", "p95_ms"}}"""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            last = dict(self._last)
+        return {
+            name: {
+                "count": len(values),
+                "last_ms": last[name] * 1000,
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": _percentile(values, 0.5) * 1000,
+                "p95_ms": _percentile(values, 0.95) * 1000,
+            }
+            for name, values in samples.items()
+        }
+
+
+# app.py 재실행 구간별 시간 (프로세스 전체 세션 합산)
+rerun_timer = PhaseTimer(metric="app_phase")
+
+# GPT 스트리밍 응답의 첫 조각까지 시간("ttft")과 전체 생성 시간("total")
+llm_timer = PhaseTimer(metric="gpt_stream")
+
+
+def profiled(name, mode=None, out_dir=None):
+    """
+    LIAR_PROFILE 이 켜져 있으면 블록을 프로파일링하여 out_dir 에 "<name>-<시각>.prof"(cProfile)
+    또는 ".html"(pyinstrument) 로 저장합니다. 꺼져 있으면 아무 일도 하지 않습니다.
+    """
+    mode = mode or PROFILE_MODE
+    if not mode:
+        return _NULL_CONTEXT
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"지원하지 않는 프로파일 모드: {mode} (가능한 값: {', '.join(PROFILE_MODES)})")
+    return _profiled(name, mode, out_dir or PROFILE_DIR)
+
+
+@contextmanager
+def _profiled(name, mode, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 10**6:06d}")
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("pyinstrument 프로파일링을 쓰려면 pyinstrument 를 설치해야 합니다. (pip install pyinstrument)")
+        # 다른 세션 스레드와 겹치지 않도록 호출한 스레드만 샘플링
+        profiler = Profiler(async_mode="disabled")
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(path + ".html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path + ".prof")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body, content_type = metrics.to_json(), "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_metrics_server(port, host=None):
+    """
+    백그라운드 스레드에서 /metrics, /metrics.json 을 제공하는 HTTP 서버를 띄우고 반환합니다.
+    host 를 주지 않으면 LIAR_METRICS_HOST (기본 127.0.0.1, 로컬에서만 접근 가능) 에 바인딩합니다.
+    """
+    if host is None:
+        host = os.environ.get("LIAR_METRICS_HOST", "127.0.0.1")
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -1,64 +1,200 @@
 # liar_game.py
 
+import logging
+import os
 import random
-import torch
-from transformers import AutoModelForSequenceClassification
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import numpy as np
+import threading
 from player import Player
-from scipy.spatial.distance import cosine
-from ai_utils_bert import embedding_model, download_models, compute_secret_embeddings, gpt_generate_response, util, openai
+from ai_utils_bert import gpt_generate_response, gpt_stream_response
+from resources import (get_embedding_model, get_inference_scheduler, get_packed_vocabulary, get_resource,
+                       get_sts_model, get_topic_embeddings, get_topic_matrices)
 from evaluation import recall_k, MRR, NDCG
+from instrumentation import timed
 import math
 
+logger = logging.getLogger(__name__)
+
+# torch / transformers / openai 와 모델은 import 시점이 아니라 처음 사용할 때 로드합니다.
+# (게임 시작 전에 미리 로드하려면 warm_up() 호출)
+
+# 주제별로 최소 20개의 secret 단어 후보를 정의합니다.
+DEFAULT_TOPICS = {
+    "place": [
+        "공원", "도서관", "해변", "산", "도시", "마을", "강", "호수", "광장", "카페",
+        "식당", "학교", "병원", "극장", "박물관", "시장", "공항", "체육관", "지하철역", "호텔"
+    ],
+    "food": [
+        "초콜릿", "피자", "라면", "스시", "햄버거", "김치", "비빔밥", "떡볶이", "파스타", "스테이크",
+        "샐러드", "치킨", "감자튀김", "샌드위치", "토스트", "오믈렛", "초밥", "케이크", "아이스크림", "컵라면"
+    ],
+    "job": [
+        "의사", "변호사", "요리사", "교사", "프로그래머", "디자이너", "엔지니어", "간호사", "회계사", "군인",
+        "경찰", "소방관", "조종사", "비서", "관리자", "연구원", "작가", "예술가", "음악가", "배우"
+    ],
+    "object": [
+        "컴퓨터", "휴대폰", "책상", "의자", "시계", "텔레비전", "냉장고", "전자레인지", "세탁기", "전구",
+        "수도꼭지", "마우스", "키보드", "프린터", "카메라", "스피커", "이어폰", "헤드폰", "책", "노트"
+    ],
+    "character": [
+        "해리포터", "슈퍼맨", "아이언맨", "스파이더맨", "신데렐라", "닥터 스트레인지", "가모라", "타노스", "배트맨", "원더우먼",
+        "플래시", "캡틴 아메리카", "토르", "헐크", "로켓 라쿤", "데드풀", "엑스맨", "스파이더우먼", "레드후드", "닉 퓨리"
+    ]
+}
+
+# 큰 어휘를 쓰려면 LIAR_VOCAB 환경 변수에 어휘 파일(JSON/CSV/TSV, vocabulary.py 참고)이나
+# build-vocab 으로 만든 packed vocabulary 파일(vocab_pack.py 참고) 경로를 지정
+LIAR_VOCAB = os.environ.get("LIAR_VOCAB")
+
+
+def vocabulary_id(vocab=None):
+    """어휘의 (이름, 버전): 어휘 파일이면 (경로, 수정 시각), 기본 어휘면 (None, None)"""
+    if not vocab:
+        return None, None
+    return vocab, os.stat(vocab).st_mtime_ns
+
+
+def load_topics(vocab=None):
+    """
+    어휘 파일 경로 vocab 의 {주제: 단어 리스트} 를 반환합니다. (vocab 이 None 이면 DEFAULT_TOPICS)
+    파일은 버전(vocabulary_id)마다 한 번만 읽어 프로세스 전체가 공유하므로, 반환값을 수정하면 안 됩니다.
+    packed vocabulary 파일이면 단어 임베딩도 파일에서 읽으므로 게임 생성 시 임베딩 계산이 없습니다.
+    """
+    from vocab_pack import is_packed_vocabulary
+    from vocabulary import load_vocabulary, normalize_topics
+
+    name, version = vocabulary_id(vocab)
+    if not vocab:
+        return get_resource(("vocabulary", name, version), lambda: normalize_topics(DEFAULT_TOPICS))
+    packed = get_resource(("vocabulary_format", name, version),
+                          lambda: "packed" if is_packed_vocabulary(vocab) else "table") == "packed"
+    if packed:
+        return get_packed_vocabulary(vocab, version).topics
+    return get_resource(("vocabulary", name, version), lambda: load_vocabulary(vocab))
+
+
+def default_topics():
+    """기본 {주제: 단어 리스트} 를 반환합니다. (LIAR_VOCAB 이 지정되어 있으면 그 어휘)"""
+    return load_topics(LIAR_VOCAB)
+
+
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+
+def warm_up(background=False):
+    """
+    BERT 인코더, STS 모델, 기본 주제 임베딩 행렬을 미리 로드합니다.
+    background=True 이면 데몬 스레드에서 로드를 시작하고 바로 반환합니다. (프로세스당 한 번만 시작)
+    로드 중에 다른 스레드가 같은 리소스를 요청하면 로드가 끝날 때까지 기다렸다가 같은 객체를 받습니다.
+    """
+    global _warm_up_thread
+
+    def load():
+        get_embedding_model()
+        get_sts_model()
+        get_topic_matrices(default_topics(), vocabulary_id(LIAR_VOCAB))
+
+    if not background:
+        load()
+        return None
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=load, name="liar-game-warm-up", daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
+
+
 class LiarGame:
-    def __init__(self, players, total_rounds=3):
+    # 한 라운드 동안 재실행 사이에 유지하는 계산 상태 (설명 임베딩 집계기, 투표 유사도 행렬 캐시)
+    ROUND_CACHE_ATTRIBUTES = ("comment_aggregator", "sts_engine", "vote_scorer")
+
+    def __init__(self, players, total_rounds=3, vote_scorer=None, topics=None, vocab=LIAR_VOCAB):
         self.players = players
         self.total_rounds = total_rounds
         self.current_round = 1
         self.liar = None
         self.liar_count=0 # 사용자가 liar일 때는 모델 성능 지표에서 빼야하기 때문에 추가가
 
-        # 주제별로 최소 20개의 secret 단어 후보를 정의합니다.
-        self.topics = {
-            "place": [
-                "공원", "도서관", "해변", "산", "도시", "마을", "강", "호수", "광장", "카페",
-                "식당", "학교", "병원", "극장", "박물관", "시장", "공항", "체육관", "지하철역", "호텔"
-            ],
-            "food": [
-                "초콜릿", "피자", "라면", "스시", "햄버거", "김치", "비빔밥", "떡볶이", "파스타", "스테이크",
-                "샐러드", "치킨", "감자튀김", "샌드위치", "토스트", "오믈렛", "초밥", "케이크", "아이스크림", "컵라면"
-            ],
-            "job": [
-                "의사", "변호사", "요리사", "교사", "프로그래머", "디자이너", "엔지니어", "간호사", "회계사", "군인",
-                "경찰", "소방관", "조종사", "비서", "관리자", "연구원", "작가", "예술가", "음악가", "배우"
-            ],
-            "object": [
-                "컴퓨터", "휴대폰", "책상", "의자", "시계", "텔레비전", "냉장고", "전자레인지", "세탁기", "전구",
-                "수도꼭지", "마우스", "책상", "프린터", "카메라", "스피커", "이어폰", "헤드폰", "책", "노트"
-            ],
-            "character": [
-                "해리포터", "슈퍼맨", "아이언맨", "스파이더맨", "신데렐라", "닥터 스트레인지", "가모라", "타노스", "배트맨", "원더우먼",
-                "플래시", "캡틴 아메리카", "토르", "헐크", "로켓 라쿤", "데드풀", "엑스맨", "스파이더우먼", "레드후드", "닉 퓨리"
-            ]
-        }   
+        # 주제별 secret 단어 후보 (기본값: 어휘 파일 vocab 의 주제, 주제 안 중복 단어는 제거)
+        # 어휘 파일의 주제는 프로세스 전체가 공유하는 객체를 읽기만 하고 (재실행마다 복사하지 않음),
+        # 직접 넘긴 topics 만 정리한 복사본을 만듭니다.
+        from vocabulary import normalize_topics
+
+        self.vocab = vocab
+        if topics is not None:
+            self.topics = normalize_topics(topics)
+            vocab_id = None
+        else:
+            self.topics = load_topics(vocab)
+            vocab_id = vocabulary_id(vocab)
         '''
-        각 주제별로 하나의 리스트로 모아 임베딩을 미리 계산 (3개로 간추림)
+        각 주제별 단어 임베딩은 정규화된 (N, d) 행렬 하나로, 프로세스 전체에서 공유하는 리소스를 참조만 합니다.
+        (세션마다 다시 계산하지 않음, resources.py / retrieval.py 참고)
         '''
-        place_secret_words=list(self.topics["place"])
-        self.place_word_embeddings=compute_secret_embeddings(place_secret_words)
-        food_secret_words=list(self.topics["food"])
-        self.food_word_embeddings=compute_secret_embeddings(food_secret_words)
-        job_secret_words=list(self.topics["job"])
-        self.job_word_embeddings=compute_secret_embeddings(job_secret_words)
+        self.topic_matrices = get_topic_matrices(self.topics, vocab_id)
 
         # 어떤 주제를 뽑았는지를 알려주는 벼수
         self.chosen_topic=None
 
-        
-        # 모든 주제의 단어들을 하나의 리스트로 모아 임베딩 미리 계산 (AI 내부 비교용)
+        # STS 모델도 프로세스 전체에서 하나만 로드하여 공유
+        from retrieval import CommentAggregator
+        from sts import STSEngine, VoteScorer
+
+        self.tokenizer, self.model = get_sts_model()
+        # 세션 사이의 작은 임베딩/STS 요청을 마이크로 배치로 묶어 처리하는 공유 스케줄러
+        self.scheduler = get_inference_scheduler()
+        # 라운드별 설명 쌍 유사도를 배치로 계산/캐시하는 엔진 (모델은 공유, 캐시는 세션별)
+        # 쌍 점수는 스케줄러로 보내 다른 세션의 투표/STS 요청과 함께 배치로 계산
+        self.sts_engine = STSEngine(self.tokenizer, self.model, score_fn=self.score_pairs)
+        # 투표 의심도 계산 방식: "cross"(기본) / "bi" / "cascade" (VOTE_SCORER 환경 변수로도 지정 가능)
+        self.vote_scorer = VoteScorer(self.sts_engine, get_embedding_model(),
+                                      mode=vote_scorer or os.environ.get("VOTE_SCORER", "cross"),
+                                      encode_fn=self.encode_texts)
+        # 설명 단계에서 새 설명만 임베딩해 누적하는 라이어 AI 용 집계기
+        self.comment_aggregator = CommentAggregator(get_embedding_model(), encode_fn=self.encode_texts)
+
+    @classmethod
+    def from_state(cls, state, cache=None):
+        """
+        game_state.GameState 에 연결된 LiarGame 을 만듭니다. (주제는 상태에 기록된 어휘 state.vocab 에서)
+        플레이어 객체를 상태와 공유하므로 점수/역할 변경이 상태에 그대로 반영되고,
+        모델과 임베딩은 공유 리소스를 참조만 하므로 Streamlit 재실행마다 새로 만들어도 가볍습니다.
+        cache 에 세션별 dict 를 주면 라운드 단위 계산 상태를 그 안에 보관해 재실행 사이에 이어 씁니다.
+        (attach_round_cache 참고)
+        """
+        game = cls(state.players, state.total_rounds, vocab=state.vocab)
+        game.current_round = state.current_round
+        game.liar_count = state.liar_count
+        if state.round is not None:
+            game.chosen_topic = state.round.topic
+            game.liar = state.liar
+        if cache is not None:
+            game.attach_round_cache(cache)
+        return game
+
+    def attach_round_cache(self, cache):
+        """
+        같은 라운드(라운드 번호, 주제)의 cache 가 있으면 그 집계기/유사도 엔진을 이어 쓰고,
+        없으면 cache 를 비우고 이 게임의 것을 넣습니다.
+        이어 쓰면 이미 임베딩한 설명과 계산한 투표 유사도 행렬을 재실행마다 다시 계산하지 않습니다.
+        """
+        key = (self.current_round, self.chosen_topic)
+        if cache.get("round") == key:
+            for name in self.ROUND_CACHE_ATTRIBUTES:
+                setattr(self, name, cache[name])
+            return
+        cache.clear()
+        cache["round"] = key
+        cache.update({name: getattr(self, name) for name in self.ROUND_CACHE_ATTRIBUTES})
+
+    @property
+    def secret_word_embeddings(self):
+        """
+        모든 주제의 단어들의 {단어: 임베딩} 딕셔너리 (AI 내부 비교용).
+        어휘가 클 수 있어 처음 접근할 때 계산하며, 프로세스 전체가 공유합니다.
+        """
         all_secret_words = [word for words in self.topics.values() for word in words]
-        self.secret_word_embeddings = compute_secret_embeddings(all_secret_words)
+        return get_topic_embeddings(all_secret_words)
 
     def assign_roles(self):
         """
@@ -69,61 +205,82 @@ class LiarGame:
             player.is_liar = False
         self.liar = random.choice(self.players)
         self.liar.is_liar = True
-        print(f"[DEBUG] 이번 라운드 라이어는 {self.liar.name}입니다.")
+        logger.debug("이번 라운드 라이어는 %s입니다.", self.liar.name)
 
-    def predict_secret_word_from_comments(self, comments):
+    @timed("retrieval_comments")
+    def predict_secret_word_from_comments(self, comments, k=None):
         """
         이전 플레이어들의 설명(코멘트)을 임베딩한 후,
         모든 후보 단어(전체 목록) 중 가장 유사도가 높은 단어를 예측합니다.
+        k 를 주면 상위 k 개만 반환합니다. (큰 어휘에서는 ANN 인덱스로 근사 검색)
         (참고용; 투표나 점수 계산에는 사용하지 않습니다.)
         """
-        comment_embedding = embedding_model.encode(comments, convert_to_tensor=True)
-        
-        # 딕셔너리로 유사도 저장
-        word_dict={}
+        comment_embedding = self.scheduler.submit("encode", comments).result()
 
-        # 각 주제에 맞는 기존 embedding 값을 가져오기 위한 작업
-        attribute_name=f"{self.chosen_topic}_word_embeddings" # 문자열 생성
-        get_self=getattr(self,attribute_name) # 동적으로 객체의 속성을 가져옴
+        # 선택된 주제의 정규화 행렬과 행렬곱 한 번으로 유사도 계산 후 내림차순 {단어: 유사도} 반환
+        # (모델 평가를 위해 딕셔너리 형태 유지)
+        return self.topic_matrices[self.chosen_topic].rank(comment_embedding, k)
 
-        for word, emb in get_self.items():
-            similarity = util.cos_sim(comment_embedding, emb)
-            
-            # 모델 평가를 위해 딕셔러니로 유사도를 저장
-            word_dict[word]=similarity
+    def encode_texts(self, texts):
+        """
+        문장 리스트를 공유 추론 스케줄러로 임베딩하여 (N, d) 텐서로 반환합니다.
+        다른 세션의 요청과 같은 마이크로 배치로 묶여 실행될 수 있습니다.
+        """
+        import torch
 
-        # 유사도를 저장한 딕셔너리를 value값(유사도)에 따라 정렬
-        word_dict=dict(sorted(word_dict.items(),key=lambda x:x[1], reverse=True))
-        return word_dict
+        return torch.stack(self.scheduler.map("encode", texts))
 
+    def score_pairs(self, pairs):
+        """
+        [(문장1, 문장2), ...] 의 STS 유사도(0~1)를 공유 추론 스케줄러로 계산하여 리스트로 반환합니다.
+        """
+        return self.scheduler.map("sts", pairs)
+
+    @timed("retrieval_descriptions")
+    def predict_secret_word_from_descriptions(self, descriptions, k=None):
+        """
+        predict_secret_word_from_comments 의 증분 버전.
+        설명 리스트를 받아 새로 추가된 설명만 임베딩하고(self.comment_aggregator),
+        누적 임베딩으로 선택된 주제의 {단어: 유사도} 딕셔너리를 반환합니다. 설명이 없으면 빈 딕셔너리.
+        """
+        self.comment_aggregator.sync(descriptions)
+        comment_embedding = self.comment_aggregator.embedding()
+        if comment_embedding is None:
+            return {}
+        return self.topic_matrices[self.chosen_topic].rank(comment_embedding, k)
+
+    @timed("retrieval_comments_batch")
+    def predict_secret_word_from_comments_batch(self, comments_list):
+        """
+        여러 코멘트 문자열을 한 번에 임베딩하고 순위화하여,
+        각각에 대한 {단어: 유사도} 딕셔너리 리스트를 반환합니다.
+        """
+        comment_embeddings = get_embedding_model().encode(list(comments_list), convert_to_tensor=True)
+        return self.topic_matrices[self.chosen_topic].rank_batch(comment_embeddings)
+
+    @timed("retrieval_explanation")
     def predict_word_for_explanation(self, explanation, topic):
         """
         주어진 설명(explanation)을 임베딩한 후,
         해당 라운드의 주제(topic) 후보 단어들 중 가장 유사한 단어를 예측하여 반환합니다.
         이 값은 투표 참고용으로만 사용됩니다.
         """
-                
-        explanation_embedding = embedding_model.encode(explanation, convert_to_tensor=True)
-        best_word = None
-        best_similarity = -1
-        
-        # 각 주제에 맞는 기존 embedding 값을 가져오기 위한 작업업
-        attribute_name=f"{self.chosen_topic}_word_embeddings" # 문자열 생성
-        get_self=getattr(self,attribute_name) # 동적으로 객체의 속성을 가져옴
+        explanation_embedding = self.scheduler.submit("encode", explanation).result()
+        return self.topic_matrices[topic].best_words(explanation_embedding)[0]
 
-        for word, emb in get_self.items():
-            similarity = util.cos_sim(explanation_embedding, emb).item()
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_word = word
-        return best_word
+    @timed("retrieval_explanations")
+    def predict_words_for_explanations(self, explanations, topic):
+        """
+        여러 설명을 한 번에 임베딩하여, 설명마다 주제(topic) 후보 중 가장 유사한 단어를 리스트로 반환합니다.
+        """
+        explanation_embeddings = get_embedding_model().encode(list(explanations), convert_to_tensor=True)
+        return self.topic_matrices[topic].best_words(explanation_embeddings)
 
-    def generate_ai_truth_description(self, secret_word):
+    def truth_description_prompt(self, secret_word):
         """
-        진실 플레이어 AI의 설명을 생성합니다.
-        GPT API를 통해 secret_word와 관련된 구체적인 힌트를 포함한 한 문장 설명을 요청합니다.
+        진실 플레이어 AI의 설명 생성을 위한 시스템 프롬프트를 만듭니다.
         """
-        system_prompt = (
+        return (
             "You are a truthful player in the Liar Game. The rules of the game are as follows:\n"
             "1. All truthful players share the same secret word, but the liar does not know it.\n"
             "2. Each player must describe the secret word in one sentence without directly revealing it.\n"
@@ -138,18 +295,56 @@ class LiarGame:
             "Make your description sound natural and logical. "
             "Respond in Korean."
         )
-        description = gpt_generate_response(system_prompt)
+
+    def generate_ai_truth_description(self, secret_word):
+        """
+        진실 플레이어 AI의 설명을 생성합니다.
+        GPT API를 통해 secret_word와 관련된 구체적인 힌트를 포함한 한 문장 설명을 요청합니다.
+        """
+        description = gpt_generate_response(self.truth_description_prompt(secret_word))
         return description if description else "설명을 생성하는 데 실패했습니다."
 
-    def generate_ai_liar_description(self, previous_comments):
+    def request_ai_truth_descriptions(self, secret_word, players):
+        """
+        진실 플레이어 AI들의 설명은 이전 설명에 의존하지 않으므로 한꺼번에 동시에 요청합니다.
+        {플레이어 이름: Future} 를 반환하며, 결과는 resolve_description 으로 꺼냅니다.
+        (이전 설명이 필요한 라이어의 설명만 차례를 기다려 생성합니다.)
+        """
+        from gpt_client import get_gpt_client
+
+        names = [player.name for player in players if not player.is_human and not player.is_liar]
+        # 같은 프롬프트를 한 번에 요청해 응답 캐시가 있어도 플레이어마다 다른 설명을 받음
+        futures = get_gpt_client().submit_many(self.truth_description_prompt(secret_word), len(names))
+        return dict(zip(names, futures))
+
+    @staticmethod
+    def resolve_description(future):
+        """request_ai_truth_descriptions 가 반환한 Future 에서 설명을 꺼냅니다. (실패 시 안내 문구)"""
+        description = future.result()
+        return description if description else "설명을 생성하는 데 실패했습니다."
+
+    @staticmethod
+    def cancel_descriptions(futures):
         """
-        라이어 플레이어 AI의 설명을 생성합니다.
+        request_ai_truth_descriptions 로 요청했지만 더 이상 필요 없는 설명들을 취소합니다.
+        진행 중인 요청은 HTTP 연결까지 닫히며, 취소한 요청 수를 반환합니다.
+        """
+        return sum(future.cancel() for future in futures.values())
+
+    def liar_description_prompt(self, previous_comments):
+        """
+        라이어 플레이어 AI의 설명 프롬프트를 만듭니다. (system_prompt, predicted_dict) 를 반환합니다.
         이전 플레이어들의 설명을 취합하여 내부적으로 예측한 제시어를 참고하지만,
         실제 제시어 단서는 주지 않고 일반적인 설명을 생성하도록 합니다.
+        previous_comments 는 이전 설명들을 이어 붙인 문자열이거나, 설명 리스트입니다.
+        (리스트면 comment_aggregator 로 새 설명만 임베딩)
         """
-        if previous_comments.strip():
+        if isinstance(previous_comments, str):
+            predicted_dict = self.predict_secret_word_from_comments(previous_comments) if previous_comments.strip() else {}
+        else:
+            predicted_dict = self.predict_secret_word_from_descriptions(previous_comments)
+        if predicted_dict:
             # return 값이 단일 단어에서, 모든 코사인 유사도 값을 가지는 딕셔너리로 바뀜
-            predicted_dict = self.predict_secret_word_from_comments(previous_comments)
             #가장 유사도가 높은 단어를 추출
             predicted_secret=list(predicted_dict.keys())[0]
 
@@ -175,58 +370,70 @@ class LiarGame:
                 "최대한 플레이어들에게 들키지 않도록 자연스럽게 작성하세요."
                 "한 문장으로 설명을 작성하세요."
             )
-            predicted_dict = {} 
+        return system_prompt, predicted_dict
+
+    def generate_ai_liar_description(self, previous_comments):
+        """
+        라이어 플레이어 AI의 설명을 생성합니다. (description, predicted_dict) 를 반환합니다.
+        """
+        system_prompt, predicted_dict = self.liar_description_prompt(previous_comments)
         description = gpt_generate_response(system_prompt)
         return description if description else "설명을 생성하는 데 실패했습니다.", predicted_dict
 
+    def stream_ai_liar_description(self, previous_comments):
+        """
+        generate_ai_liar_description 의 스트리밍 버전. (ResponseStream, predicted_dict) 를 반환합니다.
+        화면에 설명을 생성되는 대로 보여줄 때 사용합니다.
+        """
+        system_prompt, predicted_dict = self.liar_description_prompt(previous_comments)
+        return gpt_stream_response(system_prompt), predicted_dict
 
-    # 훈련된 모델 로드
-    download_models()
-
-    MODEL_PATH = "./trained_model"  # 학습한 모델이 저장된 폴더 경로
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-    model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
 
-    
+    @timed("sts_similarity")
     def compute_sts_similarity(self, sentence1, sentence2):
         """
         두 문장의 의미적 유사도를 평가하는 함수 (KLUE RoBERTa 활용)
         """
-        inputs = self.tokenizer(sentence1, sentence2, return_tensors="pt", truncation=True, padding="max_length", max_length=128)
-        with torch.no_grad():
-            output = self.model(**inputs).logits
-        similarity_score = output.item()  # 모델의 출력값 (보통 0~5 점수)
-        return similarity_score / 5  # 정규화 (0~1)
+        # 공유 추론 스케줄러가 다른 세션의 요청과 묶어 배치로 계산
+        return self.scheduler.submit("sts", (sentence1, sentence2)).result()  # 정규화 (0~1)
     
-    def generate_ai_vote(self, voter, descriptions):
+    @timed("vote_probabilities")
+    def vote_probabilities(self, voter_name, descriptions):
         """
-        AI 플레이어가 라이어로 의심되는 사람에게 투표하는 로직.
-        KLUE RoBERTa 기반 문장 유사도를 사용하여 의미적으로 다른 설명을 한 플레이어를 찾음.
+        voter_name 을 제외한 후보들과 각 후보에게 투표할 확률을 (후보 이름 리스트, 확률 리스트) 로 반환합니다.
+        모든 설명 쌍의 유사도 행렬은 라운드당 한 번만 계산되고(self.vote_scorer), 투표자들은 이를 읽기만 합니다.
         """
         # 자신을 제외한 후보 리스트
-        candidate_names = [name for name in descriptions if name != voter.name]
+        names = list(descriptions)
+        candidate_names = [name for name in names if name != voter_name]
 
-        # 문장 유사도 계산 (STS 활용)
+        # 문장 유사도 계산 (cross: STS 전체 쌍 / bi: 문장 임베딩 코사인 / cascade: 둘의 조합)
+        sim_matrix = self.vote_scorer.similarity_matrix([descriptions[name] for name in names])
         inverse_similarities = []
 
         for name in candidate_names:
-            sims = []
-            for other_name in candidate_names:
-                if name != other_name:
-                    similarity = self.compute_sts_similarity(descriptions[name], descriptions[other_name])
-                    sims.append(similarity)
-        
+            i = names.index(name)
+            sims = [sim_matrix[i, names.index(other_name)].item() for other_name in candidate_names if other_name != name]
+
             avg_sim = sum(sims) / len(sims) if sims else 0
             inverse_sim = 1 - avg_sim  # 유사도가 낮을수록 의심도가 높음
             inverse_similarities.append(inverse_sim)
-        print(inverse_similarities)
     
-        # Softmax 적용하여 확률 변환
-        scores_tensor = torch.tensor(inverse_similarities)
-        probs = torch.nn.functional.softmax(scores_tensor, dim=0)  # 합이 1이 되도록 변환
+        # Softmax 적용하여 확률 변환 (합이 1이 되도록 변환)
+        max_score = max(inverse_similarities)
+        exp_scores = [math.exp(score - max_score) for score in inverse_similarities]
+        probs = [score / sum(exp_scores) for score in exp_scores]
+        return candidate_names, probs
+
+    def generate_ai_vote(self, voter, descriptions):
+        """
+        AI 플레이어가 라이어로 의심되는 사람에게 투표하는 로직.
+        문장 유사도를 사용하여 의미적으로 다른 설명을 한 플레이어를 찾음.
+        """
+        candidate_names, probs = self.vote_probabilities(voter.name, descriptions)
 
         # 확률을 기반으로 랜덤 투표
-        chosen_candidate = random.choices(candidate_names, weights=probs.tolist(), k=1)[0]
+        chosen_candidate = random.choices(candidate_names, weights=probs, k=1)[0]
 
         return chosen_candidate
     
@@ -298,6 +505,9 @@ class LiarGame:
         
         skip_model_evaluate=0
 
+        # 진실 플레이어 AI들의 설명은 미리 동시에 요청해 두고 차례가 오면 꺼내 씀
+        truth_futures = self.request_ai_truth_descriptions(secret_word, players_for_comments)
+
         for player in players_for_comments:
             aggregated_comments = " ".join(descriptions.values())
             if player.is_human:
@@ -320,17 +530,17 @@ class LiarGame:
             else:
                 if player.is_liar:
                     # return 값이 2개가 됨!
-                    desc, predicted_dict = self.generate_ai_liar_description(aggregated_comments)
+                    desc, predicted_dict = self.generate_ai_liar_description(list(descriptions.values()))
                 else:
-                    desc = self.generate_ai_truth_description(secret_word)
+                    desc = self.resolve_description(truth_futures[player.name])
                 print(f"{player.name}의 설명: {desc}")
                 descriptions[player.name] = desc
 
 
         # 모든 플레이어의 설명에 대해, 각 설명에서 주제 후보 단어 중 가장 적합한 단어를 예측하여 참고용으로 출력
         print("\n[참고용] 각 플레이어의 설명으로 예측한 단어:")
-        for name, explanation in descriptions.items():
-            predicted = self.predict_word_for_explanation(explanation, chosen_topic)
+        predicted_words = self.predict_words_for_explanations(descriptions.values(), chosen_topic)
+        for name, predicted in zip(descriptions, predicted_words):
             print(f"{name}: {predicted}")
 
 
@@ -432,9 +642,14 @@ class LiarGame:
             MRR_score+=MRR_result
             NDCG_score+=NDCG_result
         print("모델 평가 지표 결과")
-        print(f"Recall K의 결과: {recall_k_score/(self.total_rounds-self.liar_count)}")
-        print(f"MRR의 결과: {MRR_score/(self.total_rounds-self.liar_count)}")
-        print(f"NDCG의 결과: {NDCG_score/(self.total_rounds-self.liar_count)}")
+        evaluated_rounds = self.total_rounds - self.liar_count
+        if evaluated_rounds > 0:
+            print(f"Recall K의 결과: {recall_k_score/evaluated_rounds}")
+            print(f"MRR의 결과: {MRR_score/evaluated_rounds}")
+            print(f"NDCG의 결과: {NDCG_score/evaluated_rounds}")
+        else:
+            # 사용자가 모든 라운드에서 라이어였으면 평가할 라운드가 없음
+            print("평가할 라운드가 없습니다. (대규모 평가는 eval_runner.py 사용)")
         print(f"사용자 liar 횟수: {self.liar_count}")
 
 
@@ -448,3 +663,39 @@ class LiarGame:
             print(f"\n최종 승자: {winners[0]}!")
         else:
             print(f"\n최종 승자: {', '.join(winners)} (공동 승자)!")
+
+
+def main(argv=None):
+    """
+    명령행 도구.
+        python -m liar_game build-vocab [--input words.tsv] [--out vocab.pack] [--dtype fp16]
+    --input 을 주지 않으면 DEFAULT_TOPICS 로 만듭니다. 만든 파일은 LIAR_VOCAB 으로 지정해 사용합니다.
+    """
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m liar_game")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build-vocab", help="주제 어휘의 단어 임베딩을 packed vocabulary 파일로 미리 만듭니다")
+    build.add_argument("--input", help="어휘 파일 (JSON/CSV/TSV, 기본: DEFAULT_TOPICS)")
+    build.add_argument("--out", default="vocab.pack")
+    build.add_argument("--dtype", choices=("fp16", "int8", "fp32"), default="fp16",
+                       help="벡터 저장 형식. 실행 시 파일을 memmap 으로 그대로 읽으며 단어당 fp32 d*4, fp16 d*2, "
+                            "int8 d+4 바이트 (fp16/int8 점수는 블록 단위로 float32 로 올려 계산, 기본 fp16)")
+    build.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    if args.command == "build-vocab":
+        from vocab_pack import build_vocabulary
+        from vocabulary import load_vocabulary
+
+        topics = load_vocabulary(args.input) if args.input else DEFAULT_TOPICS
+        start = time.perf_counter()
+        manifest = build_vocabulary(topics, args.out, args.dtype, args.batch_size)
+        print(f"{args.out}: 주제 {len(manifest['topics'])}개, 단어 {manifest['count']}개, "
+              f"{manifest['dtype']} {manifest['dim']}차원, {os.path.getsize(args.out) / 1024:.1f} KB "
+              f"({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 # player.py
 
 class Player:
+    # 세션마다 여러 명이 만들어지므로 __dict__ 없이 고정 속성만 둠
+    __slots__ = ("name", "is_liar", "score", "is_human")
+
     def __init__(self, name, is_human=False):
         self.name = name            # 플레이어 이름
         self.is_liar = False        # 라이어 여부 (게임 시작 시 한 명만 True로 설정)
@@ -0,0 +1,304 @@
+# resources.py
+
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 전체에서 한 번만 만들어 공유하는 리소스 (모델, 토픽 임베딩 등)
+# Streamlit 은 세션마다 스크립트를 다시 실행하지만 모듈은 프로세스당 한 번만 import 되므로,
+# 여기에 보관한 객체는 모든 브라우저 세션이 참조만 하게 됩니다.
+_resources = {}
+# _lock 은 딕셔너리 조작만 짧게 보호하고, 리소스 생성(factory)은 키별 잠금으로 같은 키를 요청한 스레드만 기다림
+_lock = threading.RLock()
+_key_locks = {}
+# invalidate_model_resources 가 호출될 때마다 증가 (그 전에 시작한 생성 결과는 저장하지 않음)
+_generation = 0
+
+# 어휘별 주제 임베딩 행렬 레지스트리 {어휘 이름: (버전, {주제: 단어 리스트}, {주제: TopicMatrix})} 와
+# 만들 때의 임베딩 모델 서명 (어휘 이름/버전은 liar_game.vocabulary_id 참고)
+_topic_registry = {}
+_registry_signature = None
+# 임베딩 모델 파일 변경을 확인하는 간격 (초). 재실행마다 체크포인트 폴더를 훑지 않도록 이 간격으로만 확인
+MODEL_CHECK_INTERVAL = float(os.environ.get("MODEL_CHECK_INTERVAL", 30))
+_signature_checked_at = None
+
+STS_MODEL_PATH = "./trained_model"  # 학습한 STS 모델이 저장된 폴더 경로
+
+
+def get_resource(key, factory):
+    """
+    key 에 해당하는 공유 리소스를 반환합니다. 없으면 factory() 로 한 번만 생성합니다.
+    여러 스레드(세션)가 동시에 요청해도 factory 는 한 번만 호출되며, 생성 중에는 같은 key 를
+    요청한 스레드만 기다립니다. (모델 로드 중에도 다른 리소스 조회는 막히지 않음)
+    """
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+    with _lock:
+        key_lock = _key_locks.get(key)
+        if key_lock is None:
+            key_lock = _key_locks[key] = threading.RLock()
+    with key_lock:
+        with _lock:
+            if key in _resources:
+                return _resources[key]
+            generation = _generation
+        resource = factory()
+        with _lock:
+            if generation == _generation:
+                resource = _resources.setdefault(key, resource)
+        return resource
+
+
+def get_embedding_model():
+    """문장/단어 임베딩용 BERT 인코더를 반환합니다. (처음 호출 시 로드)"""
+    def load():
+        from ai_utils_bert import BERTEmbeddingModel, BERT_MODEL_PATH
+        return BERTEmbeddingModel(BERT_MODEL_PATH)
+
+    return get_resource("embedding_model", load)
+
+
+def _load_sts_model():
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    from ai_utils_bert import download_models
+    from inference_backend import apply_backend
+    from inference_runtime import TokenizerPool, configure_torch_threads
+
+    download_models()
+    configure_torch_threads()
+    tokenizer = TokenizerPool(AutoTokenizer.from_pretrained(STS_MODEL_PATH))
+    model = AutoModelForSequenceClassification.from_pretrained(STS_MODEL_PATH)
+    # INFERENCE_BACKEND 환경 변수에 따라 fp32 / int8 / onnx 로 실행
+    return tokenizer, apply_backend(model, tokenizer, STS_MODEL_PATH, output_name="logits")
+
+
+def get_sts_model():
+    """STS 문장 유사도 cross-encoder 의 (tokenizer, model) 을 반환합니다."""
+    return get_resource("sts_model", _load_sts_model)
+
+
+def get_inference_scheduler():
+    """
+    세션들의 작은 임베딩/STS 요청을 마이크로 배치로 묶어 처리하는 공유 스케줄러를 반환합니다.
+    (inference_scheduler.InferenceScheduler, 요청 종류: "encode", "sts")
+    """
+    def create():
+        from inference_scheduler import InferenceScheduler, default_handlers
+        return InferenceScheduler(default_handlers())
+
+    return get_resource("inference_scheduler", create)
+
+
+def get_topic_embeddings(words):
+    """
+    단어 리스트의 임베딩 딕셔너리 {단어: 텐서} 를 반환합니다.
+    같은 단어 목록이면 모든 세션이 같은 딕셔너리를 공유하므로 값을 수정하면 안 됩니다.
+    """
+    from ai_utils_bert import compute_secret_embeddings
+
+    words = tuple(words)
+    return get_resource(("topic_embeddings", words), lambda: compute_secret_embeddings(list(words)))
+
+
+def get_topic_matrix(words):
+    """단어 리스트의 정규화된 임베딩 행렬(retrieval.TopicMatrix)을 반환합니다. (프로세스 공유)"""
+    from retrieval import TopicMatrix
+
+    words = tuple(words)
+    return get_resource(("topic_matrix", words), lambda: TopicMatrix.from_embeddings(get_topic_embeddings(words)))
+
+
+def _evict(key):
+    """공유 리소스 하나와 그 키별 잠금을 버립니다. (_lock 을 잡은 상태에서 호출)"""
+    _resources.pop(key, None)
+    _key_locks.pop(key, None)
+
+
+def get_packed_vocabulary(path, version=None):
+    """
+    build-vocab 으로 만든 packed vocabulary(vocab_pack.PackedVocabulary)를 열어 반환합니다. (프로세스 공유)
+    각 주제의 TopicMatrix 를 파일의 벡터로 미리 등록하므로, 같은 단어 목록에 대한
+    get_topic_matrix 는 임베딩 모델을 실행하지 않습니다.
+    다른 체크포인트로 만든 파일은 거부하고, 만들 때의 추론 백엔드가 지금 질의를 인코딩하는 백엔드
+    (INFERENCE_BACKEND)와 다르면 경고를 남깁니다. (점수 척도가 조금 달라짐)
+    invalidate_model_resources 는 미리 등록한 topic_matrix 항목과 이 packed_vocabulary 항목을 함께 버리므로,
+    다음 호출에서 파일을 다시 열고 등록합니다.
+    version(파일 수정 시각 등)이 다르면 다른 리소스로 보고 파일을 다시 엽니다.
+    """
+    def load():
+        from ai_utils_bert import BERT_MODEL_PATH
+        from embedding_cache import model_checkpoint_hash
+        from inference_backend import default_backend
+        from vocab_pack import PackedVocabulary
+
+        pack = PackedVocabulary(path)
+        if pack.model_hash != model_checkpoint_hash(BERT_MODEL_PATH):
+            raise ValueError(f"{path} 는 다른 임베딩 모델로 만든 파일입니다. "
+                             f"현재 모델({BERT_MODEL_PATH})로 build-vocab 을 다시 실행하세요.")
+        built_with = pack.manifest.get("backend")
+        if built_with is not None and built_with != default_backend():
+            logger.warning("%s 는 %s 백엔드로 만든 파일인데 질의는 %s 백엔드로 인코딩합니다. "
+                           "같은 INFERENCE_BACKEND 로 build-vocab 을 다시 실행하세요.", path, built_with, default_backend())
+        for topic, words in pack.topics.items():
+            get_resource(("topic_matrix", tuple(words)), lambda: pack.topic_matrix(topic))
+        return pack
+
+    return get_resource(("packed_vocabulary", path, version), load)
+
+
+def _model_signature():
+    """임베딩 모델 체크포인트의 경로와 파일 목록/크기/수정 시각 (내용 해시보다 훨씬 가벼운 변경 감지용)"""
+    from ai_utils_bert import BERT_MODEL_PATH
+    from embedding_cache import _file_fingerprint
+
+    return BERT_MODEL_PATH, tuple(map(tuple, _file_fingerprint(BERT_MODEL_PATH)))
+
+
+def invalidate_model_resources():
+    """
+    임베딩 모델 파일이 바뀌었을 때 인코더, 단어 임베딩/행렬, packed vocabulary 와 주제 레지스트리를 모두 버립니다.
+    다음 요청에서 새 모델로 다시 만들어집니다.
+    """
+    from ai_utils_bert import reset_embedding_store
+
+    global _generation, _signature_checked_at
+    with _lock:
+        _generation += 1
+        _signature_checked_at = None
+        for key in list(_resources):
+            if key == "embedding_model" or (
+                    isinstance(key, tuple) and key[0] in ("topic_embeddings", "topic_matrix", "packed_vocabulary")):
+                _evict(key)
+        _topic_registry.clear()
+        reset_embedding_store()
+
+
+def _check_model_signature():
+    """
+    마지막 확인 후 MODEL_CHECK_INTERVAL 초가 지났으면 임베딩 모델 서명을 다시 읽고,
+    기록된 서명과 다르면 모델 리소스를 모두 버립니다. (invalidate_model_resources 직후에는 바로 다시 읽음)
+    """
+    global _registry_signature, _signature_checked_at
+    with _lock:
+        now = time.monotonic()
+        if _signature_checked_at is not None and now - _signature_checked_at < MODEL_CHECK_INTERVAL:
+            return
+        signature = _model_signature()
+        # 모델 파일이 아직 없던 경우(download_models 로 처음 받는 중)는 변경으로 보지 않음
+        if _registry_signature is not None and _registry_signature[1] and signature != _registry_signature:
+            invalidate_model_resources()
+        _registry_signature = signature
+        _signature_checked_at = now
+
+
+def _evict_vocabulary(name, version, topics, keep):
+    """
+    어휘 name 의 예전 version 에서 쓰던 리소스(단어 목록, packed 파일, 주제별 임베딩/행렬)를 버립니다.
+    새 버전에서도 쓰는 단어 목록(keep)의 임베딩/행렬은 남깁니다. (_lock 을 잡은 상태에서 호출)
+    """
+    for prefix in ("vocabulary", "vocabulary_format", "packed_vocabulary"):
+        _evict((prefix, name, version))
+    for words in topics.values():
+        words = tuple(words)
+        if words not in keep:
+            _evict(("topic_matrix", words))
+            _evict(("topic_embeddings", words))
+
+
+def get_topic_matrices(topics, vocab_id=None):
+    """
+    {주제: 단어 리스트} 로부터 {주제: TopicMatrix} 딕셔너리를 반환합니다. (반환된 딕셔너리는 읽기 전용)
+    vocab_id((어휘 이름, 버전))를 주면 레지스트리를 그 식별자로 찾으므로, 같은 어휘/모델이면 단어 목록을 다시
+    훑지 않고 그대로 돌려줍니다. (Streamlit 재실행/라운드마다 다시 계산하지 않음)
+    같은 이름의 새 버전(어휘 파일 수정)이 들어오면 예전 버전의 행렬/임베딩은 버립니다.
+    vocab_id 가 없으면(직접 넘긴 주제) 단어 목록별 공유 행렬(get_topic_matrix)을 찾습니다.
+    임베딩 모델 파일이 바뀌면(MODEL_CHECK_INTERVAL 초마다 확인) 전부 다시 만듭니다.
+    """
+    _check_model_signature()
+    if vocab_id is None:
+        return {topic: get_topic_matrix(words) for topic, words in topics.items()}
+
+    name, version = vocab_id
+    entry = _topic_registry.get(name)
+    if entry is not None and entry[0] == version:
+        return entry[2]
+    with _lock:
+        generation = _generation
+    matrices = {topic: get_topic_matrix(words) for topic, words in topics.items()}
+    with _lock:
+        if generation != _generation:
+            return matrices
+        old = _topic_registry.get(name)
+        if old is not None and old[0] != version:
+            _evict_vocabulary(name, old[0], old[1], keep={tuple(words) for words in topics.values()})
+        _topic_registry[name] = (version, topics, matrices)
+    return matrices
+
+
+def _shared_ids():
+    ids = set()
+    with _lock:
+        for resource in _resources.values():
+            ids.add(id(resource))
+            if isinstance(resource, dict):
+                ids.update(id(value) for value in resource.values())
+            elif isinstance(resource, tuple):
+                ids.update(id(item) for item in resource)
+    return ids
+
+
+def _deep_sizeof(obj, seen, skip):
+    if id(obj) in seen or id(obj) in skip:
+        return 0
+    seen.add(id(obj))
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        # torch.Tensor / numpy.ndarray 는 실제 데이터 크기로 계산
+        return sys.getsizeof(obj) + nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_sizeof(key, seen, skip) + _deep_sizeof(value, seen, skip)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_sizeof(item, seen, skip)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += _deep_sizeof(vars(obj), seen, skip)
+    elif hasattr(type(obj), "__slots__"):
+        # __slots__ 객체(Player, GameState 등)는 __dict__ 가 없으므로 슬롯 값을 따라감
+        for name in type(obj).__slots__:
+            if hasattr(obj, name):
+                size += _deep_sizeof(getattr(obj, name), seen, skip)
+    return size
+
+
+def session_memory_bytes(obj):
+    """
+    세션이 들고 있는 객체(obj)의 메모리 사용량(바이트)을 추정합니다.
+    공유 리소스(모델, 토픽 임베딩)는 참조만 하므로 계산에서 제외합니다.
+    """
+    return _deep_sizeof(obj, set(), _shared_ids())
+
+
+def shared_memory_bytes():
+    """프로세스 전체가 공유하는 리소스의 메모리 사용량(바이트)을 추정합니다."""
+    seen = set()
+    total = 0
+    with _lock:
+        resources = list(_resources.values())
+    for resource in resources:
+        if isinstance(resource, tuple):
+            # (tokenizer, model) 쌍: 모델 파라미터 크기만 계산
+            for item in resource:
+                if hasattr(item, "parameters"):
+                    total += sum(p.nelement() * p.element_size() for p in item.parameters())
+        elif hasattr(resource, "model"):
+            total += sum(p.nelement() * p.element_size() for p in resource.model.parameters())
+        else:
+            total += _deep_sizeof(resource, seen, set())
+    return total
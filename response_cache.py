@@ -0,0 +1,109 @@
+# response_cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def make_cache_key(model, prompt, temperature, max_tokens):
+    """(모델, 프롬프트, temperature, max_tokens) 로 캐시 키(sha256 hex)를 만듭니다."""
+    payload = json.dumps([model, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    GPT 응답 캐시. 키마다 서로 다른 응답을 variants 개까지 모은 뒤부터 적중(hit)으로 처리하고,
+    저장된 응답들을 돌아가며 반환해 같은 제시어라도 게임마다 설명이 반복되지 않게 합니다.
+    한 번에 n 개를 꺼내는 get_many 는 서로 다른 응답만 돌려주며, 키가 모을 응답 수도 n 개까지 늘어나므로
+    (진실 AI 가 variants 명보다 많은 판) 한 라운드 안에서 두 플레이어가 같은 설명을 받지 않습니다.
+    메모리에는 최근 max_entries 개 키만 LRU 로 유지하며, sqlite_path 를 주면 SQLite 파일에도 저장해
+    프로세스가 다시 시작되어도 재사용합니다.
+    """
+
+    def __init__(self, max_entries=1024, variants=3, sqlite_path=None):
+        self.max_entries = max_entries
+        self.variants = variants
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> {"responses": [...], "cursor": int}
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT NOT NULL, variant INTEGER NOT NULL, response TEXT NOT NULL, "
+                "PRIMARY KEY (key, variant))"
+            )
+            self._db.commit()
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            responses = []
+            if self._db is not None:
+                rows = self._db.execute(
+                    "SELECT response FROM responses WHERE key = ? ORDER BY variant", (key,)).fetchall()
+                responses = [row[0] for row in rows]
+            entry = {"responses": responses, "cursor": 0, "capacity": self.variants}
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        """
+        키의 응답이 variants 개 모두 모였으면 다음 차례의 응답을 반환하고(hit),
+        아니면 None 을 반환합니다(miss, 호출자가 새로 생성해 put 해야 함).
+        """
+        responses, _ = self.get_many(key, 1)
+        return responses[0] if responses else None
+
+    def get_many(self, key, n):
+        """
+        같은 키의 서로 다른 응답을 최대 n 개 꺼내 (응답 리스트, 모자란 개수) 를 반환합니다.
+        키의 응답이 variants 개 모이기 전이면 하나도 꺼내지 않고(모두 miss), 모인 응답이 n 개보다 적으면
+        있는 만큼만 꺼냅니다. 호출자는 모자란 개수만큼 새로 생성해 put 하며, 키가 모을 응답 수는 n 개까지 늘어납니다.
+        """
+        with self._lock:
+            entry = self._entry(key)
+            entry["capacity"] = max(entry["capacity"], n)
+            responses = entry["responses"]
+            if len(responses) < self.variants:
+                self.misses += n
+                return [], n
+            count = min(n, len(responses))
+            start = entry["cursor"]
+            entry["cursor"] += count
+            self.hits += count
+            self.misses += n - count
+            return [responses[(start + i) % len(responses)] for i in range(count)], n - count
+
+    def put(self, key, response):
+        """새로 생성한 응답을 키의 변형 목록에 추가합니다. (모을 응답 수가 차거나 이미 있는 응답이면 무시)"""
+        with self._lock:
+            entry = self._entry(key)
+            if len(entry["responses"]) >= max(self.variants, entry["capacity"]) or response in entry["responses"]:
+                return
+            entry["responses"].append(response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, variant, response) VALUES (?, ?, ?)",
+                    (key, len(entry["responses"]) - 1, response))
+                self._db.commit()
+
+    def stats(self):
+        """적중/미스/제거 횟수와 메모리에 있는 키 개수를 반환합니다."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
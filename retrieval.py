@@ -0,0 +1,132 @@
+# retrieval.py
+
+import torch
+import torch.nn.functional as F
+
+from ann_index import ANN_MIN_SIZE, IVFIndex
+
+# fp16/int8 행렬의 점수를 계산할 때 한 번에 float32 로 올리는 행 수
+SCORE_CHUNK = 8192
+
+
+class TopicMatrix:
+    """
+    한 주제의 후보 단어 임베딩을 L2 정규화된 (N, d) 행렬 하나로 보관합니다.
+    코사인 유사도 순위는 행렬곱 한 번과 topk 로 계산합니다.
+    단어가 ann_min_size 개 이상이면 IVF 근사 인덱스(ann_index.IVFIndex)를 만들어
+    상위 k 개만 필요한 질의(rank(k=...), best_words)에 사용하고, 전체 순위는 항상 정확히 계산합니다.
+    """
+
+    def __init__(self, words, matrix, ann_min_size=ANN_MIN_SIZE, normalized=False, row_scales=None):
+        self.words = list(words)
+        # normalized=True: 이미 정규화된 행렬이면 dtype(float32/fp16/int8) 그대로 복사 없이 사용 (예: packed vocabulary)
+        # row_scales: int8 처럼 행마다 곱해야 정규화되는 행렬의 (N,) float32 스케일
+        self.matrix = matrix if normalized else F.normalize(matrix.float(), dim=-1)
+        self.row_scales = row_scales
+        self.index = None
+        if len(self.words) >= ann_min_size:
+            scales = None if row_scales is None else row_scales.numpy()
+            self.index = IVFIndex(self.matrix.numpy(), scales=scales)
+
+    @classmethod
+    def from_embeddings(cls, word_embeddings):
+        """{단어: 임베딩} 딕셔너리로부터 행렬을 만듭니다. (중복 단어는 하나로 합쳐짐)"""
+        words = list(word_embeddings.keys())
+        return cls(words, torch.stack([word_embeddings[word] for word in words]))
+
+    def __len__(self):
+        return len(self.words)
+
+    def scores(self, query_embeddings):
+        """(d,) 또는 (B, d) 질의 임베딩에 대한 코사인 유사도 (B, N) 행렬을 반환합니다."""
+        queries = F.normalize(query_embeddings.float().reshape(-1, self.matrix.shape[1]), dim=-1)
+        if self.matrix.dtype == torch.float32:
+            scores = queries @ self.matrix.T
+        else:
+            # fp16/int8 은 float32 복사본을 만들지 않고 SCORE_CHUNK 행씩만 올려 계산
+            scores = torch.cat([queries @ self.matrix[start:start + SCORE_CHUNK].float().T
+                                for start in range(0, self.matrix.shape[0], SCORE_CHUNK)], dim=1)
+        if self.row_scales is not None:
+            scores *= self.row_scales
+        return scores
+
+    def _top_k(self, query_embeddings, k, exact=False):
+        if self.index is not None and not exact and k < len(self.words):
+            queries = F.normalize(query_embeddings.float().reshape(-1, self.matrix.shape[1]), dim=-1)
+            values, indices = self.index.search(queries.numpy(), k)
+            return torch.from_numpy(values), torch.from_numpy(indices)
+        return torch.topk(self.scores(query_embeddings), k, dim=1)
+
+    def rank_batch(self, query_embeddings, k=None, exact=False):
+        """
+        여러 질의를 한 번에 순위화하여, 질의마다 유사도 내림차순 {단어: 유사도} 딕셔너리 리스트를 반환합니다.
+        k 를 주면 상위 k 개만 담습니다. (ANN 인덱스가 있으면 근사 검색, exact=True 면 전체 탐색)
+        """
+        k = len(self.words) if k is None else min(k, len(self.words))
+        values, indices = self._top_k(query_embeddings, k, exact)
+        return [
+            {self.words[i]: v for i, v in zip(row_indices.tolist(), row_values.tolist())}
+            for row_values, row_indices in zip(values, indices)
+        ]
+
+    def rank(self, query_embedding, k=None, exact=False):
+        """질의 하나에 대한 유사도 내림차순 {단어: 유사도} 딕셔너리를 반환합니다. (evaluation.py 지표와 호환)"""
+        return self.rank_batch(query_embedding, k, exact)[0]
+
+    def best_words(self, query_embeddings):
+        """질의마다 가장 유사한 단어 하나씩을 리스트로 반환합니다."""
+        if self.index is not None:
+            return [self.words[i] for i in self._top_k(query_embeddings, 1)[1][:, 0].tolist()]
+        return [self.words[i] for i in self.scores(query_embeddings).argmax(dim=1).tolist()]
+
+
+class CommentAggregator:
+    """
+    설명 단계에서 지금까지 나온 설명들의 임베딩을 누적하는 집계기.
+    설명은 들어올 때 한 번만 임베딩하고, 토큰 수로 가중한 합(토큰 단위 평균 풀링의 합)을 유지하므로
+    질의 시 앞선 설명들을 다시 BERT 에 넣지 않습니다.
+    설명마다 따로 인코딩하므로 플레이어가 많아도 이어 붙인 문장이 최대 길이에서 잘리지 않습니다.
+    encode_fn(리스트) 를 주면 encoder.encode 대신 사용합니다. (예: 공유 추론 스케줄러)
+    """
+
+    def __init__(self, encoder, encode_fn=None):
+        self.encoder = encoder
+        self.encode_fn = encode_fn or encoder.encode
+        self.reset()
+
+    def reset(self):
+        self.texts = []
+        self._token_sum = None
+        self._token_count = 0
+
+    def add(self, texts):
+        """새 설명(문자열 또는 리스트)을 한 번에 임베딩하여 누적합니다."""
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        if not texts:
+            return
+        vectors = self.encode_fn(texts).float()
+        # 평균 풀링에 쓰인 토큰 수 (인코더와 같은 토크나이저/잘림 설정)
+        counts = torch.tensor(
+            [sum(mask) for mask in self.encoder.tokenizer(texts, truncation=True)["attention_mask"]],
+            dtype=torch.float32,
+        )
+        token_sum = (vectors * counts.unsqueeze(1)).sum(dim=0)
+        self._token_sum = token_sum if self._token_sum is None else self._token_sum + token_sum
+        self._token_count += float(counts.sum())
+        self.texts.extend(texts)
+
+    def sync(self, descriptions):
+        """
+        지금까지의 설명 리스트에 맞춥니다. 이미 누적한 설명 뒤에 이어지는 새 설명만 임베딩하고,
+        앞부분이 달라졌으면(새 라운드 등) 처음부터 다시 누적합니다.
+        """
+        descriptions = list(descriptions)
+        if descriptions[:len(self.texts)] != self.texts:
+            self.reset()
+        self.add(descriptions[len(self.texts):])
+
+    def embedding(self):
+        """누적된 설명들의 토큰 가중 평균 임베딩 (d,) 를 반환합니다. 설명이 없으면 None."""
+        if not self._token_count:
+            return None
+        return self._token_sum / self._token_count
@@ -0,0 +1,270 @@
+# simulator.py
+"""
+입출력 없이 AI 플레이어들만으로 라운드를 반복 실행하는 헤드리스 시뮬레이터.
+처리량(rounds/sec), 단계별 지연 시간, 최대 RSS 를 측정하는 부하/회귀 테스트용 도구입니다.
+
+    python simulator.py --rounds 1000 --players 5 --source stub
+    python simulator.py --rounds 50 --source replay --corpus descriptions.json
+    python simulator.py --rounds 10 --source llm --record descriptions.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import resource
+import statistics
+import time
+
+from evaluation import recall_k, MRR, NDCG
+from gpt_client import get_gpt_client
+from instrumentation import metrics
+from liar_game import LiarGame
+from player import Player
+
+PHASES = ("role_assignment", "description", "retrieval", "sts_voting", "scoring")
+
+
+class StubDescriptionSource:
+    """
+    네트워크 없이 결정적으로 설명을 만드는 소스. 같은 seed 면 항상 같은 설명을 생성합니다.
+    진실 플레이어는 제시어의 주제와 글자 수만 담은 템플릿 문장을, 라이어는 같은 주제의 다른 단어로 만든 문장을 말합니다.
+    제시어를 그대로 넣으면 검색 지표가 글자 일치만 재게 되므로 넣지 않습니다. 그래도 설명에 제시어의 의미가
+    거의 없어 Recall@k/MRR/NDCG 는 체크포인트 품질을 나타내지 않습니다. (처리량/회귀 측정용,
+    체크포인트 비교는 ReplayDescriptionSource 와 실제 설명 코퍼스로)
+    """
+
+    TEMPLATES = (
+        "{topic} 중에서 {length}글자인 것을 떠올리면 됩니다.",
+        "누구나 한 번쯤 생각해 본 {topic}이고, 이름은 {length}글자예요.",
+        "일상에서 쉽게 마주칠 수 있는 {topic}이에요. ({length}글자)",
+    )
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+
+    def describe(self, topic, word):
+        return self.rng.choice(self.TEMPLATES).format(topic=topic, length=len(word.replace(" ", "")))
+
+    def truth_descriptions(self, game, secret_word, count):
+        return [self.describe(game.chosen_topic, secret_word) for _ in range(count)]
+
+    def liar_description(self, game, previous_comments):
+        word = self.rng.choice(game.topics[game.chosen_topic])
+        return self.describe(game.chosen_topic, word)
+
+
+class ReplayDescriptionSource(StubDescriptionSource):
+    """
+    미리 모아 둔 설명 코퍼스({제시어: [설명, ...]} JSON)를 돌아가며 재생하는 소스.
+    코퍼스에 없는 제시어와 라이어 설명은 StubDescriptionSource 방식으로 만듭니다.
+    """
+
+    def __init__(self, corpus_path, seed=0):
+        super().__init__(seed)
+        with open(corpus_path, encoding="utf-8") as f:
+            self.corpus = json.load(f)
+        self._cursors = {}
+
+    def truth_descriptions(self, game, secret_word, count):
+        replies = self.corpus.get(secret_word)
+        if not replies:
+            return super().truth_descriptions(game, secret_word, count)
+        start = self._cursors.get(secret_word, 0)
+        self._cursors[secret_word] = start + count
+        return [replies[(start + i) % len(replies)] for i in range(count)]
+
+
+class LLMDescriptionSource:
+    """
+    실제 GPT 를 호출하는 소스. record_path 를 주면 생성된 진실 플레이어 설명을
+    ReplayDescriptionSource 가 읽을 수 있는 코퍼스 형식으로 저장합니다.
+    """
+
+    def __init__(self, record_path=None):
+        self.record_path = record_path
+        self.corpus = {}
+
+    def truth_descriptions(self, game, secret_word, count):
+        replies = get_gpt_client().generate_many([game.truth_description_prompt(secret_word)] * count)
+        descriptions = [reply if reply else "설명을 생성하는 데 실패했습니다." for reply in replies]
+        self.corpus.setdefault(secret_word, []).extend(descriptions)
+        return descriptions
+
+    def liar_description(self, game, previous_comments):
+        description, _ = game.generate_ai_liar_description(previous_comments)
+        return description
+
+    def save(self):
+        if self.record_path:
+            with open(self.record_path, "w", encoding="utf-8") as f:
+                json.dump(self.corpus, f, ensure_ascii=False, indent=2)
+
+
+class Simulator:
+    """
+    AI 플레이어 num_players 명으로 구성된 LiarGame 을 만들어 라운드를 반복합니다.
+    LiarGame 의 디버그 출력은 버리고, 라운드마다 단계별 소요 시간을 기록합니다.
+    """
+
+    def __init__(self, num_players=5, source=None, seed=0, k=3):
+        random.seed(seed)
+        self.source = source or StubDescriptionSource(seed)
+        self.k = k
+        players = [Player(f"AI_{i + 1}") for i in range(num_players)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.game = LiarGame(players, total_rounds=0)
+        self.phase_times = {phase: [] for phase in PHASES}
+
+    def run_round(self):
+        """
+        한 라운드를 진행하고 결과 딕셔너리를 반환합니다.
+        (라이어, 제시어, 라이어 AI 가 예측한 단어 순위, recall@k/MRR/NDCG, 라이어 지목 여부)
+        """
+        game = self.game
+        timings = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            game.assign_roles()
+            chosen_topic = random.choice(list(game.topics.keys()))
+            secret_word = random.choice(game.topics[chosen_topic])
+            game.chosen_topic = chosen_topic
+            order = game.players.copy()
+            random.shuffle(order)
+            if order[0].is_liar:
+                # 라이어는 첫 번째가 되지 않도록
+                liar_player = order.pop(0)
+                order.insert(random.randint(1, len(order)), liar_player)
+            timings["role_assignment"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            truth_players = [player for player in order if not player.is_liar]
+            truth_descriptions = dict(zip(
+                (player.name for player in truth_players),
+                self.source.truth_descriptions(game, secret_word, len(truth_players)),
+            ))
+            descriptions = {}
+            liar_previous = []
+            for player in order:
+                if player.is_liar:
+                    liar_previous = list(descriptions.values())
+                    descriptions[player.name] = self.source.liar_description(game, liar_previous)
+                else:
+                    descriptions[player.name] = truth_descriptions[player.name]
+            timings["description"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            predicted_dict = game.predict_secret_word_from_descriptions(liar_previous)
+            metrics = {
+                "recall_k": float(recall_k(predicted_dict, secret_word, self.k)),
+                "MRR": MRR(predicted_dict, secret_word),
+                "NDCG": NDCG(predicted_dict, secret_word),
+            }
+            timings["retrieval"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            votes = {}
+            for player in game.players:
+                vote = game.generate_ai_vote(player, descriptions)
+                votes[vote] = votes.get(vote, 0) + 1
+            timings["sts_voting"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            highest_votes = max(votes.values())
+            caught = game.liar.name in [name for name, cnt in votes.items() if cnt == highest_votes]
+            if caught:
+                for player in game.players:
+                    if not player.is_liar:
+                        player.score += 1
+                # AI 라이어는 마지막 설명까지 모두 보고 가장 유사한 단어로 제시어를 추측
+                liar_guess = next(iter(game.predict_secret_word_from_descriptions(descriptions.values(), k=1)))
+                if liar_guess == secret_word:
+                    game.liar.score += 3
+            else:
+                game.liar.score += 1
+            game.current_round += 1
+            timings["scoring"] = time.perf_counter() - start
+
+        for phase, seconds in timings.items():
+            self.phase_times[phase].append(seconds)
+        return {
+            "topic": chosen_topic,
+            "secret_word": secret_word,
+            "liar": game.liar.name,
+            "caught": caught,
+            "predicted": list(predicted_dict.keys()),
+            **metrics,
+        }
+
+    def run(self, rounds):
+        """rounds 라운드를 실행하고 (라운드 결과 리스트, 성능 리포트) 를 반환합니다."""
+        start = time.perf_counter()
+        results = [self.run_round() for _ in range(rounds)]
+        elapsed = time.perf_counter() - start
+        return results, self.report(rounds, elapsed)
+
+    def report(self, rounds, elapsed):
+        phases = {}
+        for phase, samples in self.phase_times.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            phases[phase] = {
+                "mean_ms": statistics.fmean(samples) * 1000,
+                "p50_ms": ordered[len(ordered) // 2] * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            }
+        return {
+            "rounds": rounds,
+            "players": len(self.game.players),
+            "elapsed_s": elapsed,
+            "rounds_per_sec": rounds / elapsed if elapsed else 0.0,
+            "phases": phases,
+            # Linux 에서 ru_maxrss 단위는 KB
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            # 핫 패스별 호출 수/소요 시간 (instrumentation.metrics, LIAR_METRICS=0 이면 빈 값)
+            "metrics": metrics.snapshot(),
+        }
+
+
+def make_source(name, corpus=None, record=None, seed=0):
+    if name == "stub":
+        return StubDescriptionSource(seed)
+    if name == "replay":
+        if not corpus:
+            raise ValueError("--source replay 에는 --corpus 경로가 필요합니다.")
+        return ReplayDescriptionSource(corpus, seed)
+    if name == "llm":
+        return LLMDescriptionSource(record)
+    raise ValueError(f"알 수 없는 설명 소스: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--source", choices=("stub", "replay", "llm"), default="stub")
+    parser.add_argument("--corpus", help="replay 소스가 읽을 설명 코퍼스(JSON)")
+    parser.add_argument("--record", help="llm 소스가 생성한 설명을 저장할 경로(JSON)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="성능 리포트를 저장할 경로")
+    args = parser.parse_args()
+
+    source = make_source(args.source, args.corpus, args.record, args.seed)
+    simulator = Simulator(args.players, source, seed=args.seed)
+    _, report = simulator.run(args.rounds)
+    if isinstance(source, LLMDescriptionSource):
+        source.save()
+
+    print(f"{report['rounds']} 라운드 / {report['elapsed_s']:.2f}s = {report['rounds_per_sec']:.1f} rounds/sec")
+    for phase, stats in report["phases"].items():
+        print(f"  {phase:<16} mean {stats['mean_ms']:8.2f}ms  p50 {stats['p50_ms']:8.2f}ms  p95 {stats['p95_ms']:8.2f}ms")
+    print(f"최대 RSS: {report['peak_rss_mb']:.1f} MB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# sts.py
+
+import torch
+
+from inference_runtime import inference_slot
+
+
+class STSEngine:
+    """
+    STS cross-encoder 로 문장 쌍 유사도를 배치 단위로 계산합니다.
+    한 라운드의 설명들에 대해 서로 다른 (순서 없는) 쌍을 한 번씩만 계산해 대칭 행렬로 캐시하고,
+    모든 AI 투표자가 같은 행렬을 읽어 갑니다.
+
+    padding="longest" (기본값) 이면 쌍들을 토큰 길이순으로 정렬해 비슷한 길이끼리 배치(버킷)로 묶고,
+    각 배치에서 가장 긴 쌍 길이까지만 패딩합니다. padding="max_length" 는 예전처럼 max_length 로 고정 패딩합니다.
+    truncation=True 를 주었을 때만 max_length 로 잘라내며, 기본값에서는 모델이 받을 수 있는 최대 길이를
+    넘는 입력만 잘립니다.
+    """
+
+    def __init__(self, tokenizer, model, batch_size=32, max_length=128, padding="longest", truncation=False,
+                 score_fn=None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.padding = padding
+        self.truncation = truncation
+        # 행렬 계산에 쓰는 쌍 점수 함수 (게임은 추론 스케줄러를 넘겨 다른 세션 요청과 함께 배치로 처리)
+        self.score_fn = score_fn or self.score_pairs
+        self._cached_key = None
+        self._cached_matrix = None
+
+    def _model_max_length(self):
+        limit = getattr(self.model.config, "max_position_embeddings", None) or self.max_length
+        return min(limit, self.tokenizer.model_max_length)
+
+    def encode_batches(self, pairs):
+        """
+        pairs 를 모델 입력 배치로 토크나이즈하여 (원래 인덱스 리스트, 입력 텐서 딕셔너리) 를 차례로 반환합니다.
+        """
+        if not pairs:
+            return
+        if self.padding == "max_length":
+            for start in range(0, len(pairs), self.batch_size):
+                batch = pairs[start:start + self.batch_size]
+                inputs = self.tokenizer([a for a, _ in batch], [b for _, b in batch], return_tensors="pt",
+                                        truncation=True, padding="max_length", max_length=self.max_length)
+                yield list(range(start, start + len(batch))), inputs
+            return
+
+        max_length = self.max_length if self.truncation else self._model_max_length()
+        encodings = self.tokenizer([a for a, _ in pairs], [b for _, b in pairs],
+                                   truncation=True, max_length=max_length)
+        # 길이 버킷: 비슷한 길이끼리 같은 배치에 넣어 패딩을 최소화
+        order = sorted(range(len(pairs)), key=lambda i: len(encodings["input_ids"][i]))
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in indices]
+            yield indices, self.tokenizer.pad(features, padding="longest", return_tensors="pt")
+
+    def score_pairs(self, pairs):
+        """
+        [(문장1, 문장2), ...] 의 유사도를 배치로 계산하고 0~1 로 정규화한 리스트를 반환합니다.
+        """
+        scores = [0.0] * len(pairs)
+        for indices, inputs in self.encode_batches(pairs):
+            with torch.no_grad(), inference_slot():
+                logits = self.model(**inputs).logits
+            # 모델의 출력값 (보통 0~5 점수) 정규화
+            for i, score in zip(indices, (logits.view(-1) / 5).tolist()):
+                scores[i] = score
+        return scores
+
+    def similarity_matrix(self, sentences):
+        """
+        sentences 사이의 (n, n) 대칭 유사도 행렬을 반환합니다. 대각 성분은 1 입니다.
+        직전과 같은 문장 목록이면 다시 계산하지 않고 캐시된 행렬을 반환합니다.
+        """
+        key = tuple(sentences)
+        if key == self._cached_key:
+            return self._cached_matrix
+
+        n = len(sentences)
+        index_pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        scores = self.score_fn([(sentences[i], sentences[j]) for i, j in index_pairs])
+        matrix = torch.eye(n)
+        for (i, j), score in zip(index_pairs, scores):
+            matrix[i, j] = matrix[j, i] = score
+
+        self._cached_key = key
+        self._cached_matrix = matrix
+        return matrix
+
+
+VOTE_SCORER_MODES = ("cross", "bi", "cascade")
+
+
+class VoteScorer:
+    """
+    투표 의심도 계산에 쓰는 설명 간 유사도 행렬 계산기.
+
+    - "cross":   모든 쌍을 STS cross-encoder 로 계산 (n(n-1)/2 번의 쌍 계산)
+    - "bi":      설명마다 문장 인코더로 한 번씩만 임베딩하고 행렬곱 한 번으로 코사인 유사도 계산 (n 번)
+    - "cascade": bi 로 전체를 계산한 뒤, 유사도가 가장 낮은(가장 의심스러운) cascade_pairs 개 쌍만
+                 cross-encoder 로 다시 계산하고, 나머지 bi 점수는 다시 계산한 쌍으로 맞춘
+                 선형 보정(a * cos + b)을 거쳐 cross-encoder 척도로 바꿉니다.
+                 cascade_pairs 를 주지 않으면 설명 수 n 만큼만 다시 계산합니다.
+    """
+
+    def __init__(self, sts_engine, encoder, mode="cross", cascade_pairs=None, encode_fn=None):
+        if mode not in VOTE_SCORER_MODES:
+            raise ValueError(f"지원하지 않는 투표 점수 방식: {mode} (가능한 값: {', '.join(VOTE_SCORER_MODES)})")
+        self.sts_engine = sts_engine
+        self.encoder = encoder
+        self.encode_fn = encode_fn or encoder.encode
+        self.mode = mode
+        self.cascade_pairs = cascade_pairs
+        self._cached_key = None
+        self._cached_matrix = None
+
+    def bi_matrix(self, sentences):
+        embeddings = torch.nn.functional.normalize(self.encode_fn(list(sentences)), dim=-1)
+        return embeddings @ embeddings.T
+
+    def _cascade_matrix(self, sentences):
+        matrix = self.bi_matrix(sentences)
+        n = len(sentences)
+        index_pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        if not index_pairs:
+            return torch.eye(n)
+        budget = min(len(index_pairs), self.cascade_pairs or n)
+        index_pairs.sort(key=lambda pair: matrix[pair].item())
+        rescored = index_pairs[:budget]
+        cross_scores = torch.tensor(self.sts_engine.score_fn([(sentences[i], sentences[j]) for i, j in rescored]))
+
+        # 다시 계산한 쌍으로 bi 점수 -> cross 점수 선형 보정 (쌍이 부족하거나 분산이 없으면 평균 이동만)
+        bi_scores = torch.tensor([matrix[pair].item() for pair in rescored])
+        slope = torch.tensor(1.0)
+        if len(rescored) >= 2 and bi_scores.var() > 1e-12:
+            slope = ((bi_scores - bi_scores.mean()) * (cross_scores - cross_scores.mean())).sum() \
+                / ((bi_scores - bi_scores.mean()) ** 2).sum()
+        intercept = cross_scores.mean() - slope * bi_scores.mean()
+        calibrated = slope * matrix + intercept
+        for (i, j), score in zip(rescored, cross_scores.tolist()):
+            calibrated[i, j] = calibrated[j, i] = score
+        calibrated.fill_diagonal_(1.0)
+        return calibrated
+
+    def similarity_matrix(self, sentences):
+        """
+        설정된 방식으로 (n, n) 대칭 유사도 행렬을 반환합니다. 직전과 같은 문장 목록이면 캐시를 반환합니다.
+        """
+        if self.mode == "cross":
+            return self.sts_engine.similarity_matrix(sentences)
+        key = tuple(sentences)
+        if key != self._cached_key:
+            self._cached_matrix = self.bi_matrix(sentences) if self.mode == "bi" else self._cascade_matrix(sentences)
+            self._cached_key = key
+        return self._cached_matrix
+
+
+def vote_agreement(reference_probs, candidate_probs):
+    """
+    같은 투표 상황들에 대한 두 방식의 투표 확률 분포 리스트를 비교합니다.
+    top1_agreement: 가장 의심하는 후보가 같은 비율, mean_tv_distance: 평균 total variation 거리
+    """
+    if not reference_probs:
+        return {"top1_agreement": None, "mean_tv_distance": None}
+    same_top1 = 0
+    tv_total = 0.0
+    for ref, cand in zip(reference_probs, candidate_probs):
+        same_top1 += max(range(len(ref)), key=ref.__getitem__) == max(range(len(cand)), key=cand.__getitem__)
+        tv_total += 0.5 * sum(abs(a - b) for a, b in zip(ref, cand))
+    return {"top1_agreement": same_top1 / len(reference_probs), "mean_tv_distance": tv_total / len(reference_probs)}
@@ -0,0 +1,189 @@
+# vocab_pack.py
+"""
+주제 어휘와 단어 임베딩을 파일 하나로 묶은 packed vocabulary 형식.
+
+    python -m liar_game build-vocab --input words.tsv --out vocab.pack [--dtype fp16|int8|fp32]
+
+파일 구성 (모든 구간은 64바이트 정렬)
+- 매직 b"LIARVOC1" + manifest 길이(uint64, little endian) + manifest(JSON)
+- vectors:       (N, d) L2 정규화된 벡터 (fp32 / fp16 / int8)
+- scales:        (N,) float32, int8 일 때만 (행별 대칭 양자화 스케일)
+- topic_offsets: (T + 1,) int64, 주제 t 의 단어는 [topic_offsets[t], topic_offsets[t + 1]) 행
+- word_offsets:  (N + 1,) int64, 단어 i 는 strings[word_offsets[i]:word_offsets[i + 1]] (utf-8)
+- strings:       단어 문자열 테이블
+
+manifest 에는 주제 이름, 벡터 dtype/차원, 각 구간의 위치와 임베딩 모델 체크포인트 해시, 만들 때의
+추론 백엔드가 들어갑니다. 실행 시에는 numpy.memmap 으로 열고, 게임은 단어 임베딩을 다시 계산하지 않습니다.
+
+메모리 (단어 N 개, d 차원)
+- 벡터는 dtype 그대로 파일(페이지 캐시)을 가리키며 float32 로 복사하지 않습니다.
+  fp32: N*d*4, fp16(기본): N*d*2, int8: N*(d+4) 바이트 (여러 프로세스가 공유)
+- fp16/int8 의 점수 계산은 SCORE_CHUNK(retrieval.py) 행씩 float32 로 올려 하므로,
+  질의마다 블록 하나 크기(SCORE_CHUNK*d*4 바이트)의 임시 메모리가 더 듭니다.
+- int8 은 로드할 때 행별 스케일을 다시 정규화한 (N,) float32 배열을 프로세스마다 하나 만듭니다.
+- 단어 문자열은 프로세스마다 파이썬 문자열로 읽습니다.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"LIARVOC1"
+ALIGNMENT = 64
+DTYPES = {"fp32": np.float32, "fp16": np.float16, "int8": np.int8}
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_packed_vocabulary(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _quantize(vectors, dtype):
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    if dtype == "int8":
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    return vectors.astype(DTYPES[dtype]), None
+
+
+def write_packed_vocabulary(path, topics, vectors, dtype="fp16", model_hash=None, extra=None):
+    """
+    topics: {주제: 단어 리스트}, vectors: 주제 순서대로 이어 붙인 단어들의 (N, d) 임베딩.
+    같은 단어가 여러 주제에 있으면 주제마다 행을 따로 둡니다.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"지원하지 않는 dtype: {dtype} (가능한 값: {', '.join(DTYPES)})")
+    words = [word for topic_words in topics.values() for word in topic_words]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.shape[0] != len(words):
+        raise ValueError(f"단어 수({len(words)})와 벡터 수({vectors.shape[0]})가 다릅니다.")
+    packed, scales = _quantize(vectors, dtype)
+    encoded = [word.encode("utf-8") for word in words]
+    sections = {
+        "vectors": packed,
+        "scales": scales,
+        "topic_offsets": np.concatenate([[0], np.cumsum([len(w) for w in topics.values()])]).astype(np.int64),
+        "word_offsets": np.concatenate([[0], np.cumsum([len(b) for b in encoded])]).astype(np.int64),
+        "strings": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+    sections = {name: array for name, array in sections.items() if array is not None}
+
+    manifest = {
+        "format": 1,
+        "dtype": dtype,
+        "dim": int(vectors.shape[1]),
+        "count": len(words),
+        "topics": list(topics),
+        "model_hash": model_hash,
+        **(extra or {}),
+    }
+    # manifest 크기가 구간 위치에 영향을 주므로, 위치를 넣은 뒤 크기가 안정될 때까지 다시 계산
+    header_size = 0
+    while True:
+        offset = _align(header_size)
+        manifest["sections"] = {}
+        for name, array in sections.items():
+            manifest["sections"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _align(offset + array.nbytes)
+        manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+        new_header_size = len(MAGIC) + 8 + len(manifest_bytes)
+        if new_header_size == header_size:
+            break
+        header_size = new_header_size
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(manifest_bytes)) + manifest_bytes)
+        for name, array in sections.items():
+            f.write(b"\0" * (manifest["sections"][name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+    return manifest
+
+
+class PackedVocabulary:
+    """
+    write_packed_vocabulary 로 만든 파일을 numpy.memmap 으로 엽니다.
+    구간들은 파일을 그대로 가리키는 배열이므로, 여러 프로세스가 열어도 페이지 캐시를 공유합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"packed vocabulary 파일이 아닙니다: {path}")
+            (length,) = struct.unpack("<Q", f.read(8))
+            self.manifest = json.loads(f.read(length).decode("utf-8"))
+        # 'c'(copy-on-write) 모드: 파일은 바뀌지 않고 torch.from_numpy 로 복사 없이 넘길 수 있음
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="c")
+        self.sections = {
+            name: np.ndarray(tuple(info["shape"]), dtype=np.dtype(info["dtype"]), buffer=self._buffer,
+                             offset=info["offset"])
+            for name, info in self.manifest["sections"].items()
+        }
+        self.model_hash = self.manifest.get("model_hash")
+        self.topics = {}
+        strings = self.sections["strings"]
+        word_offsets = self.sections["word_offsets"].tolist()
+        topic_offsets = self.sections["topic_offsets"].tolist()
+        for t, topic in enumerate(self.manifest["topics"]):
+            self.topics[topic] = [
+                bytes(strings[word_offsets[i]:word_offsets[i + 1]]).decode("utf-8")
+                for i in range(topic_offsets[t], topic_offsets[t + 1])
+            ]
+
+    def topic_vectors(self, topic):
+        """
+        주제 단어들의 (n, d) 벡터(파일을 그대로 가리키는 fp32/fp16/int8 배열)와 행별 스케일을 반환합니다.
+        스케일은 int8 일 때만 있으며, 양자화로 달라진 행 길이까지 보정해 vectors * scales 가 단위 벡터가 되도록 한
+        (n,) float32 배열입니다. (그 밖의 dtype 은 None)
+        """
+        t = self.manifest["topics"].index(topic)
+        start, end = self.sections["topic_offsets"][t:t + 2]
+        vectors = self.sections["vectors"][start:end]
+        if self.manifest["dtype"] != "int8":
+            return vectors, None
+        norms = np.concatenate([
+            np.linalg.norm(np.asarray(vectors[i:i + 8192], dtype=np.float32), axis=1)
+            for i in range(0, vectors.shape[0], 8192)
+        ]) if vectors.shape[0] else np.zeros(0, dtype=np.float32)
+        return vectors, 1 / np.maximum(norms, 1e-12).astype(np.float32)
+
+    def topic_matrix(self, topic):
+        """주제의 retrieval.TopicMatrix 를 만듭니다. (임베딩 모델을 실행하지 않고, 벡터도 복사하지 않음)"""
+        import torch
+        from retrieval import TopicMatrix
+
+        vectors, scales = self.topic_vectors(topic)
+        return TopicMatrix(self.topics[topic], torch.from_numpy(vectors), normalized=True,
+                           row_scales=None if scales is None else torch.from_numpy(scales))
+
+
+def build_vocabulary(topics, out_path, dtype="fp16", batch_size=256):
+    """
+    {주제: 단어 리스트} 의 단어들을 BERT 인코더(BERT_MODEL_PATH)로 임베딩하여 out_path 에 packed 파일로 씁니다.
+    """
+    from ai_utils_bert import BERT_MODEL_PATH
+    from embedding_cache import model_checkpoint_hash
+    from resources import get_embedding_model
+    from vocabulary import normalize_topics
+
+    topics = normalize_topics(topics)
+    encoder = get_embedding_model()
+    unique_words = list(dict.fromkeys(word for words in topics.values() for word in words))
+    embeddings = encoder.encode(unique_words, batch_size=batch_size).numpy()
+    row = {word: i for i, word in enumerate(unique_words)}
+    vectors = embeddings[[row[word] for words in topics.values() for word in words]]
+    return write_packed_vocabulary(
+        out_path, topics, vectors, dtype,
+        model_hash=model_checkpoint_hash(BERT_MODEL_PATH),
+        extra={"model_path": BERT_MODEL_PATH, "backend": encoder.backend},
+    )
@@ -0,0 +1,53 @@
+# vocabulary.py
+"""
+주제별 단어 목록(어휘)을 외부 파일에서 읽어오는 모듈.
+
+지원 형식
+- JSON: {"주제": ["단어", ...], ...}
+- CSV / TSV: 한 줄에 `주제,단어` (TSV 는 탭 구분). 첫 줄이 `topic,word` 이면 헤더로 보고 건너뜁니다.
+
+모든 경로는 normalize_topics 를 거쳐 앞뒤 공백 제거, 빈 단어 제거, 주제 안 중복 제거(처음 순서 유지)가 됩니다.
+"""
+
+import csv
+import json
+import os
+
+HEADER = ("topic", "word")
+
+
+def normalize_topics(topics):
+    """{주제: 단어 리스트} 에서 공백/빈 단어를 정리하고 주제마다 중복 단어를 제거합니다."""
+    normalized = {}
+    for topic, words in topics.items():
+        cleaned = [word.strip() for word in words if word and word.strip()]
+        if cleaned:
+            normalized[topic.strip()] = list(dict.fromkeys(cleaned))
+    return normalized
+
+
+def _read_table(path, delimiter):
+    topics = {}
+    with open(path, encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.reader(f, delimiter=delimiter)):
+            if not row or (i == 0 and tuple(cell.strip().lower() for cell in row[:2]) == HEADER):
+                continue
+            if len(row) < 2:
+                raise ValueError(f"{path}:{i + 1}: '주제{delimiter}단어' 형식이 아닙니다: {row}")
+            topics.setdefault(row[0], []).append(row[1])
+    return topics
+
+
+def load_vocabulary(path):
+    """어휘 파일을 읽어 정리된 {주제: 단어 리스트} 를 반환합니다. (확장자로 형식 판단)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            topics = json.load(f)
+    elif extension == ".csv":
+        topics = _read_table(path, ",")
+    elif extension in (".tsv", ".txt"):
+        topics = _read_table(path, "\t")
+    else:
+        raise ValueError(f"지원하지 않는 어휘 파일 형식: {path} (json/csv/tsv)")
+    return normalize_topics(topics)